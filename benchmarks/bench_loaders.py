@@ -0,0 +1,76 @@
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+
+from src.utils.helpers import extract_numbers_from_text, normalize_phones
+
+
+def _timed(fn, *args):
+    """
+    Ejecuta fn midiendo tiempo y pico de memoria de Python. Retorna (resultado, segundos, pico_mb).
+    tracemalloc distorsiona los tiempos, así que la memoria se mide en una segunda pasada.
+    """
+    t0 = time.perf_counter()
+    result = fn(*args)
+    elapsed = time.perf_counter() - t0
+
+    tracemalloc.start()
+    fn(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, round(elapsed, 4), round(peak / 1024 / 1024, 1)
+
+
+def _random_phones(n, seed=7):
+    rnd = random.Random(seed)
+    formats = ("+51 9{:08d}", "9{:08d}", "519{:08d}", "(01) {:07d}", "+1 212 {:07d}", "{:04d}")
+    return [rnd.choice(formats).format(rnd.randrange(10 ** 7)) for _ in range(n)]
+
+
+def bench_helpers(n=1_000_000):
+    phones = _random_phones(n)
+    _, secs, peak = _timed(normalize_phones, phones)
+    text = "\n".join(f"Sr. Cliente {i} - Cel: {p}" for i, p in enumerate(phones[:200_000]))
+    _, secs_text, _ = _timed(extract_numbers_from_text, text)
+    return {
+        'normalize_phones': {'items': n, 'seconds': secs, 'per_sec': int(n / secs) if secs else 0, 'peak_mb': peak},
+        'extract_numbers_from_text': {'chars': len(text), 'seconds': secs_text},
+    }
+
+
+def _load_sources(path):
+    """Todos los contactos de `path` por el mismo camino que la importación de la ventana y la CLI."""
+    from src.services.data_service import DataService
+    return [contact for chunk in DataService.iter_sources([path]) for contact in chunk]
+
+
+def bench_excel(rows=200_000):
+    """Genera un .xlsx sintético y mide su importación con DataService.iter_sources (lectura en streaming)."""
+    from openpyxl import Workbook
+
+    phones = _random_phones(rows)
+    fd, path = tempfile.mkstemp(suffix=".xlsx")
+    os.close(fd)
+    try:
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet()
+        ws.append(["Nombre", "Celular", "Ciudad"])
+        for i, p in enumerate(phones):
+            ws.append([f"Cliente {i}", p, "Lima"])
+        wb.save(path)
+
+        data, secs, peak = _timed(_load_sources, path)
+        return {'rows': rows, 'loaded': len(data), 'seconds': secs,
+                'rows_per_sec': int(rows / secs) if secs else 0, 'peak_mb': peak}
+    finally:
+        os.remove(path)
+
+
+def bench_pdf(path):
+    """Mide DataService.load_pdf sobre un PDF real (no se genera uno sintético)."""
+    from src.services.data_service import DataService
+
+    data, secs, peak = _timed(DataService.load_pdf, path)
+    return {'file': os.path.basename(path), 'numbers': len(data), 'seconds': secs, 'peak_mb': peak}
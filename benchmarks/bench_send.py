@@ -0,0 +1,112 @@
+import base64
+import os
+import tempfile
+import time
+
+import config
+from benchmarks.mock_server import start_mock_server
+
+# PNG de 1x1 para medir el flujo de imagen sin depender de archivos externos
+_TINY_PNG = base64.b64decode(
+    "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mP8z8BQDwAEhQGAhKmMIQAAAABJRU5ErkJggg=="
+)
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+
+def _memory_mb(driver):
+    """RSS (MB) de este proceso y de Chrome + chromedriver, si psutil está instalado."""
+    if psutil is None:
+        return None
+    own = psutil.Process()
+    total = own.memory_info().rss
+    try:
+        service_pid = driver.service.process.pid
+        service = psutil.Process(service_pid)
+        for p in [service] + service.children(recursive=True):
+            total += p.memory_info().rss
+    except Exception:
+        pass
+    return round(total / 1024 / 1024, 1)
+
+
+def run(messages=30, with_image=True, invalid_every=10, load_ms=300, modal_ms=150, send_ms=100, search_ms=80,
+        navigation=None):
+    """
+    Envía `messages` mensajes con el WhatsAppBot real contra el WhatsApp Web simulado en Chrome headless.
+    Retorna un dict con msg/min, p50/p95 por paso y memoria.
+    """
+    from selenium import webdriver
+    from selenium.webdriver.chrome.options import Options
+    from selenium.webdriver.support.ui import WebDriverWait
+    from src.services.metrics import METRICS
+    from src.services.whatsapp_service import WhatsAppBot
+
+    server, base_url = start_mock_server()
+    config.WHATSAPP_URL = base_url
+    config.DELIVERY_MODE = "dom" # Headless no tiene portapapeles del SO
+    if navigation:
+        config.CHAT_NAVIGATION = navigation
+
+    image_path = None
+    if with_image:
+        fd, image_path = tempfile.mkstemp(suffix=".png")
+        with os.fdopen(fd, "wb") as f:
+            f.write(_TINY_PNG)
+
+    opts = Options()
+    opts.add_argument("--headless=new")
+    opts.add_argument("--disable-gpu")
+    opts.add_argument("--no-sandbox")
+    opts.add_argument("--window-size=1280,900")
+
+    bot = WhatsAppBot(name="BENCH")
+    bot.driver = webdriver.Chrome(options=opts)
+    bot.wait = WebDriverWait(bot.driver, config.WAIT_TIMEOUT)
+    try:
+        # Fija las latencias simuladas (quedan en sessionStorage de la pestaña)
+        bot.driver.get(f"{base_url}/?load_ms={load_ms}&modal_ms={modal_ms}&send_ms={send_ms}&search_ms={search_ms}")
+
+        METRICS.start_campaign()
+        sent = failed = 0
+        t0 = time.perf_counter()
+        for i in range(messages):
+            # Cada `invalid_every` contactos, un número que el mock marca como inválido
+            phone = f"+519{i:05d}000" if invalid_every and i % invalid_every == invalid_every - 1 else f"+519{i:07d}1"
+            try:
+                bot.send_message(phone, f"Hola {i}, esto es un benchmark", image_path)
+                sent += 1
+                METRICS.record_result(True)
+            except Exception:
+                failed += 1
+                METRICS.record_result(False)
+        elapsed = time.perf_counter() - t0
+
+        # Costo de un escaneo de ticks (ReceiptTracker): una sola llamada para toda la lista de chats
+        t_scan = time.perf_counter()
+        receipts = bot.read_receipts()
+        scan_ms = (time.perf_counter() - t_scan) * 1000
+
+        _, _, _, rows = METRICS.snapshot()
+        return {
+            'messages': messages,
+            'sent': sent,
+            'failed': failed,
+            'seconds': round(elapsed, 3),
+            'msg_per_min': round(sent * 60 / elapsed, 2) if elapsed else 0.0,
+            'steps': {name: {'count': count, 'p50': round(p50, 4), 'p95': round(p95, 4)}
+                      for name, count, mean, p50, p95 in rows},
+            'memory_mb': _memory_mb(bot.driver),
+            'receipt_scan': {'chats': len(receipts), 'ms': round(scan_ms, 2)},
+            'settings': {'image': with_image, 'load_ms': load_ms, 'modal_ms': modal_ms, 'send_ms': send_ms,
+                         'search_ms': search_ms, 'navigation': config.CHAT_NAVIGATION,
+                         'conservative': config.CONSERVATIVE_TIMINGS},
+        }
+    finally:
+        bot.close()
+        server.shutdown()
+        if image_path:
+            os.remove(image_path)
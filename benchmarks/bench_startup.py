@@ -0,0 +1,137 @@
+"""
+Arranque en frío: qué módulos se importan antes de la primera ventana y cuánto tarda en aparecer.
+
+    python -m benchmarks.bench_startup      # informe + control de regresión (sale con 1 si falla)
+
+Solo el toolkit de la UI debe cargarse al inicio: los lectores de datos, el PDF y el navegador
+se importan al usarlos o en segundo plano con la ventana ya abierta.
+"""
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# No deben cargarse al importar la ventana
+DEFERRED_MODULES = ("pandas", "pypdf", "openpyxl", "selenium", "webdriver_manager")
+
+# Presupuesto de tiempo hasta la primera ventana (segundos, desde que se lanza el proceso)
+FIRST_WINDOW_BUDGET = 3.0
+
+
+def _python(*args, env=None, timeout=120):
+    return subprocess.run([sys.executable, *args], cwd=ROOT, env=env, capture_output=True, text=True, timeout=timeout)
+
+
+def import_profile(top=15):
+    """
+    Perfil de `python -X importtime` al importar la ventana.
+    Retorna (segundos_totales, [(módulo, acumulado_ms, propio_ms), ...] de los paquetes de primer nivel).
+    """
+    proc = _python("-X", "importtime", "-c", "import src.ui.main_window")
+    if proc.returncode != 0:
+        raise Exception(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "error al importar")
+
+    rows = []
+    for line in proc.stderr.splitlines():
+        # "import time:       self [us] |  cumulative | imported package"
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        # Solo los imports de primer nivel: su acumulado ya incluye a sus dependencias
+        if name.startswith(" ") and not name.startswith("  "):
+            rows.append((name.strip(), int(cumulative_us) / 1000, int(self_us) / 1000))
+    total = sum(r[1] for r in rows) / 1000
+    rows.sort(key=lambda r: r[1], reverse=True)
+    return round(total, 3), [(name, round(cum, 1), round(own, 1)) for name, cum, own in rows[:top]]
+
+
+def eager_modules():
+    """
+    Módulos de DEFERRED_MODULES cargados al construir la ventana (requiere pantalla).
+    Se mira antes del primer ciclo de eventos: lo que cargan los after() ya corre con la ventana visible.
+    """
+    code = ("import sys\n"
+            "from src.ui.main_window import MainWindow\n"
+            "app = MainWindow()\n"
+            f"print(','.join(m for m in {DEFERRED_MODULES!r} if m in sys.modules))\n"
+            "app.on_close()\n")
+    proc = _python("-c", code)
+    if proc.returncode != 0:
+        raise Exception(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "error al importar")
+    return [m for m in proc.stdout.strip().split(",") if m]
+
+
+def first_window(runs=3):
+    """Mediana de segundos desde lanzar main.py hasta que la ventana se dibuja (requiere pantalla)."""
+    env = dict(os.environ, WSA_STARTUP_PROBE="1")
+    times = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        proc = subprocess.Popen([sys.executable, "main.py"], cwd=ROOT, env=env,
+                                stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+        try:
+            for line in proc.stdout:
+                if line.strip() == "first_window":
+                    times.append(time.perf_counter() - t0)
+                    break
+            proc.wait(timeout=30)
+        finally:
+            if proc.poll() is None:
+                proc.kill()
+        if not times or proc.returncode:
+            raise Exception(proc.stderr.read().strip().splitlines()[-1] if proc.returncode else "la ventana no se abrió")
+    return round(statistics.median(times), 3)
+
+
+def run(runs=3):
+    """Retorna un dict con el perfil de imports, los módulos cargados de más y el tiempo a primera ventana."""
+    result = {}
+    try:
+        result['import_s'], result['top_imports'] = import_profile()
+        result['eager_modules'] = eager_modules()
+    except Exception as e:
+        result['error'] = f"imports: {e}"
+        return result
+    try:
+        result['first_window_s'] = first_window(runs)
+    except Exception as e:
+        result['first_window_error'] = str(e)
+    return result
+
+
+def regressions(result):
+    """Problemas de arranque a reportar (lista vacía si todo está bien)."""
+    problems = []
+    if result.get('error'):
+        problems.append(result['error'])
+    if result.get('eager_modules'):
+        problems.append("se cargan al inicio: " + ", ".join(result['eager_modules']))
+    first = result.get('first_window_s')
+    if first is not None and first > FIRST_WINDOW_BUDGET:
+        problems.append(f"primera ventana en {first}s (presupuesto {FIRST_WINDOW_BUDGET}s)")
+    return problems
+
+
+def main():
+    result = run()
+    if 'import_s' in result:
+        print(f"Imports de la ventana: {result['import_s']}s")
+        print(f"  {'módulo':<32} {'acum. ms':>10} {'propio ms':>10}")
+        for name, cum, own in result['top_imports']:
+            print(f"  {name:<32} {cum:>10} {own:>10}")
+    if 'first_window_s' in result:
+        print(f"Primera ventana: {result['first_window_s']}s")
+    elif 'first_window_error' in result:
+        print(f"Primera ventana: no se pudo medir ({result['first_window_error']})")
+
+    problems = regressions(result)
+    for p in problems:
+        print(f"REGRESIÓN: {p}")
+    sys.exit(1 if problems else 0)
+
+
+if __name__ == "__main__":
+    main()
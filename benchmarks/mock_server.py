@@ -0,0 +1,28 @@
+import os
+import threading
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+MOCK_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "mock_whatsapp")
+
+
+class _MockHandler(SimpleHTTPRequestHandler):
+    """Sirve index.html para cualquier ruta (/, /send?phone=...), como la SPA real."""
+
+    def do_GET(self):
+        self.path = "/index.html"
+        super().do_GET()
+
+    def log_message(self, format, *args):
+        pass # Sin ruido en la consola del benchmark
+
+
+def start_mock_server(port=0):
+    """
+    Levanta el WhatsApp Web simulado en un hilo.
+    Retorna (server, url_base). Detener con server.shutdown().
+    """
+    handler = partial(_MockHandler, directory=MOCK_DIR)
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
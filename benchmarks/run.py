@@ -0,0 +1,116 @@
+"""
+Benchmarks de rendimiento.
+
+    python -m benchmarks.run                  # todo (requiere Chrome para el envío)
+    python -m benchmarks.run --skip-browser   # solo arranque, loaders y helpers
+    python -m benchmarks.run --pdf guia.pdf   # incluye un PDF real
+
+Cada corrida se guarda en benchmarks/results/<fecha>.json y se compara con la anterior.
+"""
+import argparse
+import glob
+import json
+import os
+import platform
+import subprocess
+from datetime import datetime
+
+from benchmarks import bench_loaders, bench_send, bench_startup
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+# Métricas que se comparan entre corridas: (ruta en el json, True si mayor es mejor)
+TRACKED = [
+    (("send", "msg_per_min"), True),
+    (("send", "steps", "send_total", "p50"), False),
+    (("send", "steps", "send_total", "p95"), False),
+    (("send", "steps", "chat_load", "p50"), False),
+    (("send", "memory_mb"), False),
+    (("helpers", "normalize_phones", "per_sec"), True),
+    (("excel", "rows_per_sec"), True),
+    (("excel", "peak_mb"), False),
+    (("pdf", "seconds"), False),
+    (("startup", "import_s"), False),
+    (("startup", "first_window_s"), False),
+]
+
+
+def _git_revision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True,
+                                       stderr=subprocess.DEVNULL).strip()
+    except Exception:
+        return ""
+
+
+def _lookup(data, path):
+    for key in path:
+        if not isinstance(data, dict) or key not in data:
+            return None
+        data = data[key]
+    return data
+
+
+def _compare(previous, current):
+    lines = []
+    for path, higher_is_better in TRACKED:
+        old, new = _lookup(previous, path), _lookup(current, path)
+        if not isinstance(old, (int, float)) or not isinstance(new, (int, float)) or not old:
+            continue
+        change = (new - old) / old * 100
+        better = change > 0 if higher_is_better else change < 0
+        mark = "mejor" if better else "peor" if abs(change) >= 1 else "igual"
+        lines.append(f"  {'.'.join(path):<40} {old:>12} -> {new:<12} ({change:+.1f}% {mark})")
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks de WhatsApp Sender")
+    parser.add_argument("--messages", type=int, default=30, help="Mensajes a enviar contra el mock")
+    parser.add_argument("--no-image", action="store_true", help="Medir solo envío de texto")
+    parser.add_argument("--rows", type=int, default=200_000, help="Filas del Excel sintético")
+    parser.add_argument("--phones", type=int, default=1_000_000, help="Números para normalize_phones")
+    parser.add_argument("--pdf", help="PDF real para medir load_pdf")
+    parser.add_argument("--skip-browser", action="store_true", help="No correr el benchmark de envío")
+    parser.add_argument("--navigation", choices=["in_app", "reload"], help="Cómo abrir cada chat (por defecto, config)")
+    args = parser.parse_args()
+
+    results = {
+        'date': datetime.now().isoformat(timespec="seconds"),
+        'revision': _git_revision(),
+        'machine': f"{platform.system()} {platform.machine()} / Python {platform.python_version()}",
+    }
+
+    print("Arranque...")
+    results['startup'] = bench_startup.run()
+    print("Helpers...")
+    results['helpers'] = bench_loaders.bench_helpers(args.phones)
+    print("Excel...")
+    results['excel'] = bench_loaders.bench_excel(args.rows)
+    if args.pdf:
+        print("PDF...")
+        results['pdf'] = bench_loaders.bench_pdf(args.pdf)
+    if not args.skip_browser:
+        print("Envío contra WhatsApp Web simulado...")
+        results['send'] = bench_send.run(args.messages, with_image=not args.no_image, navigation=args.navigation)
+
+    print(json.dumps(results, indent=2, ensure_ascii=False))
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    previous_files = sorted(glob.glob(os.path.join(RESULTS_DIR, "*.json")))
+    out = os.path.join(RESULTS_DIR, datetime.now().strftime("%Y%m%d-%H%M%S") + ".json")
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2, ensure_ascii=False)
+    print(f"Guardado en {out}")
+
+    if previous_files:
+        with open(previous_files[-1], encoding="utf-8") as f:
+            previous = json.load(f)
+        print(f"Comparación con {os.path.basename(previous_files[-1])}:")
+        print("\n".join(_compare(previous, results)) or "  (sin métricas comparables)")
+
+    for problem in bench_startup.regressions(results['startup']):
+        print(f"REGRESIÓN de arranque: {problem}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,9 @@
+import multiprocessing
+import sys
+
+from src.cli import main
+
+if __name__ == "__main__":
+    # Necesario para los pools de procesos (PDF, imágenes) en el ejecutable de PyInstaller
+    multiprocessing.freeze_support()
+    sys.exit(main())
@@ -1,8 +1,18 @@
 import os
+import sys
 
 # --- RUTAS ---
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 USER_DATA_DIR = os.path.join(BASE_DIR, "chrome_user_data")
+# Datos persistentes: junto al .exe cuando está empaquetado (BASE_DIR es temporal en --onefile)
+DATA_DIR = os.path.dirname(sys.executable) if getattr(sys, 'frozen', False) else BASE_DIR
+CAMPAIGN_DB = os.path.join(DATA_DIR, "campanas.db")
+LOG_FILE = os.path.join(DATA_DIR, "registro_bot.txt")
+LOG_FILE_JSONL = os.path.join(DATA_DIR, "registro_bot.jsonl")
+METRICS_CSV = os.path.join(DATA_DIR, "metricas.csv")
+METRICS_PROM = os.path.join(DATA_DIR, "metricas.prom")
+DRIVER_CACHE = os.path.join(DATA_DIR, "driver_cache.json")
+IMAGE_CACHE_DIR = os.path.join(DATA_DIR, "cache_imagenes")
 
 # --- UI COLORS ---
 COLOR_PRIMARY = "#1a73e8"  # Azul estilo Google
@@ -10,7 +20,125 @@ COLOR_SUCCESS = "#188038"  # Verde estilo WhatsApp/Excel
 COLOR_ERROR = "red"
 COLOR_WARNING = "orange"
 THEME_MODE = "Light"
+# Cada cuántos ms la ventana aplica las actualizaciones que envían los hilos (estados, QR, botones)
+UI_REFRESH_MS = 50
+
+# --- IMPORTACIÓN ---
+# Filas por bloque al leer Excel en streaming y filas usadas para adivinar columnas
+EXCEL_CHUNK_SIZE = 5000
+EXCEL_SAMPLE_ROWS = 200
+# Páginas de PDF por tarea del pool de procesos y cantidad de procesos (None = núcleos disponibles)
+PDF_PAGES_PER_TASK = 20
+PDF_WORKERS = None
+# Procesos para importar varios archivos a la vez, uno por archivo (None = núcleos disponibles)
+IMPORT_WORKERS = None
+# Bloques ya leídos de cada archivo que pueden esperar en memoria a ser agregados (acota la memoria del import)
+IMPORT_QUEUE_CHUNKS = 8
+# Código de país asumido para números sin prefijo internacional (51 = Perú)
+DEFAULT_COUNTRY_CODE = "51"
+# Número repetido entre importaciones: "fill" completa el nombre si estaba vacío, "replace" usa el último, "keep" conserva el primero
+CONTACT_MERGE_NAMES = "fill"
 
 # --- SELENIUM ---
+# URL de WhatsApp Web (los benchmarks la apuntan a una copia local)
+WHATSAPP_URL = "https://web.whatsapp.com"
 # Tiempo máximo de espera para elementos críticos (QR, carga de chat)
-WAIT_TIMEOUT = 40
\ No newline at end of file
+WAIT_TIMEOUT = 40
+# Esperas entre pasos del envío: se espera la condición real del DOM (timeout y polling en segundos)
+STEP_TIMEOUT = 5
+POLL_INTERVAL = 0.1
+# True = volver a las pausas fijas anteriores (más lento pero conservador)
+CONSERVATIVE_TIMINGS = False
+# Cómo se cargan texto e imagen en el chat:
+# "dom" = desde la página (sin portapapeles, permite sesiones en paralelo), "clipboard" = copiar y Ctrl+V
+DELIVERY_MODE = "dom"
+# Cómo se abre cada chat: "in_app" = buscador de nuevo chat sin recargar la página (carga por URL si falla),
+# "reload" = cargar /send?phone=... cada vez (como antes)
+CHAT_NAVIGATION = "in_app"
+# Fallos seguidos de "in_app" (chats que sí existían y el buscador no abrió) tras los cuales la sesión
+# usa solo la carga por URL durante IN_APP_RETRY_AFTER segundos; después vuelve a probar
+IN_APP_MAX_FAILURES = 5
+IN_APP_RETRY_AFTER = 600
+# Espera máxima (segundos) de cada paso de "in_app" antes de pasar a la carga por URL
+IN_APP_TIMEOUT = 2
+
+# --- ARRANQUE DEL NAVEGADOR ---
+# Días que se reutiliza el chromedriver resuelto antes de volver a consultar versiones
+DRIVER_CACHE_DAYS = 7
+# True / False, o "auto" = headless solo en perfiles que ya escanearon el QR (requiere DELIVERY_MODE "dom")
+HEADLESS = False
+# Flags y ajustes de Chrome para aligerar la página (sin extensiones, sync, animaciones, notificaciones)
+LEAN_BROWSER = True
+# Bloquear imágenes de la app (fotos de perfil, stickers). Reduce peso pero oculta las vistas previas
+BLOCK_IMAGES = False
+
+# --- IMÁGENES ---
+# La imagen de la campaña se reduce (lado mayor en px) y recomprime una sola vez antes de enviar
+IMAGE_MAX_SIDE = 1600
+IMAGE_QUALITY = 85
+# Procesos para generar imágenes personalizadas (None = núcleos disponibles)
+IMAGE_WORKERS = None
+# Texto estampado por contacto: franja "top", "center" o "bottom" y color de letra
+IMAGE_STAMP_POSITION = "bottom"
+IMAGE_STAMP_COLOR = "white"
+
+# --- SESIONES ---
+# Cantidad de cuentas de WhatsApp vinculadas en paralelo (cada una con su perfil de Chrome)
+SESSIONS = 1
+# Fallos seguidos tras los cuales una sesión sale de la rotación
+SESSION_MAX_FAILURES = 3
+
+# --- LÍMITES DE ENVÍO ---
+# Mensajes por minuto de cada sesión (el tiempo del propio envío cuenta) y cuántos puede acumular de golpe
+RATE_PER_SESSION_PER_MIN = 20
+RATE_BURST = 1
+# Extra aleatorio tras cada envío, como fracción del intervalo (0.5 = hasta 50% más)
+RATE_JITTER = 0.5
+# Máximos globales sumando todas las sesiones (None = sin límite)
+RATE_PER_HOUR = 400
+RATE_PER_DAY = 2000
+# Horarios permitidos, ej. ["09:00-13:00", "15:00-20:00"] (vacío = cualquier hora)
+SEND_WINDOWS = []
+# Backoff: si en los últimos BACKOFF_WINDOW envíos fallan BACKOFF_FAILURE_RATE o más, el ritmo baja a la mitad
+# (hasta BACKOFF_MAX veces más lento) y se recupera cuando los fallos bajan
+BACKOFF_WINDOW = 20
+BACKOFF_FAILURE_RATE = 0.3
+BACKOFF_MAX = 8
+
+# --- CAMPAÑAS ---
+# Resultados de envío acumulados antes de escribirlos en la base de campañas
+CAMPAIGN_FLUSH_EVERY = 20
+# Días que se recuerda si un número tiene WhatsApp (los inválidos se saltan sin abrir su chat)
+INVALID_CACHE_DAYS = 30
+VALID_CACHE_DAYS = 90
+# Verificación previa de la lista: chats abiertos por minuto en cada sesión
+PRECHECK_PER_SESSION_PER_MIN = 30
+# Fallos transitorios (timeout, editor de imagen, navegador): el contacto vuelve a una cola de reintentos que
+# corre junto a la principal, hasta RETRY_MAX veces, esperando RETRY_BASE_DELAY * 2^(intento-1) segundos
+# (como máximo RETRY_MAX_DELAY). Los fallos permanentes (número inválido) no se reintentan
+RETRY_MAX = 3
+RETRY_BASE_DELAY = 30
+RETRY_MAX_DELAY = 600
+
+# --- CONFIRMACIÓN DE ENTREGA ---
+# Seguir los ticks (reloj, ✓, ✓✓) de cada mensaje leyendo la lista de chats en una pasada, como mucho cada
+# RECEIPT_SCAN_INTERVAL segundos por sesión (aprovechando que la sesión ya está tomada tras un envío)
+TRACK_RECEIPTS = True
+RECEIPT_SCAN_INTERVAL = 10
+# Al terminar la campaña, segundos que se siguen mirando los mensajes todavía no entregados
+RECEIPT_FINAL_WAIT = 60
+
+# --- LOGS ---
+# Los logs se escriben en segundo plano en lotes de hasta LOG_BATCH_SIZE registros
+LOG_BATCH_SIZE = 500
+# True = una línea JSON por registro (con campos como contact, step, duration)
+LOG_JSONL = False
+# Rotación: "size" (por LOG_MAX_BYTES, guardando LOG_BACKUPS copias) o "daily"
+LOG_ROTATE = "size"
+LOG_MAX_BYTES = 5 * 1024 * 1024
+LOG_BACKUPS = 3
+
+# --- MÉTRICAS ---
+# Muestras recientes por paso usadas para p50/p95 y cada cuántos segundos se exportan CSV/Prometheus
+METRICS_SAMPLES = 2000
+METRICS_EXPORT_EVERY = 10
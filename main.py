@@ -1,6 +1,13 @@
+import multiprocessing
+import os
 from src.ui.main_window import MainWindow
 
 if __name__ == "__main__":
+    # Necesario para el pool de procesos (lectura de PDF) en el ejecutable de PyInstaller
+    multiprocessing.freeze_support()
     app = MainWindow()
     app.protocol("WM_DELETE_WINDOW", app.on_close)
-    app.mainloop()
\ No newline at end of file
+    if os.environ.get("WSA_STARTUP_PROBE"):
+        # Medición de arranque (benchmarks/bench_startup.py): avisar cuando la ventana se dibujó y salir
+        app.after_idle(lambda: (print("first_window", flush=True), app.on_close()))
+    app.mainloop()
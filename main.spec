@@ -23,12 +23,12 @@ a = Analysis(
 )
 pyz = PYZ(a.pure)
 
+# Carpeta (onedir) en vez de un solo .exe: --onefile descomprime todo en un temporal en cada arranque
 exe = EXE(
     pyz,
     a.scripts,
-    a.binaries,
-    a.datas,
     [],
+    exclude_binaries=True,
     name='main',
     debug=False,
     bootloader_ignore_signals=False,
@@ -43,3 +43,12 @@ exe = EXE(
     codesign_identity=None,
     entitlements_file=None,
 )
+coll = COLLECT(
+    exe,
+    a.binaries,
+    a.datas,
+    strip=False,
+    upx=True,
+    upx_exclude=[],
+    name='main',
+)
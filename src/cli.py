@@ -0,0 +1,196 @@
+"""
+Envío de campañas desde la línea de comandos, sin interfaz gráfica (servidores, cron).
+
+    python cli.py contactos.xlsx --mensaje "Hola {nombre}" --imagen promo.jpg --salida resultados.csv
+    python cli.py lista.csv --mensaje-archivo mensaje.txt --sesiones 2 --headless
+    python cli.py listas/ extra.ods --mensaje "Hola"    # carpetas y varios archivos en una sola campaña
+    python cli.py --retomar                      # continúa la última campaña interrumpida
+
+Las sesiones usan los mismos perfiles de Chrome que la ventana: si una no está vinculada se guarda
+su QR como imagen y se espera a que lo escaneen.
+"""
+import argparse
+import csv
+import os
+import threading
+import time
+
+import config
+
+
+def _parse_args(argv):
+    parser = argparse.ArgumentParser(prog="cli.py", description="WhatsApp Sender: campañas sin interfaz gráfica")
+    parser.add_argument("contactos", nargs="*", help="Archivos o carpetas de contactos (.xlsx, .xls, .ods, .csv, .txt o .pdf)")
+    msg = parser.add_mutually_exclusive_group()
+    msg.add_argument("--mensaje", help="Texto del mensaje (admite {nombre}, {columna}, spintax...)")
+    msg.add_argument("--mensaje-archivo", help="Archivo de texto con el mensaje")
+    parser.add_argument("--imagen", help="Imagen a adjuntar")
+    parser.add_argument("--texto-imagen", help="Texto a estampar en la imagen de cada contacto (ej. {nombre})")
+    parser.add_argument("--salida", default="resultados.csv", help="CSV de resultados (por defecto: resultados.csv)")
+    parser.add_argument("--sesiones", type=int, help="Cuentas en paralelo (por defecto config.SESSIONS)")
+    parser.add_argument("--headless", action="store_true", help="Chrome sin ventana (requiere perfiles ya vinculados)")
+    parser.add_argument("--verificar", action="store_true", help="Verificar qué números tienen WhatsApp antes de enviar")
+    parser.add_argument("--retomar", action="store_true", help="Continuar la última campaña sin terminar")
+    args = parser.parse_args(argv)
+    if not args.retomar and not args.contactos:
+        parser.error("indique el archivo de contactos o --retomar")
+    if args.retomar and args.contactos:
+        parser.error("--retomar continúa con los contactos guardados de la campaña: no indique archivos")
+    if not args.retomar and not (args.mensaje or args.mensaje_archivo):
+        parser.error("indique --mensaje o --mensaje-archivo")
+    return args
+
+
+def _print(text):
+    print(text, flush=True)
+
+
+def _load_contacts(contacts, paths):
+    """Carga todos los archivos/carpetas (en paralelo) y muestra filas, válidos y nuevos por origen."""
+    from src.services.data_service import DataService
+    from src.utils.helpers import reason_summary
+
+    received = 0
+    added = 0
+    source_start = 0
+
+    def report(origin, rows, valid, rejected, error=""):
+        nonlocal source_start
+        if error:
+            _print(f"  {origin}: no se pudo leer ({error})")
+            return
+        detail = f" (rechazados: {reason_summary(rejected)})" if rejected else ""
+        _print(f"  {origin}: {rows} filas, {valid} válidos, {added - source_start} nuevos{detail}")
+        source_start = added
+
+    for chunk in DataService.iter_sources(paths, report=report):
+        received += len(chunk)
+        added += contacts.add_many(chunk)
+    duplicates = f" ({received - added} duplicados fusionados)" if received - added else ""
+    _print(f"Contactos cargados: {added}{duplicates}")
+
+
+def _connect_sessions(pool):
+    """Inicia todas las sesiones en paralelo y espera a que al menos una quede lista."""
+    def connect(session):
+        on_qr = lambda s: _print(f"[{s.name}] Escanee el código QR guardado en {s.qr_path}")
+        try:
+            pool.connect(session, on_qr)
+        except Exception as e:
+            _print(f"[{session.name}] Error al iniciar: {e}")
+
+    threads = [threading.Thread(target=connect, args=(s,), daemon=True) for s in pool.sessions]
+    for t in threads:
+        t.start()
+    # Se empieza con la primera sesión lista; las demás se suman al pool cuando terminen de conectarse
+    while not pool.active_count() and any(t.is_alive() for t in threads):
+        time.sleep(0.5)
+    return pool.active_count() > 0
+
+
+def _write_results(contacts, path, receipts=None):
+    """Un renglón por contacto; con seguimiento de ticks, segundos hasta ✓ y hasta ✓✓."""
+    times = receipts.times if receipts is not None else {}
+    with open(path, "w", newline="", encoding="utf-8-sig") as f:
+        writer = csv.writer(f)
+        writer.writerow(["numero", "nombre", "estado", "segundos_a_enviado", "segundos_a_entregado"])
+        for uid in contacts.ids():
+            c = contacts.get(uid)
+            sent_s, delivered_s = times.get(uid, (None, None))
+            writer.writerow([c['numero'], c['nombre'], c['estado'],
+                             "" if sent_s is None else sent_s, "" if delivered_s is None else delivered_s])
+
+
+def main(argv=None):
+    args = _parse_args(argv)
+    if args.sesiones:
+        config.SESSIONS = args.sesiones
+    if args.headless:
+        config.HEADLESS = True
+
+    from src.services.campaign_engine import CampaignEngine, STATUS_DELIVERED, STATUS_RETRY, STATUS_SENDING
+    from src.services.contact_store import ContactStore
+    from src.services.metrics import METRICS
+    from src.services.sender_pool import SenderPool
+    from src.services.template_service import MessageTemplate, TemplateError
+
+    contacts = ContactStore()
+    pool = SenderPool()
+    state = {'done': 0, 'total': 0}
+    lock = threading.Lock()
+
+    def on_status(uid, status):
+        if status == STATUS_SENDING:
+            return
+        c = contacts.get(uid)
+        with lock:
+            # Un reintento programado todavía no es un resultado; la entrega (✓✓) llega después del resultado
+            if status not in (STATUS_RETRY, STATUS_DELIVERED):
+                state['done'] += 1
+            _print(f"[{state['done']}/{state['total']}] {c['numero'] if c else uid} {status}")
+
+    engine = CampaignEngine(pool, contacts, on_status=on_status, on_progress=_print)
+    try:
+        if args.retomar:
+            row = engine.unfinished()
+            if row is None:
+                _print("No hay campañas sin terminar.")
+                return 1
+            campaign_id, message, image_path, counts = row
+            engine.restore(campaign_id)
+            _print(f"Retomando campaña {campaign_id}: {counts}")
+            args.imagen = args.imagen or image_path
+        else:
+            message = args.mensaje
+            if args.mensaje_archivo:
+                with open(args.mensaje_archivo, encoding="utf-8") as f:
+                    message = f.read().strip()
+            _load_contacts(contacts, args.contactos)
+
+        try:
+            template = MessageTemplate(message)
+            stamp = MessageTemplate(args.texto_imagen) if args.texto_imagen and args.imagen else None
+        except TemplateError as e:
+            _print(f"Error en el mensaje: {e}")
+            return 2
+        unknown = engine.missing_fields(template, stamp)
+        if unknown:
+            _print("El mensaje usa campos que no existen en los contactos: " + ", ".join("{" + f + "}" for f in unknown))
+            return 2
+        if args.imagen and not os.path.exists(args.imagen):
+            _print(f"No existe la imagen: {args.imagen}")
+            return 2
+        if not len(contacts):
+            _print("No hay contactos para enviar.")
+            return 1
+
+        if not _connect_sessions(pool):
+            _print("Ninguna sesión pudo iniciar.")
+            return 1
+
+        if args.verificar:
+            _print("Verificando números...")
+            engine.precheck()
+            state['done'] = 0
+
+        state['total'] = len(contacts)
+        completed = engine.run(template, args.imagen, stamp)
+        sent, failed, rate, _ = METRICS.snapshot()
+        _print(f"Fin: {sent} enviados, {failed} fallidos ({rate:.1f} msg/min).")
+        if engine.undelivered:
+            _print(f"Sin confirmar entrega ({len(engine.undelivered)}):")
+            for uid in engine.undelivered:
+                c = contacts.get(uid)
+                if c:
+                    _print(f"  {c['numero']} {c['nombre']}")
+        return 0 if completed else 1
+    except KeyboardInterrupt:
+        _print("Interrumpido: se puede continuar con --retomar.")
+        engine.stop()
+        return 130
+    finally:
+        engine.close()
+        if len(contacts):
+            _write_results(contacts, args.salida, engine.receipts)
+            _print(f"Resultados en {args.salida}")
+        pool.close()
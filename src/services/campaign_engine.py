@@ -0,0 +1,408 @@
+import heapq
+import random
+import threading
+import time
+from collections import deque
+
+import config
+from src.services.campaign_store import CampaignStore, PENDING, SENDING, SENT, FAILED, UNCERTAIN, INVALID
+from src.services.metrics import METRICS
+from src.services.number_cache import NumberCache
+from src.services.rate_limiter import SendScheduler
+from src.services.receipt_tracker import ReceiptTracker
+from src.services.send_errors import SendError, InvalidNumberError, UnconfirmedSendError
+from src.services.template_service import contact_values
+from src.utils.logger import log
+
+# Estado de cada contacto (texto que muestran la tabla y el archivo de resultados)
+STATUS_PENDING = "Pendiente"
+STATUS_SENDING = "Enviando..."
+STATUS_SENT = "Enviado ✅"
+STATUS_DELIVERED = "Entregado ✔✔"
+STATUS_ERROR = "Error ❌"
+STATUS_UNCERTAIN = "¿Enviado? ⚠"
+STATUS_INVALID = "Inválido ⛔"
+STATUS_VERIFIED = "Verificado ✔"
+STATUS_RETRY = "Reintento ↻"
+
+# Estado en la base de campañas -> estado del contacto
+CAMPAIGN_STATUS_LABELS = {
+    PENDING: STATUS_PENDING,
+    SENDING: STATUS_UNCERTAIN,
+    SENT: STATUS_SENT,
+    FAILED: STATUS_ERROR,
+    UNCERTAIN: STATUS_UNCERTAIN,
+    INVALID: STATUS_INVALID,
+}
+
+# Contactos que no se vuelven a enviar
+_DONE = (STATUS_SENT, STATUS_DELIVERED, STATUS_UNCERTAIN)
+
+
+class CampaignEngine:
+    """
+    Motor de campañas sin interfaz: lo usan la ventana y la línea de comandos.
+    Reparte los contactos de un ContactStore entre las sesiones del pool, respeta el ritmo de envío
+    y guarda el progreso en la base de campañas. Los métodos run/precheck bloquean: llamarlos en un hilo.
+
+    Callbacks (se llaman desde hilos de trabajo):
+        on_status(uid, estado)   cambió el estado de un contacto
+        on_progress(texto)       fase de la campaña (preparando imágenes, enviando...)
+        on_session()             cambió la salud de alguna sesión
+    """
+
+    def __init__(self, pool, contacts, store=None, numbers=None, on_status=None, on_progress=None, on_session=None):
+        self.pool = pool
+        self.contacts = contacts
+        self.store = store or CampaignStore()
+        self.numbers = numbers or NumberCache()
+        self.on_status = on_status or (lambda uid, status: None)
+        self.on_progress = on_progress or (lambda text: None)
+        self.on_session = on_session or (lambda: None)
+        self.campaign_id = None
+        self.campaign_seq = {} # uid del ContactStore -> seq en la campaña
+        self.next_seq = 0
+        self.scheduler = None # Ritmo de envío de la campaña en curso (límites, horario, backoff)
+        self._retries = [] # Heap de (momento, uid): fallos transitorios esperando su reintento
+        self._attempts = {} # uid -> intentos fallidos en esta corrida
+        self._retry_lock = threading.Lock()
+        self.receipts = None # Ticks de entrega de la campaña en curso (config.TRACK_RECEIPTS)
+        self.undelivered = [] # uids enviados sin ✓✓ al terminar la última corrida
+        self.is_sending = False
+        self.is_checking = False
+
+    def set_status(self, uid, status):
+        self.contacts.set_status(uid, status)
+        self.on_status(uid, status)
+
+    def missing_fields(self, *templates):
+        """Campos que usan las plantillas y no existen en ningún contacto (validar antes de run)."""
+        columns = set()
+        for c in self.contacts:
+            columns.update(c['datos'])
+        unknown = set()
+        for template in templates:
+            if template is not None:
+                unknown.update(template.unknown_fields(columns))
+        return sorted(unknown)
+
+    # --- Envío ---
+    def run(self, template, image_path=None, stamp=None):
+        """
+        Envía la campaña completa (bloquea hasta terminar o stop()).
+        Retorna True si se recorrió toda la lista (la campaña queda cerrada).
+        """
+        self.is_sending = True
+        campaign_id = self._sync_campaign(template.source, image_path)
+        METRICS.start_campaign()
+        self.scheduler = SendScheduler(self.store.sent_times(time.time() - 86400))
+        self.receipts = ReceiptTracker(lambda changes: self._on_receipts(campaign_id, changes)) if config.TRACK_RECEIPTS else None
+        workers = []
+
+        # Todos los mensajes se generan en bloque antes de enviar: el bucle de envío no arma texto
+        queue_ids = []
+        values = []
+        for uid in self.contacts.ids():
+            c = self.contacts.get(uid)
+            if c is None or c['estado'] in _DONE or c['estado'] == STATUS_INVALID: continue
+            # Números que ya se sabe que no tienen WhatsApp: se marcan sin abrir su chat
+            if self.numbers.is_invalid(c['numero']):
+                self.set_status(uid, STATUS_INVALID)
+                self.store.record(campaign_id, self.campaign_seq[uid], False, INVALID)
+                continue
+            queue_ids.append(uid)
+            values.append(contact_values(c['numero'].strip(), c['nombre'].strip(), c['datos']))
+        messages = dict(zip(queue_ids, template.render_all(values)))
+        images = self._prepare_images(image_path, queue_ids, values, stamp)
+        self.on_progress("Enviando...")
+
+        # Cola principal y cola de reintentos: un reintento vencido pasa adelante, uno que espera no frena a nadie
+        pending = deque(queue_ids)
+        self._retries = []
+        self._attempts = {}
+        while self.is_sending:
+            uid = self._due_retry()
+            if uid is None and pending:
+                uid = pending.popleft()
+            if uid is None:
+                workers = [w for w in workers if w.is_alive()]
+                if not workers and not self._retries: break
+                time.sleep(0.5) # Esperando reintentos programados o envíos en curso que pueden reprogramarse
+                continue
+            if self.contacts.get(uid) is None: continue # Borrado durante el envío
+
+            session = self.pool.acquire()
+            if session is None:
+                log("No quedan sesiones activas. Deteniendo envío.")
+                break
+
+            t = threading.Thread(target=self._send_one, args=(session, campaign_id, uid, messages[uid], images.get(uid)), daemon=True)
+            t.start()
+            workers = [w for w in workers if w.is_alive()] + [t]
+
+        for t in workers:
+            t.join()
+        # Reintentos que no llegaron a correr (envío detenido o sin sesiones): quedan con error para la próxima vez
+        leftover = [uid for _, uid in self._retries]
+        for uid in leftover:
+            self.set_status(uid, STATUS_ERROR)
+        self._retries = []
+        self._settle_receipts()
+
+        self.store.flush()
+        self.numbers.flush()
+        METRICS.export()
+        completed = self.is_sending and not pending and not leftover
+        if completed:
+            # Recorrido completo: la campaña se cierra y el próximo envío abre una nueva
+            self.store.finish(campaign_id)
+            self.campaign_id = None
+            self.campaign_seq = {}
+        self.is_sending = False
+        return completed
+
+    def _on_receipts(self, campaign_id, changes):
+        rows = []
+        for uid, sent_s, delivered_s in changes:
+            if delivered_s is not None and self.contacts.get(uid) is not None:
+                self.set_status(uid, STATUS_DELIVERED)
+            if uid in self.campaign_seq:
+                rows.append((self.campaign_seq[uid], sent_s, delivered_s))
+        self.store.record_receipts(campaign_id, rows)
+
+    def _settle_receipts(self):
+        """Fin del envío: espera un rato los ✓✓ que faltan y deja en self.undelivered lo que no llegó."""
+        if self.receipts is None:
+            self.undelivered = []
+            return
+        if self.is_sending and self.receipts.undelivered():
+            self.on_progress("Confirmando entregas...")
+            self.receipts.settle(lambda: self.is_sending)
+        self.undelivered = self.receipts.undelivered()
+        if self.undelivered:
+            numbers = [c['numero'] for c in map(self.contacts.get, self.undelivered) if c]
+            log(f"{len(self.undelivered)} mensajes sin confirmar entrega: " + ", ".join(numbers[:20])
+                + (" ..." if len(numbers) > 20 else ""))
+
+    def _due_retry(self):
+        """uid del próximo reintento cuyo momento ya llegó, o None."""
+        with self._retry_lock:
+            if self._retries and self._retries[0][0] <= time.time():
+                return heapq.heappop(self._retries)[1]
+        return None
+
+    def _schedule_retry(self, uid):
+        """Programa otro intento con espera exponencial. Retorna False si el contacto agotó sus reintentos."""
+        with self._retry_lock:
+            attempt = self._attempts.get(uid, 0) + 1
+            self._attempts[uid] = attempt
+            if attempt > config.RETRY_MAX:
+                return False
+            delay = min(config.RETRY_BASE_DELAY * 2 ** (attempt - 1), config.RETRY_MAX_DELAY)
+            heapq.heappush(self._retries, (time.time() + delay * random.uniform(0.8, 1.2), uid))
+            return True
+
+    def stop(self):
+        """Detiene el envío o la verificación en curso (los envíos ya empezados terminan)."""
+        self.is_sending = False
+        self.is_checking = False
+
+    def _prepare_images(self, image_path, queue_ids, values, stamp):
+        """
+        Deja listas las imágenes antes de enviar: la de la campaña reducida y, si hay texto para estampar,
+        una por contacto. Retorna {uid: ruta}. Si algo falla se envía la imagen original.
+        """
+        if not image_path:
+            return {}
+        self.on_progress("Preparando imagen...")
+        try:
+            # Pillow se carga solo si la campaña lleva imagen
+            from src.services.image_service import ImageService
+            if stamp is None:
+                path = ImageService.prepare(image_path)
+                return dict.fromkeys(queue_ids, path)
+
+            texts = stamp.render_all(values)
+            progress = lambda done, total: self.on_progress(f"Preparando imágenes {done}/{total}...")
+            paths = ImageService.render_stamped(image_path, texts, progress)
+            return {uid: paths[text] for uid, text in zip(queue_ids, texts)}
+        except Exception as e:
+            log(f"No se pudo preparar la imagen ({e}). Se envía la original.")
+            return dict.fromkeys(queue_ids, image_path)
+
+    def _sync_campaign(self, base_msg, image_path):
+        """Crea la campaña si no hay una en curso y le agrega los contactos nuevos."""
+        if self.campaign_id is None:
+            self.campaign_id = self.store.create(base_msg, image_path)
+            self.campaign_seq = {}
+            self.next_seq = 0
+
+        rows = []
+        for uid in self.contacts.ids():
+            c = self.contacts.get(uid)
+            # Lo ya resuelto (enviado, entregado, en duda, inválido) no entra: al retomar tras un cierre
+            # quedaría como pendiente y se volvería a enviar
+            if c is None or uid in self.campaign_seq or c['estado'] in _DONE or c['estado'] == STATUS_INVALID: continue
+            self.campaign_seq[uid] = self.next_seq
+            rows.append((self.next_seq, c['numero'].strip(), c['nombre'].strip(), c['datos']))
+            self.next_seq += 1
+        self.store.add_contacts(self.campaign_id, rows)
+        return self.campaign_id
+
+    def _send_one(self, session, campaign_id, uid, final_msg, image_path=None):
+        """
+        Envía un contacto con la sesión asignada y la devuelve al pool.
+        Fallo transitorio: a la cola de reintentos. Permanente: se marca y no se vuelve a intentar.
+        """
+        c = self.contacts.get(uid)
+        seq = self.campaign_seq.get(uid)
+        ok, error = None, "" # None: no hubo envío (borrado, ya reclamado o envío detenido)
+        # Esperar el turno de la sesión (límites, horario, backoff) y recién ahí reclamar
+        ready = c is not None and seq is not None and self.scheduler.wait(session.name, lambda: not self.is_sending)
+        # Reclamar en la base antes de enviar: garantiza no enviar dos veces al mismo contacto
+        claimed = ready and self.store.claim(campaign_id, seq)
+        if ready and not claimed:
+            self.scheduler.release(session.name) # Ya reclamado por otro: el turno no se usó
+        if claimed:
+            # Datos frescos del modelo (las ediciones de la tabla se escriben ahí)
+            number = c['numero'].strip()
+            self.set_status(uid, STATUS_SENDING)
+
+            try:
+                session.bot.send_message(number, final_msg, image_path)
+
+                self.set_status(uid, STATUS_SENT)
+                self.numbers.record(number, True)
+                if self.receipts is not None:
+                    self.receipts.watch(session, uid, number)
+                ok = True
+            except UnconfirmedSendError as e:
+                # Pudo haber salido: no se reintenta para no duplicar, pero cuenta como falla de la sesión
+                self.set_status(uid, STATUS_UNCERTAIN)
+                self.store.record(campaign_id, seq, False, UNCERTAIN)
+                METRICS.record_result(False)
+                self.scheduler.record(False)
+                self.pool.release(session, False, e)
+                self.on_session()
+                return
+            except SendError as e:
+                if e.transient:
+                    ok, error = False, e
+                else:
+                    # Número inválido o mal formado: no es falla de la sesión ni del ritmo
+                    log(f"Sin reintento para {number} ({e.category}): {e}", contact=number)
+                    self.set_status(uid, STATUS_INVALID)
+                    if isinstance(e, InvalidNumberError):
+                        self.numbers.record(number, False)
+                    self.scheduler.release(session.name, attempted=True)
+                    self.store.record(campaign_id, seq, False, INVALID)
+                    METRICS.record_result(False)
+                    self.pool.release(session, None)
+                    self.on_session()
+                    return
+            except Exception as e:
+                ok, error = False, e # Error inesperado fuera del bot: se trata como transitorio
+
+            if not ok:
+                # El mensaje no salió: no cuenta para los límites por hora/día
+                self.scheduler.release(session.name, attempted=True)
+                category = getattr(error, "category", type(error).__name__)
+                retry = self._schedule_retry(uid)
+                log(f"Error con {number} ({category}): {error}" + (" Se reintentará." if retry else ""), contact=number)
+                self.set_status(uid, STATUS_RETRY if retry else STATUS_ERROR)
+                if not retry:
+                    METRICS.record_result(False)
+            else:
+                METRICS.record_result(True)
+            # Con error queda reclamable (FAILED): el reintento o una próxima corrida lo vuelven a reclamar
+            self.store.record(campaign_id, seq, ok)
+            self.scheduler.record(ok)
+            if self.receipts is not None:
+                self.receipts.scan(session) # Con la sesión todavía tomada; como mucho cada RECEIPT_SCAN_INTERVAL
+
+        self.pool.release(session, ok, error)
+        self.on_session()
+
+    # --- Verificación previa ---
+    def precheck(self, progress=None):
+        """
+        Resuelve desde la caché lo conocido y abre el chat (sin enviar) solo de los números desconocidos.
+        progress(hechos, total) se llama antes de cada verificación.
+        """
+        self.is_checking = True
+        unknown = []
+        for uid in self.contacts.ids():
+            c = self.contacts.get(uid)
+            if c is None or c['estado'] in _DONE: continue
+            known = self.numbers.lookup(c['numero'])
+            if known is None:
+                unknown.append(uid)
+            else:
+                self.set_status(uid, STATUS_VERIFIED if known else STATUS_INVALID)
+
+        workers = []
+        for done, uid in enumerate(unknown, 1):
+            if not self.is_checking: break
+            session = self.pool.acquire()
+            if session is None: break
+            if progress:
+                progress(done, len(unknown))
+            t = threading.Thread(target=self._check_one, args=(session, uid), daemon=True)
+            t.start()
+            workers = [w for w in workers if w.is_alive()] + [t]
+        for t in workers:
+            t.join()
+
+        self.numbers.flush()
+        self.is_checking = False
+
+    def _check_one(self, session, uid):
+        c = self.contacts.get(uid)
+        ok, error = None, ""
+        if c is not None:
+            t0 = time.time()
+            try:
+                valid = session.bot.check_number(c['numero'].strip())
+                self.numbers.record(c['numero'], valid)
+                self.set_status(uid, STATUS_VERIFIED if valid else STATUS_INVALID)
+            except Exception as e:
+                ok, error = False, e
+            # Ritmo con variación: abrir chats en ráfaga también llama la atención
+            interval = 60 / config.PRECHECK_PER_SESSION_PER_MIN * random.uniform(0.7, 1.3)
+            time.sleep(max(0, interval - (time.time() - t0)))
+        self.pool.release(session, ok, error)
+        self.on_session()
+
+    # --- Campañas interrumpidas ---
+    def unfinished(self):
+        """
+        Última campaña sin terminar, ya recuperada (lo que quedó "enviando" pasa a en duda).
+        Retorna (id, mensaje, imagen, {estado: cantidad}) o None.
+        """
+        row = self.store.unfinished()
+        if row is None:
+            return None
+        campaign_id, message, image_path = row
+        self.store.recover(campaign_id)
+        return campaign_id, message, image_path, self.store.counts(campaign_id)
+
+    def restore(self, campaign_id):
+        """Carga los contactos de la campaña con su estado para continuarla. Retorna la cantidad cargada."""
+        self.campaign_id = campaign_id
+        self.campaign_seq = {}
+        rows = self.store.contacts(campaign_id)
+        for seq, phone, name, status, data in rows:
+            uid = self.contacts.add(phone, name, CAMPAIGN_STATUS_LABELS.get(status, STATUS_PENDING), data)
+            self.campaign_seq[uid] = seq
+        self.next_seq = max((r[0] for r in rows), default=-1) + 1
+        return len(rows)
+
+    def discard(self, campaign_id):
+        """Da por terminada una campaña interrumpida sin retomarla."""
+        self.store.finish(campaign_id)
+
+    def close(self):
+        """Al salir: detiene y persiste lo pendiente (los hilos de envío que sigan vivos son daemon)."""
+        self.stop()
+        self.store.flush()
+        self.numbers.flush()
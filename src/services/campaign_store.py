@@ -0,0 +1,201 @@
+import json
+import sqlite3
+import threading
+import time
+
+import config
+
+# Estados de un contacto dentro de la campaña
+PENDING = "pendiente"
+SENDING = "enviando"
+SENT = "enviado"
+FAILED = "error"
+UNCERTAIN = "incierto"  # Quedó "enviando" cuando el programa se cerró: pudo haberse enviado
+INVALID = "invalido"    # El número no tiene WhatsApp: no se vuelve a intentar
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS campaigns (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    message     TEXT NOT NULL,
+    image_path  TEXT,
+    status      TEXT NOT NULL DEFAULT 'running',
+    created_at  REAL NOT NULL,
+    finished_at REAL
+);
+CREATE TABLE IF NOT EXISTS campaign_contacts (
+    campaign_id INTEGER NOT NULL,
+    seq         INTEGER NOT NULL,
+    phone       TEXT NOT NULL,
+    name        TEXT NOT NULL DEFAULT '',
+    data        TEXT,
+    status      TEXT NOT NULL DEFAULT 'pendiente',
+    attempts    INTEGER NOT NULL DEFAULT 0,
+    updated_at  REAL,
+    sent_at     REAL,
+    PRIMARY KEY (campaign_id, seq)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_campaign_contacts_status ON campaign_contacts (campaign_id, status, seq);
+CREATE INDEX IF NOT EXISTS idx_campaign_contacts_sent_at ON campaign_contacts (sent_at);
+"""
+
+# Columnas agregadas después de la primera versión: (tabla, columna, definición)
+_MIGRATIONS = [
+    ("campaign_contacts", "data", "TEXT"),  # Columnas extra del Excel (JSON) para la plantilla
+    ("campaign_contacts", "sent_s", "REAL"),       # Segundos desde el envío hasta el ✓ (ReceiptTracker)
+    ("campaign_contacts", "delivered_s", "REAL"),  # Segundos desde el envío hasta el ✓✓
+]
+
+
+class CampaignStore:
+    """
+    Cola persistente de campañas en SQLite.
+    Antes de enviar, cada contacto se "reclama" con un commit propio: un contacto reclamado nunca se
+    vuelve a enviar. Los resultados se acumulan y se escriben en lote junto al siguiente reclamo.
+    Al retomar, los reclamados sin resultado quedan como UNCERTAIN en vez de reenviarse.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or config.CAMPAIGN_DB
+        self._lock = threading.Lock()
+        self._pending_results = []
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(_SCHEMA)
+        self._migrate()
+        self.conn.commit()
+
+    def _migrate(self):
+        """Agrega a bases de versiones anteriores las columnas que les falten."""
+        for table, column, definition in _MIGRATIONS:
+            existing = {row[1] for row in self.conn.execute(f"PRAGMA table_info({table})")}
+            if column not in existing:
+                self.conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+    # --- Campañas ---
+    def create(self, message, image_path=None):
+        with self._lock:
+            cur = self.conn.execute(
+                "INSERT INTO campaigns (message, image_path, created_at) VALUES (?, ?, ?)",
+                (message, image_path, time.time()),
+            )
+            self.conn.commit()
+            return cur.lastrowid
+
+    def add_contacts(self, campaign_id, rows):
+        """Agrega en bloque [(seq, numero, nombre, datos), ...]. Los seq ya existentes se ignoran."""
+        now = time.time()
+        with self._lock:
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO campaign_contacts (campaign_id, seq, phone, name, data, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                ((campaign_id, seq, phone, name, json.dumps(data, ensure_ascii=False) if data else None, now)
+                 for seq, phone, name, data in rows),
+            )
+            self.conn.commit()
+
+    def unfinished(self):
+        """Retorna la última campaña sin terminar como (id, mensaje, imagen), o None."""
+        with self._lock:
+            return self.conn.execute(
+                "SELECT id, message, image_path FROM campaigns WHERE status = 'running' ORDER BY id DESC LIMIT 1"
+            ).fetchone()
+
+    def recover(self, campaign_id):
+        """Tras un cierre inesperado: lo que quedó "enviando" pasa a UNCERTAIN (no se reenvía solo)."""
+        with self._lock:
+            self.conn.execute(
+                "UPDATE campaign_contacts SET status = ?, updated_at = ? WHERE campaign_id = ? AND status = ?",
+                (UNCERTAIN, time.time(), campaign_id, SENDING),
+            )
+            self.conn.commit()
+
+    def contacts(self, campaign_id):
+        """Retorna [(seq, numero, nombre, estado, datos), ...] en orden de la cola."""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT seq, phone, name, status, data FROM campaign_contacts WHERE campaign_id = ? ORDER BY seq",
+                (campaign_id,),
+            ).fetchall()
+        return [(seq, phone, name, status, json.loads(data) if data else {})
+                for seq, phone, name, status, data in rows]
+
+    def counts(self, campaign_id):
+        """Retorna {estado: cantidad} de la campaña."""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT status, COUNT(*) FROM campaign_contacts WHERE campaign_id = ? GROUP BY status",
+                (campaign_id,),
+            ).fetchall()
+        return dict(rows)
+
+    def sent_times(self, since):
+        """Marcas de tiempo de los envíos exitosos desde `since` (todas las campañas), para los límites de envío."""
+        with self._lock:
+            self._flush_locked()
+            rows = self.conn.execute("SELECT sent_at FROM campaign_contacts WHERE sent_at >= ?", (since,)).fetchall()
+        return [r[0] for r in rows]
+
+    def finish(self, campaign_id):
+        with self._lock:
+            self._flush_locked()
+            self.conn.execute(
+                "UPDATE campaigns SET status = 'finished', finished_at = ? WHERE id = ?",
+                (time.time(), campaign_id),
+            )
+            self.conn.commit()
+
+    # --- Envío ---
+    def claim(self, campaign_id, seq):
+        """
+        Reclama un contacto para enviarlo (pendiente o con error -> enviando).
+        Retorna False si ya fue enviado, está en duda o lo reclamó otra sesión.
+        """
+        with self._lock:
+            self._flush_locked(commit=False)
+            cur = self.conn.execute(
+                "UPDATE campaign_contacts SET status = ?, attempts = attempts + 1, updated_at = ? "
+                "WHERE campaign_id = ? AND seq = ? AND status IN (?, ?)",
+                (SENDING, time.time(), campaign_id, seq, PENDING, FAILED),
+            )
+            self.conn.commit()
+            return cur.rowcount == 1
+
+    def record(self, campaign_id, seq, ok, status=None):
+        """Registra el resultado de un envío (status fuerza un estado, ej. INVALID). Se escribe en lote."""
+        now = time.time()
+        status = status or (SENT if ok else FAILED)
+        with self._lock:
+            self._pending_results.append((status, now, now if ok else None, campaign_id, seq))
+            if len(self._pending_results) >= config.CAMPAIGN_FLUSH_EVERY:
+                self._flush_locked()
+
+    def record_receipts(self, campaign_id, rows):
+        """Guarda los tiempos de entrega [(seq, segundos_a_enviado, segundos_a_entregado), ...]."""
+        with self._lock:
+            self.conn.executemany(
+                "UPDATE campaign_contacts SET sent_s = COALESCE(?, sent_s), delivered_s = COALESCE(?, delivered_s) "
+                "WHERE campaign_id = ? AND seq = ?",
+                ((sent_s, delivered_s, campaign_id, seq) for seq, sent_s, delivered_s in rows),
+            )
+            self.conn.commit()
+
+    def flush(self):
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self, commit=True):
+        if self._pending_results:
+            self.conn.executemany(
+                "UPDATE campaign_contacts SET status = ?, updated_at = ?, sent_at = COALESCE(?, sent_at) "
+                "WHERE campaign_id = ? AND seq = ?",
+                self._pending_results,
+            )
+            self._pending_results = []
+            if commit:
+                self.conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._flush_locked()
+            self.conn.close()
@@ -0,0 +1,174 @@
+import re
+import threading
+
+import config
+
+_NON_DIGITS = re.compile(r'[^0-9]')
+
+
+def number_key(number):
+    """Clave de deduplicación: solo dígitos ('+51 999-888-777' y '51999888777' son el mismo)."""
+    number = str(number)
+    # Camino rápido para lo que entregan los importadores (E.164 ya normalizado)
+    digits = number[1:] if number.startswith("+") else number
+    if digits.isdigit() and digits.isascii():
+        return digits
+    return _NON_DIGITS.sub("", number)
+
+
+class ContactStore:
+    """
+    Contactos en memoria (sin widgets), indexados por id y por número.
+    Cada fila es un dict: {'id': int, 'numero': str, 'nombre': str, 'estado': str, 'datos': dict}
+    'datos' guarda las columnas extra del Excel para la plantilla del mensaje.
+
+    Buscar, borrar y cambiar estado son O(1). El orden de la tabla se guarda aparte y los borrados
+    se compactan de una sola vez en el siguiente acceso por posición (no por cada borrado).
+    Un número que ya existe no se agrega de nuevo: se fusiona según config.CONTACT_MERGE_NAMES.
+    Se usa desde el hilo de Tk (importaciones) y desde el motor de envío: altas, bajas, cambios y la
+    compactación van bajo un mismo lock.
+    """
+
+    def __init__(self, merge_names=None):
+        self.merge_names = merge_names or config.CONTACT_MERGE_NAMES
+        self._lock = threading.RLock()
+        self._by_id = {}
+        self._by_number = {}
+        self._order = []   # ids en orden de llegada (puede tener ids borrados hasta compactar)
+        self._dead = 0     # ids borrados que siguen en _order
+        self._next_id = 0
+
+    def __len__(self):
+        return len(self._by_id)
+
+    def __iter__(self):
+        with self._lock:
+            return iter([self._by_id[uid] for uid in self._live_order()])
+
+    def __contains__(self, number):
+        return number_key(number) in self._by_number
+
+    # --- Altas ---
+    def add(self, number, name="", status="Pendiente", data=None):
+        """Agrega un contacto o fusiona con el existente del mismo número. Retorna el id."""
+        with self._lock:
+            uid, _ = self._add(str(number), str(name), status, data)
+        return uid
+
+    def add_many(self, items, status="Pendiente"):
+        """
+        Agrega en bloque tuplas (numero, nombre[, datos]) o números sueltos.
+        Retorna la cantidad de contactos nuevos (los duplicados se fusionan y no cuentan).
+        """
+        with self._lock:
+            # Bucle en línea (sin _add por fila): es el camino de las importaciones grandes
+            by_id, by_number, order = self._by_id, self._by_number, self._order
+            uid = self._next_id
+            start = uid
+            for item in items:
+                if isinstance(item, (tuple, list)):
+                    number = str(item[0])
+                    name = str(item[1]) if len(item) > 1 else ""
+                    data = item[2] if len(item) > 2 else None
+                else:
+                    number, name, data = str(item), "", None
+                key = number_key(number)
+                existing = by_number.get(key) if key else None
+                if existing is not None:
+                    self._merge(by_id[existing], name, data)
+                    continue
+                by_id[uid] = {'id': uid, 'numero': number, 'nombre': name, 'estado': status, 'datos': data or {}}
+                order.append(uid)
+                if key:
+                    by_number[key] = uid
+                uid += 1
+            self._next_id = uid
+            return uid - start
+
+    def _add(self, number, name, status, data):
+        key = number_key(number)
+        uid = self._by_number.get(key) if key else None
+        if uid is not None:
+            self._merge(self._by_id[uid], name, data)
+            return uid, False
+
+        uid = self._next_id
+        self._next_id += 1
+        self._by_id[uid] = {'id': uid, 'numero': number, 'nombre': name, 'estado': status, 'datos': data or {}}
+        self._order.append(uid)
+        if key:
+            self._by_number[key] = uid
+        return uid, True
+
+    def _merge(self, row, name, data):
+        """Política de nombres: "fill" completa si estaba vacío, "replace" usa el último, "keep" no toca."""
+        name = name.strip()
+        if name and (self.merge_names == "replace" or (self.merge_names == "fill" and not row['nombre'].strip())):
+            row['nombre'] = name
+        if data:
+            # Columnas extra: igual que el nombre, "replace" pisa con los valores nuevos; si no, solo completa
+            old = {k: v for k, v in row['datos'].items() if v}
+            new = {k: v for k, v in data.items() if v}
+            row['datos'] = {**row['datos'], **new} if self.merge_names == "replace" else {**data, **old}
+
+    # --- Bajas ---
+    def delete(self, uid):
+        with self._lock:
+            row = self._by_id.pop(uid, None)
+            if row is None:
+                return
+            key = number_key(row['numero'])
+            if self._by_number.get(key) == uid:
+                del self._by_number[key]
+            self._dead += 1
+
+    def delete_many(self, uids):
+        with self._lock:
+            for uid in uids:
+                self.delete(uid)
+            self._live_order()
+
+    # --- Consultas ---
+    def get(self, uid):
+        return self._by_id.get(uid)
+
+    def find(self, number):
+        """Retorna la fila con ese número (en cualquier formato) o None."""
+        uid = self._by_number.get(number_key(number))
+        return self._by_id.get(uid) if uid is not None else None
+
+    def row_at(self, index):
+        with self._lock:
+            return self._by_id[self._live_order()[index]]
+
+    def ids(self):
+        with self._lock:
+            return list(self._live_order())
+
+    def _live_order(self):
+        """Orden sin borrados (llamar con el lock tomado)."""
+        if self._dead:
+            # Compactación diferida: un solo recorrido para todos los borrados acumulados (en el mismo objeto)
+            self._order[:] = [uid for uid in self._order if uid in self._by_id]
+            self._dead = 0
+        return self._order
+
+    # --- Cambios ---
+    def update(self, uid, **fields):
+        with self._lock:
+            row = self._by_id.get(uid)
+            if row is None:
+                return
+            if 'numero' in fields:
+                old_key, new_key = number_key(row['numero']), number_key(fields['numero'])
+                if old_key != new_key:
+                    if self._by_number.get(old_key) == uid:
+                        del self._by_number[old_key]
+                    if new_key:
+                        self._by_number.setdefault(new_key, uid)
+            row.update(fields)
+
+    def set_status(self, uid, status):
+        row = self._by_id.get(uid)
+        if row is not None:
+            row['estado'] = status
@@ -1,69 +1,256 @@
-import pandas as pd
-from pypdf import PdfReader
-from src.utils.helpers import extract_numbers_from_text, clean_phone_number
+import csv
+import io
+import multiprocessing
+import os
+import queue
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, wait
+import config
+from src.utils.helpers import extract_numbers_from_text, field_key, normalize_phones, reason_summary
+from src.utils.logger import log
+
+# Formatos que acepta la importación de varios archivos/carpetas (iter_sources)
+SOURCE_EXTENSIONS = (".xlsx", ".xlsm", ".xls", ".ods", ".csv", ".tsv", ".txt")
+
+def _cell_to_str(value):
+    """Convierte una celda de openpyxl a texto preservando los dígitos (sin '.0' ni notación científica)."""
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
 
 class DataService:
+    """
+    Lectores de contactos. Las librerías de cada formato (openpyxl, pandas, pypdf) se importan al usarlas
+    por primera vez para no demorar la apertura de la ventana; preload() las carga en segundo plano.
+    """
+
+    @staticmethod
+    def preload():
+        """Importa los lectores de Excel para que la primera importación no espere la carga (llamar en un hilo)."""
+        try:
+            import openpyxl
+            import pandas
+        except ImportError as e:
+            log(f"No se pudo precargar el lector de Excel: {e}")
+
     @staticmethod
-    def load_excel(file_path):
+    def iter_sources(paths, progress=None, cancel=None, report=None):
         """
-        Carga Excel intentando identificar columnas de teléfono y nombre.
-        Retorna: lista de tuplas [(numero, nombre), ...]
+        Importa de una vez varios archivos y carpetas (Excel con todas sus hojas, ODS, CSV, TXT; PDF indicado a mano).
+        Cada archivo se lee en un proceso del pool con el lector de su formato y pasa sus bloques por una cola
+        acotada a medida que los lee; los resultados se entregan en el orden de `paths`, cada contacto con
+        datos['origen'] = "archivo › hoja". Los PDF van por iter_pdf (en un PDF, filas = números encontrados).
+        progress(archivos_hechos, total) tras cada archivo; report(origen, filas, validos, rechazos) tras cada hoja,
+        con rechazos = {motivo: cantidad} de los números descartados (ver normalize_phones). Un archivo que no
+        se pudo leer se informa como report(archivo, 0, 0, {}, error=mensaje).
+        cancel es un threading.Event opcional: se mira en cada bloque y frena también a los procesos.
+        Retorna: iterador de listas de tuplas [(numero, nombre, datos), ...] (deduplicar al agregar, ej. ContactStore).
         """
-        data = []
-        try:
-            # Leer como string para preservar ceros a la izquierda
-            df = pd.read_excel(file_path, dtype=str)
-            df.fillna("", inplace=True)
-            
-            # 1. Identificar columna de Teléfono
-            col_phone = None
-            # Prioridad A: Por encabezado
-            for col in df.columns:
-                c_low = col.lower()
-                if any(x in c_low for x in ['tel', 'cel', 'phone', 'movil', 'number', 'whatsapp']):
-                    col_phone = col
-                    break
-            
-            # Prioridad B: Por contenido (si no encuentra encabezado)
-            if not col_phone:
-                for col in df.columns:
-                    # Limpia no-dígitos y revisa si parece un teléfono (> 7 dígitos promedio)
-                    sample = df[col].astype(str).str.replace(r'\D', '', regex=True)
-                    if len(sample) > 0 and sample.str.len().mean() > 7:
-                        col_phone = col
-                        break
-            
-            # Fallback: Usar primera columna
-            if not col_phone:
-                col_phone = df.columns[0]
-
-            # 2. Identificar columna de Nombre (Opcional)
-            col_name = None
-            for col in df.columns:
-                if col == col_phone: continue
-                c_low = col.lower()
-                if any(x in c_low for x in ['nom', 'name', 'cliente', 'user', 'señor']):
-                    col_name = col
+        files = _expand_paths(paths)
+        if not files:
+            return
+        cancelled = lambda: cancel is not None and cancel.is_set()
+
+        tables = [path for path in files if not path.lower().endswith(".pdf")]
+        with multiprocessing.Manager() as manager, ProcessPoolExecutor(max_workers=config.IMPORT_WORKERS) as pool:
+            stop = manager.Event()
+            guesses = manager.dict() # Columnas por diseño de planilla, solo para esta importación
+            queues = {path: manager.Queue(config.IMPORT_QUEUE_CHUNKS) for path in tables}
+            # Se envían en orden: el archivo que se está entregando siempre tiene su proceso corriendo
+            futures = {path: pool.submit(_read_source, path, queues[path], stop, guesses) for path in tables}
+            try:
+                for done, path in enumerate(files, 1):
+                    if path in futures:
+                        events = _drain_source(queues[path], futures[path], cancelled)
+                    else:
+                        events = _iter_pdf_source(path, cancel)
+                    for event in events:
+                        if event[0] == "chunk":
+                            yield event[1]
+                        elif event[0] == "error":
+                            log(f"No se pudo leer {os.path.basename(path)}: {event[1]}")
+                            if report:
+                                report(os.path.basename(path), 0, 0, {}, error=event[1])
+                        elif report:
+                            report(*event[1:])
+                        if cancelled():
+                            return
+                    if cancelled():
+                        return
+                    if progress:
+                        progress(done, len(files))
+            finally:
+                # Cancelación, error o el consumidor dejó de leer: los procesos dejan de leer en su próximo bloque
+                stop.set()
+                for f in futures.values():
+                    f.cancel()
+
+    @staticmethod
+    def iter_text(text, progress=None, cancel=None, chunk_size=config.EXCEL_CHUNK_SIZE, rejected=None, counted=None):
+        """
+        Procesa un bloque de texto pegado (celdas copiadas de Excel, CSV o un número por línea).
+        El separador y las columnas se detectan una sola vez para todo el bloque; las comillas CSV se respetan.
+        progress(filas_hechas, total) se llama por bloque; cancel es un threading.Event opcional.
+        rejected: Counter opcional que suma los números descartados por motivo; sin él se registran en el log.
+        counted: lista opcional de un elemento donde queda la cantidad de filas de datos que produjo el lector
+        (registros CSV, sin encabezado ni líneas vacías).
+        Retorna: iterador de listas de tuplas [(numero, nombre, datos), ...]
+        """
+        if rejected is None:
+            rejected = Counter()
+            try:
+                yield from DataService.iter_text(text, progress, cancel, chunk_size, rejected, counted)
+            finally:
+                if rejected:
+                    log(f"Números rechazados: {reason_summary(rejected)}")
+            return
+
+        lines = text.strip().splitlines()
+        if not lines:
+            return
+        total = len(lines)
+        sample_lines = lines[:config.EXCEL_SAMPLE_ROWS]
+        delimiter = _detect_delimiter(sample_lines)
+        if delimiter:
+            # Sobre el texto completo (no por línea): un campo entre comillas puede tener saltos de línea
+            rows = (r for r in csv.reader(io.StringIO(text.strip()), delimiter=delimiter) if any(c.strip() for c in r))
+        else:
+            rows = ([line] for line in lines if line.strip())
+
+        # Muestra inicial para detectar encabezado y columnas
+        sample = []
+        for row in rows:
+            sample.append(row)
+            if len(sample) >= config.EXCEL_SAMPLE_ROWS:
+                break
+        if not sample:
+            return
+        width = max(len(r) for r in sample)
+        has_header = _looks_like_header(sample)
+        if has_header:
+            columns = [c.strip() or f"col{i}" for i, c in enumerate(sample[0])] + \
+                      [f"col{i}" for i in range(len(sample[0]), width)]
+            sample = sample[1:]
+        else:
+            columns = [f"col{i}" for i in range(width)]
+
+        col_phone, col_name = DataService._guess_columns(columns, sample)
+        if col_name is None and not has_header:
+            col_name = _guess_name_column(sample, col_phone, width)
+        extra = [(i, field_key(c)) for i, c in enumerate(columns) if i not in (col_phone, col_name)] if has_header else []
+
+        done = 0
+        batch = sample
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= chunk_size:
+                done += len(batch)
+                yield DataService._clean_chunk(batch, col_phone, col_name, extra, rejected)
+                batch = []
+                if progress:
+                    progress(done, total)
+                if cancel is not None and cancel.is_set():
+                    return
+        if counted is not None:
+            counted[0] = done + len(batch)
+        if batch:
+            yield DataService._clean_chunk(batch, col_phone, col_name, extra, rejected)
+        if progress:
+            progress(total, total)
+
+    @staticmethod
+    def _iter_table(rows, chunk_size=config.EXCEL_CHUNK_SIZE, guesses=None, rejected=None):
+        """
+        Filas crudas de una hoja (la primera es el encabezado) -> bloques de contactos limpios.
+        rejected: Counter opcional que suma los números descartados por motivo.
+        guesses: dict opcional {encabezados: (teléfono, nombre)} compartido por una importación, para adivinar
+        una vez por diseño de planilla. Solo se guardan las columnas halladas por encabezado: lo adivinado
+        por el contenido de la muestra vale para esa hoja.
+        """
+        header = next(rows, None)
+        if header is None:
+            return
+        columns = [str(c).strip() if c is not None else f"col{i}" for i, c in enumerate(header)]
+
+        # Muestra inicial: solo se usa para adivinar columnas, luego se procesa como un bloque más
+        sample = []
+        for row in rows:
+            sample.append(row)
+            if len(sample) >= config.EXCEL_SAMPLE_ROWS:
+                break
+        layout = tuple(field_key(c) for c in columns)
+        guess = guesses.get(layout) if guesses is not None else None
+        if guess is None:
+            guess = DataService._guess_columns(columns, sample)
+            if guesses is not None and _phone_header_column(columns) is not None:
+                guesses[layout] = guess
+        col_phone, col_name = guess
+        # Columnas extra disponibles como {campo} en el mensaje (todas menos el teléfono)
+        extra = [(i, field_key(c)) for i, c in enumerate(columns) if i != col_phone and field_key(c)]
+
+        batch = sample
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= chunk_size:
+                yield DataService._clean_chunk(batch, col_phone, col_name, extra, rejected)
+                batch = []
+        if batch:
+            yield DataService._clean_chunk(batch, col_phone, col_name, extra, rejected)
+
+    @staticmethod
+    def _guess_columns(columns, sample):
+        """Retorna (índice_teléfono, índice_nombre|None) usando encabezados y una muestra de filas."""
+        # 1. Identificar columna de Teléfono
+        # Prioridad A: Por encabezado
+        col_phone = _phone_header_column(columns)
+
+        # Prioridad B: Por contenido (solo sobre la muestra)
+        if col_phone is None and sample:
+            for i in range(len(columns)):
+                # Cuenta dígitos y revisa si parece un teléfono (> 7 dígitos promedio)
+                lengths = [sum(ch.isdigit() for ch in row[i]) for row in sample if i < len(row)]
+                if lengths and sum(lengths) / len(lengths) > 7:
+                    col_phone = i
                     break
-            
-            # 3. Extraer y limpiar datos
-            for _, row in df.iterrows():
-                raw_num = str(row[col_phone])
-                clean_num = clean_phone_number(raw_num)
-                
-                name = ""
-                if col_name:
-                    name = str(row[col_name]).strip()
-                
-                # Filtrar números muy cortos o vacíos
-                if len(clean_num) > 5: 
-                    data.append((clean_num, name))
-                    
-            return data
 
-        except Exception as e:
-            print(f"Error leyendo Excel: {e}")
-            raise Exception("Error al leer Excel. Verifique que el archivo no esté corrupto.")
+        # Fallback: Usar primera columna
+        if col_phone is None:
+            col_phone = 0
+
+        # 2. Identificar columna de Nombre (Opcional)
+        col_name = None
+        for i, col in enumerate(columns):
+            if i == col_phone: continue
+            c_low = col.lower()
+            if any(x in c_low for x in ['nom', 'name', 'cliente', 'user', 'señor']):
+                col_name = i
+                break
+
+        return col_phone, col_name
+
+    @staticmethod
+    def _clean_chunk(rows, col_phone, col_name, extra=(), rejected=None):
+        """
+        Normaliza y filtra un bloque de filas de una sola vez. extra: [(índice, clave)] de columnas a conservar.
+        rejected: Counter opcional al que se suman los motivos de los números descartados.
+        """
+        phones = [r[col_phone] if col_phone < len(r) else "" for r in rows]
+        clean, reasons = normalize_phones(phones)
+        if rejected is not None:
+            rejected.update(r for r in reasons if r)
+
+        if col_name is not None:
+            names = [r[col_name].strip() if col_name < len(r) else "" for r in rows]
+        else:
+            names = [""] * len(rows)
+
+        # Filtrar números rechazados por el normalizador
+        return [
+            (num, name, {key: (r[i].strip() if i < len(r) else "") for i, key in extra})
+            for num, name, r in zip(clean, names, rows) if num
+        ]
 
     @staticmethod
     def load_pdf(file_path):
@@ -72,21 +259,266 @@ class DataService:
         Retorna: lista de tuplas [(numero, ""), ...]
         """
         data = []
+        for chunk in DataService.iter_pdf(file_path):
+            data.extend(chunk)
+        return data
+
+    @staticmethod
+    def iter_pdf(file_path, progress=None, cancel=None):
+        """
+        Extrae números de un PDF página por página repartiendo el trabajo en un pool de procesos.
+        Los resultados se entregan en orden de página y sin duplicados a medida que llegan.
+        progress(paginas_hechas, total) se llama tras cada página; cancel es un threading.Event opcional
+        que se mira página por página, también dentro de los procesos que ya están trabajando.
+        Retorna: iterador de listas de tuplas [(numero, ""), ...]
+        """
         try:
-            reader = PdfReader(file_path)
-            text = ""
-            for page in reader.pages:
-                text += page.extract_text() or ""
-            
-            raw_nums = extract_numbers_from_text(text)
-            
-            # Usar set para evitar duplicados del mismo PDF
-            seen = set()
-            for n in raw_nums:
-                clean = clean_phone_number(n)
-                if len(clean) > 5 and clean not in seen:
-                    data.append((clean, "")) # Nombre vacío por defecto
-                    seen.add(clean)
-            return data
+            from pypdf import PdfReader
+            total = len(PdfReader(file_path).pages)
+            step = config.PDF_PAGES_PER_TASK
+            ranges = [(i, min(i + step, total)) for i in range(0, total, step)]
+
+            # PDFs chicos: no vale la pena levantar procesos
+            if len(ranges) <= 1:
+                results = (_extract_pdf_pages(file_path, a, b, cancel) for a, b in ranges)
+                yield from DataService._merge_pdf_pages(results, total, progress, cancel)
+                return
+
+            with multiprocessing.Manager() as manager, ProcessPoolExecutor(max_workers=config.PDF_WORKERS) as pool:
+                stop = manager.Event() # Copia de cancel visible para los procesos
+                futures = [pool.submit(_extract_pdf_pages, file_path, a, b, stop) for a, b in ranges]
+                try:
+                    # Se consumen en orden de envío para mantener el orden de páginas
+                    def results():
+                        for f in futures:
+                            # Mientras se espera una tarea, un cancel se pasa a los procesos enseguida
+                            while not wait([f], timeout=0.2).done:
+                                if cancel is not None and cancel.is_set():
+                                    stop.set()
+                                    return
+                            yield f.result()
+                    yield from DataService._merge_pdf_pages(results(), total, progress, cancel)
+                finally:
+                    # Cancelación o error: descartar las tareas que aún no empezaron y cortar las que corren
+                    stop.set()
+                    for f in futures:
+                        f.cancel()
         except Exception as e:
-            raise Exception(f"Error leyendo PDF: {e}")
\ No newline at end of file
+            raise Exception(f"Error leyendo PDF: {e}")
+
+    @staticmethod
+    def _merge_pdf_pages(results, total, progress, cancel):
+        """Deduplica entre páginas conservando el orden de aparición."""
+        seen = set()
+        done = 0
+        for pages in results:
+            for page_nums in pages:
+                if cancel is not None and cancel.is_set():
+                    return
+                done += 1
+                chunk = []
+                for clean in page_nums:
+                    if clean not in seen:
+                        chunk.append((clean, "")) # Nombre vacío por defecto
+                        seen.add(clean)
+                if chunk:
+                    yield chunk
+                if progress:
+                    progress(done, total)
+            if cancel is not None and cancel.is_set():
+                return
+
+
+def _phone_header_column(columns):
+    """Índice de la columna cuyo encabezado indica teléfono, o None."""
+    for i, col in enumerate(columns):
+        c_low = col.lower()
+        if any(x in c_low for x in ['tel', 'cel', 'phone', 'movil', 'number', 'whatsapp']):
+            return i
+    return None
+
+
+def _detect_delimiter(lines):
+    """Separador del bloque pegado: tab (celdas de Excel), ';', ',' o '|'. None = una columna."""
+    sample = "\n".join(lines)
+    try:
+        return csv.Sniffer().sniff(sample, delimiters="\t;,|").delimiter
+    except csv.Error:
+        # Sin patrón consistente: el separador presente en más líneas
+        counts = {d: sum(d in line for line in lines) for d in "\t;,|"}
+        best = max(counts, key=counts.get)
+        return best if counts[best] else None
+
+
+def _digit_count(cell):
+    return sum(ch.isdigit() for ch in cell)
+
+
+def _looks_like_header(sample):
+    """La primera fila es encabezado si no tiene ningún número de teléfono y las demás sí."""
+    if len(sample) < 2:
+        return False
+    first_has_phone = any(_digit_count(c) >= 7 for c in sample[0])
+    rest_have_phone = any(_digit_count(c) >= 7 for row in sample[1:] for c in row)
+    return not first_has_phone and rest_have_phone
+
+
+def _guess_name_column(sample, col_phone, width):
+    """Sin encabezado: la primera columna (distinta al teléfono) con texto mayormente sin dígitos."""
+    for i in range(width):
+        if i == col_phone:
+            continue
+        cells = [row[i].strip() for row in sample if i < len(row) and row[i].strip()]
+        if cells and sum(_digit_count(c) < 3 for c in cells) / len(cells) > 0.8:
+            return i
+    return None
+
+
+def _extract_pdf_pages(file_path, start, end, stop=None):
+    """
+    Trabajo de un proceso del pool: extrae y normaliza los números de las páginas [start, end).
+    Retorna una lista por página con los números válidos en orden de aparición.
+    stop: Event opcional que se mira antes de cada página; si se activa se retornan las páginas hechas.
+    """
+    from pypdf import PdfReader
+    reader = PdfReader(file_path)
+    pages = []
+    for i in range(start, end):
+        if stop is not None and stop.is_set():
+            break
+        text = reader.pages[i].extract_text() or ""
+        clean_nums, _ = normalize_phones(extract_numbers_from_text(text))
+        pages.append([n for n in clean_nums if n])
+    return pages
+
+
+def _expand_paths(paths):
+    """Archivos a importar: los indicados y, de cada carpeta, los de formato soportado (sin repetir, en orden)."""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, names in os.walk(path):
+                dirs.sort()
+                files.extend(os.path.join(root, n) for n in sorted(names)
+                             if n.lower().endswith(SOURCE_EXTENSIONS) and not n.startswith("~$")) # ~$: bloqueo de Office
+        else:
+            files.append(path)
+    return list(dict.fromkeys(os.path.abspath(f) for f in files))
+
+
+def _iter_sheets(file_path):
+    """(nombre_hoja, filas crudas como texto) de cada hoja del libro, con el lector más rápido del formato."""
+    ext = os.path.splitext(file_path)[1].lower()
+    if ext in (".xlsx", ".xlsm"):
+        from openpyxl import load_workbook
+        wb = load_workbook(file_path, read_only=True, data_only=True)
+        try:
+            for ws in wb.worksheets:
+                yield ws.title, (tuple(_cell_to_str(v) for v in row) for row in ws.iter_rows(values_only=True))
+        finally:
+            wb.close()
+    else:
+        # .xls y .ods no tienen lector en streaming: pandas lee todas las hojas de una vez
+        import pandas as pd
+        frames = pd.read_excel(file_path, sheet_name=None, dtype=str, header=None,
+                               engine="odf" if ext == ".ods" else None)
+        for name, df in frames.items():
+            df.fillna("", inplace=True)
+            yield name, df.itertuples(index=False, name=None)
+
+
+def _with_origin(chunk, origin):
+    for _, _, data in chunk:
+        data.setdefault("origen", origin)
+    return chunk
+
+
+def _iter_source(file_path, guesses=None):
+    """
+    Lee un archivo completo (todas sus hojas); guesses como en DataService._iter_table. Eventos en orden:
+    ("chunk", [(numero, nombre, datos), ...]) y, al cerrar cada hoja, ("source", origen, filas, validos, rechazos).
+    """
+    name = os.path.basename(file_path)
+    if file_path.lower().endswith((".csv", ".tsv", ".txt")):
+        with open(file_path, encoding="utf-8-sig", errors="replace") as f:
+            text = f.read()
+        valid = 0
+        rejected = Counter()
+        counted = [0]
+        for chunk in DataService.iter_text(text, rejected=rejected, counted=counted):
+            valid += len(chunk)
+            yield "chunk", _with_origin(chunk, name)
+        yield "source", name, counted[0], valid, dict(rejected)
+        return
+
+    for sheet, rows in _iter_sheets(file_path):
+        origin = f"{name} › {sheet}"
+        counted = [0]
+        def counting(rows=rows):
+            for row in rows:
+                counted[0] += 1
+                yield row
+        valid = 0
+        rejected = Counter()
+        for chunk in DataService._iter_table(counting(), guesses=guesses, rejected=rejected):
+            valid += len(chunk)
+            yield "chunk", _with_origin(chunk, origin)
+        # Las filas no incluyen el encabezado
+        yield "source", origin, max(counted[0] - 1, 0), valid, dict(rejected)
+
+
+def _read_source(file_path, events, stop, guesses=None):
+    """
+    Trabajo de un proceso del pool: pone en `events` los eventos de un archivo (ver _iter_source) a medida
+    que se leen, un ("error", mensaje) si falla y al final ("end",). La cola es acotada: si el proceso
+    principal va atrasado se espera, así la memoria no crece con el tamaño del archivo. Con `stop` se corta.
+    """
+    def put(item):
+        while not stop.is_set():
+            try:
+                events.put(item, timeout=0.2)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    try:
+        for event in _iter_source(file_path, guesses):
+            if not put(event):
+                return
+    except Exception as e:
+        put(("error", str(e)))
+    put(("end",))
+
+
+def _drain_source(events, future, cancelled):
+    """Eventos de un archivo leído por _read_source hasta su ("end",); se corta si cancelled() o el proceso murió."""
+    while True:
+        try:
+            event = events.get(timeout=0.2)
+        except queue.Empty:
+            if cancelled():
+                return
+            if future.done() and events.empty():
+                # El proceso terminó sin avisar el fin (se cayó): se informa como error del archivo
+                error = future.exception()
+                yield "error", str(error) if error else "el proceso de lectura terminó antes de tiempo"
+                return
+            continue
+        if event[0] == "end":
+            return
+        yield event
+
+
+def _iter_pdf_source(file_path, cancel=None):
+    """Los números de un PDF con el mismo formato de eventos que _iter_source (un origen por archivo)."""
+    name = os.path.basename(file_path)
+    valid = 0
+    try:
+        for chunk in DataService.iter_pdf(file_path, cancel=cancel):
+            valid += len(chunk)
+            yield "chunk", [(number, nombre, {"origen": name}) for number, nombre in chunk]
+    except Exception as e:
+        yield "error", str(e)
+        return
+    yield "source", name, valid, valid, {}
@@ -0,0 +1,178 @@
+import hashlib
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+
+from PIL import Image, ImageDraw, ImageFont, ImageOps
+
+import config
+from src.utils.logger import log
+
+# Cambiar si cambia la forma de procesar: invalida lo que ya está en caché
+_PIPELINE_VERSION = "1"
+_FONT_NAMES = ("arialbd.ttf", "arial.ttf", "DejaVuSans-Bold.ttf", "DejaVuSans.ttf")
+
+
+class ImageService:
+    """
+    Prepara las imágenes de la campaña antes de enviar, con caché en disco por hash de contenido.
+    El envío solo recibe rutas de archivos ya listos (chicos y, si corresponde, personalizados).
+    """
+
+    @staticmethod
+    def prepare(path):
+        """
+        Redimensiona (lado mayor <= IMAGE_MAX_SIDE) y recomprime la imagen una sola vez.
+        Retorna la ruta del archivo en caché; si ya existe no se vuelve a procesar.
+        """
+        digest = _file_digest(path)
+        settings = f"{_PIPELINE_VERSION}|{config.IMAGE_MAX_SIDE}|{config.IMAGE_QUALITY}"
+        key = hashlib.sha1(f"{digest}|{settings}".encode("utf-8")).hexdigest()
+        for ext in (".jpg", ".png"):
+            cached = os.path.join(config.IMAGE_CACHE_DIR, key + ext)
+            if os.path.exists(cached):
+                return cached
+
+        os.makedirs(config.IMAGE_CACHE_DIR, exist_ok=True)
+        try:
+            out = _process_image(path, os.path.join(config.IMAGE_CACHE_DIR, key))
+        except Exception as e:
+            raise Exception(f"Error procesando imagen: {e}")
+        log(f"Imagen preparada: {os.path.getsize(path) // 1024} KB -> {os.path.getsize(out) // 1024} KB",
+            step="image_prepare")
+        return out
+
+    @staticmethod
+    def render_stamped(base_path, texts, progress=None):
+        """
+        Genera una imagen por texto distinto (ej. el nombre del contacto) estampado sobre la imagen base.
+        Se procesan en un pool de procesos y se guardan en caché por hash de (imagen, texto, ajustes).
+        progress(hechas, total) se llama a medida que terminan.
+        Retorna: dict {texto: ruta}
+        """
+        base = ImageService.prepare(base_path)
+        base_digest = _file_digest(base)
+        settings = f"{_PIPELINE_VERSION}|{config.IMAGE_STAMP_POSITION}|{config.IMAGE_STAMP_COLOR}|{config.IMAGE_QUALITY}"
+        ext = os.path.splitext(base)[1]
+
+        paths = {}
+        todo = []
+        for text in dict.fromkeys(texts):
+            if not text.strip():
+                paths[text] = base # Sin texto: la imagen base, sin franja
+                continue
+            key = hashlib.sha1(f"{base_digest}|{settings}|{text}".encode("utf-8")).hexdigest()
+            paths[text] = out = os.path.join(config.IMAGE_CACHE_DIR, key + ext)
+            if not os.path.exists(out):
+                todo.append((text, out))
+
+        total = len(todo)
+        if total <= 1:
+            for done, (text, out) in enumerate(todo, 1):
+                _stamp_image(base, text, out)
+                if progress:
+                    progress(done, total)
+            return paths
+
+        with ProcessPoolExecutor(max_workers=config.IMAGE_WORKERS) as pool:
+            futures = [pool.submit(_stamp_image, base, text, out) for text, out in todo]
+            for done, f in enumerate(futures, 1):
+                f.result()
+                if progress:
+                    progress(done, total)
+        log(f"Imágenes personalizadas generadas: {total} (en caché: {len(paths) - total})", step="image_stamp")
+        return paths
+
+
+def _file_digest(path):
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _has_alpha(img):
+    return img.mode in ("RGBA", "LA") or (img.mode == "P" and "transparency" in img.info)
+
+
+def _save_atomic(img, out, quality):
+    """Guarda como JPEG (o PNG si tiene transparencia) sin dejar archivos a medias en la caché."""
+    tmp = f"{out}.{os.getpid()}.tmp"
+    if out.endswith(".png"):
+        img.save(tmp, format="PNG", optimize=True)
+    else:
+        img.convert("RGB").save(tmp, format="JPEG", quality=quality, optimize=True)
+    os.replace(tmp, out)
+
+
+def _process_image(path, out_base):
+    """Corrige la orientación EXIF, reduce y recomprime. Retorna la ruta final (.jpg o .png)."""
+    with Image.open(path) as src:
+        changed = src.getexif().get(0x0112, 1) != 1 # Orientación EXIF (fotos de celular)
+        img = ImageOps.exif_transpose(src)
+        if max(img.size) > config.IMAGE_MAX_SIDE:
+            img.thumbnail((config.IMAGE_MAX_SIDE, config.IMAGE_MAX_SIDE), Image.LANCZOS)
+            changed = True
+        out = out_base + (".png" if _has_alpha(img) else ".jpg")
+        _save_atomic(img, out, config.IMAGE_QUALITY)
+        source_format = src.format
+
+    # Si no hubo que reducir y el original ya era más liviano, se usa el original tal cual
+    same_format = source_format == ("PNG" if out.endswith(".png") else "JPEG")
+    if not changed and same_format and os.path.getsize(path) <= os.path.getsize(out):
+        shutil.copyfile(path, out)
+    return out
+
+
+def _load_font(size):
+    for name in _FONT_NAMES:
+        try:
+            return ImageFont.truetype(name, size)
+        except OSError:
+            continue
+    try:
+        return ImageFont.load_default(size)
+    except TypeError:
+        return ImageFont.load_default() # Pillow < 10.1 no acepta tamaño
+
+
+def _stamp_image(base, text, out):
+    """
+    Trabajo de un proceso del pool: escribe `text` sobre una franja semitransparente de la imagen base.
+    """
+    with Image.open(base) as src:
+        img = src.convert("RGBA")
+    width, height = img.size
+
+    # Tamaño de letra: ~1/14 del ancho, reducido hasta que el texto entre con margen
+    size = max(14, width // 14)
+    draw = ImageDraw.Draw(img)
+    font = _load_font(size)
+    while size > 14:
+        left, top, right, bottom = draw.textbbox((0, 0), text, font=font)
+        if right - left <= width * 0.9:
+            break
+        size = int(size * 0.9)
+        font = _load_font(size)
+    left, top, right, bottom = draw.textbbox((0, 0), text, font=font)
+    text_w, text_h = right - left, bottom - top
+
+    pad = max(6, text_h // 2)
+    band_h = text_h + 2 * pad
+    if config.IMAGE_STAMP_POSITION == "top":
+        band_y = 0
+    elif config.IMAGE_STAMP_POSITION == "center":
+        band_y = (height - band_h) // 2
+    else:
+        band_y = height - band_h
+
+    overlay = Image.new("RGBA", img.size, (0, 0, 0, 0))
+    ImageDraw.Draw(overlay).rectangle((0, band_y, width, band_y + band_h), fill=(0, 0, 0, 110))
+    img = Image.alpha_composite(img, overlay)
+    ImageDraw.Draw(img).text(((width - text_w) // 2 - left, band_y + pad - top), text,
+                             font=font, fill=config.IMAGE_STAMP_COLOR)
+
+    if out.endswith(".jpg"):
+        img = img.convert("RGB")
+    _save_atomic(img, out, config.IMAGE_QUALITY)
@@ -0,0 +1,140 @@
+import bisect
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import config
+
+# Límites (segundos) de los buckets del histograma por paso
+BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 20.0, 40.0)
+
+
+class StepStats:
+    """Histograma de un paso + muestra reciente para percentiles."""
+
+    def __init__(self):
+        self.buckets = [0] * (len(BUCKETS) + 1)  # El último es +Inf
+        self.count = 0
+        self.total = 0.0
+        self.recent = deque(maxlen=config.METRICS_SAMPLES)
+
+    def add(self, seconds):
+        self.buckets[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self.recent.append(seconds)
+
+    def percentile(self, p):
+        if not self.recent:
+            return 0.0
+        data = sorted(self.recent)
+        return data[min(len(data) - 1, int(p / 100 * len(data)))]
+
+
+class Metrics:
+    """
+    Tiempos por paso del envío y contadores de la campaña.
+    Registrar cuesta un perf_counter y un append bajo lock: se puede usar en el camino caliente.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.start_campaign()
+
+    def start_campaign(self):
+        with self._lock:
+            self.steps = {}
+            self.sent = 0
+            self.failed = 0
+            self.started_at = time.time()
+
+    @contextmanager
+    def step(self, name):
+        """Uso: with METRICS.step("chat_load"): ..."""
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - t0)
+
+    def observe(self, name, seconds):
+        with self._lock:
+            stats = self.steps.get(name)
+            if stats is None:
+                stats = self.steps[name] = StepStats()
+            stats.add(seconds)
+
+    def record_result(self, ok):
+        with self._lock:
+            if ok:
+                self.sent += 1
+            else:
+                self.failed += 1
+
+    def per_minute(self):
+        elapsed = max(time.time() - self.started_at, 1e-6)
+        return self.sent * 60.0 / elapsed
+
+    def snapshot(self):
+        """Retorna (enviados, fallidos, msg_por_minuto, [(paso, cantidad, media, p50, p95), ...])."""
+        with self._lock:
+            rows = [
+                (name, s.count, s.total / s.count, s.percentile(50), s.percentile(95))
+                for name, s in self.steps.items() if s.count
+            ]
+            return self.sent, self.failed, self.per_minute(), rows
+
+    # --- Exportación ---
+    def export_csv(self, path=None):
+        path = path or config.METRICS_CSV
+        sent, failed, rate, rows = self.snapshot()
+        lines = ["paso,cantidad,media_s,p50_s,p95_s"]
+        lines += [f"{name},{count},{mean:.4f},{p50:.4f},{p95:.4f}" for name, count, mean, p50, p95 in rows]
+        lines += ["", "contador,valor", f"enviados,{sent}", f"fallidos,{failed}", f"msg_por_minuto,{rate:.2f}"]
+        _write_atomic(path, "\n".join(lines) + "\n")
+
+    def export_prometheus(self, path=None):
+        """Formato textfile de Prometheus (node_exporter --collector.textfile)."""
+        path = path or config.METRICS_PROM
+        with self._lock:
+            out = [
+                "# HELP wsa_step_duration_seconds Duración de cada paso del envío.",
+                "# TYPE wsa_step_duration_seconds histogram",
+            ]
+            for name, s in self.steps.items():
+                cumulative = 0
+                for le, n in zip(BUCKETS + ("+Inf",), s.buckets):
+                    cumulative += n
+                    out.append(f'wsa_step_duration_seconds_bucket{{step="{name}",le="{le}"}} {cumulative}')
+                out.append(f'wsa_step_duration_seconds_sum{{step="{name}"}} {s.total:.6f}')
+                out.append(f'wsa_step_duration_seconds_count{{step="{name}"}} {s.count}')
+            out += [
+                "# TYPE wsa_messages_sent_total counter",
+                f"wsa_messages_sent_total {self.sent}",
+                "# TYPE wsa_messages_failed_total counter",
+                f"wsa_messages_failed_total {self.failed}",
+                "# TYPE wsa_messages_per_minute gauge",
+                f"wsa_messages_per_minute {self.per_minute():.4f}",
+            ]
+        _write_atomic(path, "\n".join(out) + "\n")
+
+    def export(self):
+        try:
+            self.export_csv()
+            self.export_prometheus()
+        except OSError:
+            pass
+
+
+def _write_atomic(path, text):
+    # El colector no debe leer un archivo a medio escribir
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+
+# Instancia compartida por todas las sesiones
+METRICS = Metrics()
@@ -0,0 +1,82 @@
+import sqlite3
+import threading
+import time
+
+import config
+from src.services.contact_store import number_key
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS number_validity (
+    phone       TEXT PRIMARY KEY,
+    valid       INTEGER NOT NULL,
+    checked_at  REAL NOT NULL
+) WITHOUT ROWID;
+"""
+
+
+class NumberCache:
+    """
+    Caché persistente de qué números tienen WhatsApp, con vencimiento.
+    Se llena con los resultados de envío y de la verificación previa, y se consulta antes de encolar:
+    un número conocido como inválido se marca al instante en vez de abrir su chat de nuevo.
+    Vive en la misma base que las campañas; las consultas se responden desde memoria.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or config.CAMPAIGN_DB
+        self._lock = threading.Lock()
+        self._pending = []
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(_SCHEMA)
+        self._purge_expired()
+        self._entries = {phone: (bool(valid), checked_at)
+                         for phone, valid, checked_at in self.conn.execute("SELECT phone, valid, checked_at FROM number_validity")}
+
+    def _purge_expired(self):
+        now = time.time()
+        self.conn.execute(
+            "DELETE FROM number_validity WHERE (valid = 0 AND checked_at < ?) OR (valid = 1 AND checked_at < ?)",
+            (now - config.INVALID_CACHE_DAYS * 86400, now - config.VALID_CACHE_DAYS * 86400),
+        )
+        self.conn.commit()
+
+    def lookup(self, phone):
+        """True/False si el número se conoce y no venció; None si hay que verificarlo."""
+        entry = self._entries.get(number_key(phone))
+        if entry is None:
+            return None
+        valid, checked_at = entry
+        ttl = config.VALID_CACHE_DAYS if valid else config.INVALID_CACHE_DAYS
+        return valid if time.time() - checked_at < ttl * 86400 else None
+
+    def is_invalid(self, phone):
+        return self.lookup(phone) is False
+
+    def record(self, phone, valid):
+        """Guarda el resultado de un envío o verificación. Se escribe en lote (flush)."""
+        key = number_key(phone)
+        if not key:
+            return
+        now = time.time()
+        with self._lock:
+            self._entries[key] = (bool(valid), now)
+            self._pending.append((key, int(bool(valid)), now))
+            if len(self._pending) >= config.CAMPAIGN_FLUSH_EVERY:
+                self._flush_locked()
+
+    def flush(self):
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        if self._pending:
+            self.conn.executemany("INSERT OR REPLACE INTO number_validity (phone, valid, checked_at) VALUES (?, ?, ?)",
+                                  self._pending)
+            self.conn.commit()
+            self._pending = []
+
+    def close(self):
+        with self._lock:
+            self._flush_locked()
+            self.conn.close()
@@ -0,0 +1,190 @@
+import random
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta
+
+import config
+from src.utils.logger import log
+
+_HOUR = 3600
+_DAY = 86400
+
+
+class TokenBucket:
+    """Cubeta de fichas: `rate` fichas por segundo, hasta `capacity` acumuladas. No es thread-safe por sí sola."""
+
+    def __init__(self, rate, capacity=1):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self, now):
+        """Segundos hasta que haya una ficha (0 si ya hay)."""
+        self._refill(now)
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self, now):
+        self._refill(now)
+        self.tokens -= 1
+
+
+class SendScheduler:
+    """
+    Decide cuándo puede enviar cada sesión, en lugar de una pausa fija tras cada mensaje.
+    - Por sesión: cubeta de fichas (RATE_PER_SESSION_PER_MIN, ráfaga RATE_BURST) más un extra aleatorio.
+    - Global: máximo por hora y por día (ventana deslizante, compartida por todas las sesiones).
+    - Horario: solo dentro de SEND_WINDOWS.
+    - Si sube la tasa de fallos, todas las esperas se multiplican (backoff) y bajan al normalizarse.
+    El tiempo que tarda el envío cuenta dentro del intervalo: con envíos lentos no se espera de más.
+    """
+
+    def __init__(self, sent_times=()):
+        """sent_times: marcas de tiempo (epoch) de envíos recientes, para respetar los límites tras reiniciar."""
+        self._lock = threading.Lock()
+        self._buckets = {}
+        self._hold = {}  # sesión -> instante (monotonic) hasta el que espera por el extra aleatorio
+        self._reserved = {}  # sesión -> marca (epoch) del turno reservado por wait() y aún no devuelto
+        now = time.time()
+        self._sent_day = deque(sorted(t for t in sent_times if t > now - _DAY))
+        self._sent_hour = deque(t for t in self._sent_day if t > now - _HOUR)
+        self._windows = [_parse_window(w) for w in config.SEND_WINDOWS]
+        self._results = deque(maxlen=config.BACKOFF_WINDOW)
+        self.backoff = 1.0
+        self.waiting_reason = ""
+
+    # --- Espera ---
+    def wait(self, session_name, should_stop):
+        """
+        Bloquea hasta que `session_name` pueda enviar y reserva el turno.
+        should_stop() se consulta durante la espera. Retorna False si se detuvo antes de tiempo.
+        Si al final el mensaje no sale, devolver el turno con release().
+        """
+        while not should_stop():
+            with self._lock:
+                delay, reason = self._delay(session_name)
+                if delay <= 0:
+                    self._reserve(session_name)
+                    if self.waiting_reason:
+                        self.waiting_reason = ""
+                    return True
+                if reason != "sesión" and reason != self.waiting_reason:
+                    log(f"Envío en espera: {reason} ({int(delay)}s)")
+                if reason != "sesión":
+                    self.waiting_reason = reason
+            time.sleep(min(delay, 0.5))
+        return False
+
+    def _delay(self, session_name):
+        """(segundos, motivo) que faltan para que la sesión pueda enviar."""
+        now_wall, now = time.time(), time.monotonic()
+
+        window = _window_delay(self._windows, datetime.now())
+        if window > 0:
+            return window, "fuera del horario de envío"
+
+        self._expire(now_wall)
+        if config.RATE_PER_DAY and len(self._sent_day) >= config.RATE_PER_DAY:
+            return self._sent_day[0] + _DAY - now_wall, "límite diario alcanzado"
+        if config.RATE_PER_HOUR and len(self._sent_hour) >= config.RATE_PER_HOUR:
+            return self._sent_hour[0] + _HOUR - now_wall, "límite por hora alcanzado"
+
+        bucket = self._bucket(session_name)
+        delay = max(bucket.delay(now), self._hold.get(session_name, 0) - now)
+        return delay, "sesión"
+
+    def _reserve(self, session_name):
+        now_wall, now = time.time(), time.monotonic()
+        self._bucket(session_name).take(now)
+        self._sent_day.append(now_wall)
+        self._sent_hour.append(now_wall)
+        self._reserved[session_name] = now_wall
+        # Extra aleatorio (hasta RATE_JITTER del intervalo) para no enviar con un ritmo fijo
+        interval = 60 / config.RATE_PER_SESSION_PER_MIN * self.backoff
+        self._hold[session_name] = now + interval * random.uniform(0, config.RATE_JITTER)
+
+    def release(self, session_name, attempted=False):
+        """
+        Devuelve el turno que reservó wait() cuando el mensaje no salió: deja de contar para los límites
+        por hora y por día. Sin attempted (no se llegó a usar el navegador, ej. el reclamo falló) también
+        se devuelven la ficha y la espera aleatoria de la sesión.
+        """
+        with self._lock:
+            reserved = self._reserved.pop(session_name, None)
+            if reserved is None:
+                return
+            for sent in (self._sent_day, self._sent_hour):
+                try:
+                    sent.remove(reserved)
+                except ValueError:
+                    pass # Ya venció la ventana
+            if not attempted:
+                bucket = self._bucket(session_name)
+                bucket.tokens = min(bucket.capacity, bucket.tokens + 1)
+                self._hold.pop(session_name, None)
+
+    def _bucket(self, session_name):
+        bucket = self._buckets.get(session_name)
+        if bucket is None:
+            bucket = self._buckets[session_name] = TokenBucket(self._session_rate(), config.RATE_BURST)
+        return bucket
+
+    def _session_rate(self):
+        return config.RATE_PER_SESSION_PER_MIN / 60 / self.backoff
+
+    def _expire(self, now_wall):
+        while self._sent_day and self._sent_day[0] <= now_wall - _DAY:
+            self._sent_day.popleft()
+        while self._sent_hour and self._sent_hour[0] <= now_wall - _HOUR:
+            self._sent_hour.popleft()
+
+    # --- Backoff ---
+    def record(self, ok):
+        """Registra el resultado de un envío y ajusta el backoff según la tasa de fallos reciente."""
+        with self._lock:
+            self._results.append(ok)
+            if len(self._results) < self._results.maxlen // 2:
+                return
+            failure_rate = self._results.count(False) / len(self._results)
+            if failure_rate >= config.BACKOFF_FAILURE_RATE and self.backoff < config.BACKOFF_MAX:
+                self._set_backoff(min(config.BACKOFF_MAX, self.backoff * 2), failure_rate)
+            elif (failure_rate <= config.BACKOFF_FAILURE_RATE / 2 and self.backoff > 1
+                  and len(self._results) == self._results.maxlen):
+                self._set_backoff(max(1.0, self.backoff / 2), failure_rate)
+
+    def _set_backoff(self, value, failure_rate):
+        log(f"Tasa de fallos {failure_rate:.0%}: ritmo de envío x{1 / value:.2f}", backoff=value)
+        self.backoff = value
+        self._results.clear()  # La próxima decisión se toma con resultados del nuevo ritmo
+        for bucket in self._buckets.values():
+            bucket.rate = self._session_rate()
+
+
+def _parse_window(text):
+    """'09:00-20:00' -> ((9, 0), (20, 0)). Si fin < inicio la ventana cruza la medianoche."""
+    start, end = (part.strip() for part in text.split("-"))
+    to_tuple = lambda hhmm: tuple(int(x) for x in hhmm.split(":"))
+    return to_tuple(start), to_tuple(end)
+
+
+def _window_delay(windows, now):
+    """Segundos hasta la próxima ventana de envío (0 si ahora está dentro de alguna o no hay ventanas)."""
+    if not windows:
+        return 0
+    current = (now.hour, now.minute)
+    best = None
+    for start, end in windows:
+        inside = start <= current < end if start <= end else (current >= start or current < end)
+        if inside:
+            return 0
+        begin = now.replace(hour=start[0], minute=start[1], second=0, microsecond=0)
+        if begin <= now:
+            begin += timedelta(days=1)
+        wait = (begin - now).total_seconds()
+        best = wait if best is None else min(best, wait)
+    return best
@@ -0,0 +1,119 @@
+import threading
+import time
+
+import config
+from src.utils.logger import log
+
+# Estado de entrega de un mensaje, de menor a mayor
+PENDING = "pendiente"   # Reloj: todavía no salió del teléfono/navegador
+SENT = "enviado"        # ✓: llegó al servidor
+DELIVERED = "entregado" # ✓✓: llegó al teléfono del contacto
+READ = "leido"          # ✓✓ azul
+
+_RANK = {PENDING: 0, SENT: 1, DELIVERED: 2, READ: 3}
+
+
+def _receipt_state(icon, label):
+    """Estado según el data-icon del tick (status-time, status-check, status-dblcheck, msg-...) y su aria-label."""
+    if "time" in icon:
+        return PENDING
+    if "dblcheck" in icon:
+        return READ if ("leído" in label or "read" in label) else DELIVERED
+    if "check" in icon:
+        return SENT
+    return None
+
+
+class ReceiptTracker:
+    """
+    Sigue los ticks de los mensajes enviados (reloj -> ✓ -> ✓✓) sin frenar la cola de envío.
+    No abre chats: la sesión que acaba de enviar lee en una sola llamada la lista de chats recientes,
+    como mucho cada RECEIPT_SCAN_INTERVAL segundos, y con eso actualiza todos sus mensajes pendientes.
+    Por contacto guarda los segundos hasta "enviado" y hasta "entregado" (con la resolución del intervalo).
+    Los chats se reconocen por los últimos 8 dígitos del título: un contacto agendado con nombre no se ve.
+
+    on_receipts([(uid, segundos_a_enviado, segundos_a_entregado), ...]) se llama una vez por escaneo con los cambios.
+    """
+
+    def __init__(self, on_receipts=None):
+        self.on_receipts = on_receipts or (lambda changes: None)
+        self._lock = threading.Lock()
+        self._watching = {}   # nombre de sesión -> {últimos 8 dígitos: uid}
+        self._sessions = {}   # nombre de sesión -> Session
+        self._last_scan = {}  # nombre de sesión -> momento del último escaneo
+        self._sent_at = {}    # uid -> momento en que se envió
+        self.states = {}      # uid -> último estado visto
+        self.times = {}       # uid -> [segundos_a_enviado, segundos_a_entregado]
+
+    def watch(self, session, uid, phone, sent_at=None):
+        """Empieza a seguir el mensaje recién enviado a `phone` por `session`."""
+        digits = "".join(ch for ch in phone if ch.isdigit())
+        if len(digits) < 8:
+            return
+        with self._lock:
+            self._sessions[session.name] = session
+            self._watching.setdefault(session.name, {})[digits[-8:]] = uid
+            self._sent_at[uid] = sent_at or time.time()
+            self.states[uid] = PENDING
+            self.times[uid] = [None, None]
+
+    def scan(self, session, force=False):
+        """
+        Lee los ticks de la lista de chats de `session` (llamar con la sesión tomada, sin otro envío en curso).
+        Sin force, solo si pasó RECEIPT_SCAN_INTERVAL desde el último escaneo de esa sesión.
+        """
+        now = time.time()
+        with self._lock:
+            if not self._watching.get(session.name):
+                return
+            if not force and now - self._last_scan.get(session.name, 0) < config.RECEIPT_SCAN_INTERVAL:
+                return
+            self._last_scan[session.name] = now
+        try:
+            rows = session.bot.read_receipts()
+        except Exception as e:
+            log(f"[{session.name}] No se pudieron leer los ticks: {e}")
+            return
+        self._apply(session.name, rows, time.time())
+
+    def _apply(self, session_name, rows, now):
+        changed = []
+        with self._lock:
+            watching = self._watching.get(session_name, {})
+            for digits, icon, label in rows:
+                uid = watching.get(digits[-8:])
+                state = _receipt_state(icon or "", label or "")
+                if uid is None or state is None or _RANK[state] <= _RANK[self.states[uid]]:
+                    continue
+                self.states[uid] = state
+                elapsed = round(now - self._sent_at[uid], 1)
+                times = self.times[uid]
+                if times[0] is None and _RANK[state] >= _RANK[SENT]:
+                    times[0] = elapsed
+                if times[1] is None and _RANK[state] >= _RANK[DELIVERED]:
+                    times[1] = elapsed
+                    del watching[digits[-8:]] # Entregado: ya no hace falta seguirlo
+                changed.append((uid, times[0], times[1]))
+        if changed:
+            self.on_receipts(changed)
+
+    def undelivered(self):
+        """uids seguidos que todavía no se vieron entregados."""
+        with self._lock:
+            return [uid for uid, times in self.times.items() if times[1] is None]
+
+    def settle(self, should_run, timeout=None):
+        """
+        Al terminar el envío: sigue escaneando las sesiones con mensajes sin entregar hasta que se entreguen,
+        pase `timeout` (config.RECEIPT_FINAL_WAIT) o should_run() sea False. Requiere que no haya envíos en curso.
+        """
+        deadline = time.time() + (config.RECEIPT_FINAL_WAIT if timeout is None else timeout)
+        while should_run():
+            with self._lock:
+                sessions = [self._sessions[name] for name, watching in self._watching.items() if watching]
+            sessions = [s for s in sessions if s.active]
+            if not sessions or time.time() >= deadline:
+                return
+            for session in sessions:
+                self.scan(session)
+            time.sleep(1)
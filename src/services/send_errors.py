@@ -0,0 +1,46 @@
+class SendError(Exception):
+    """
+    Fallo de un envío con su categoría.
+    transient=True: la causa puede desaparecer sola (timeout, editor que no abrió, navegador caído)
+    y el contacto vuelve a la cola de reintentos; False: reintentar no cambia el resultado.
+    """
+    category = "desconocido"
+    transient = True
+
+
+class InvalidNumberError(SendError):
+    """El número no tiene WhatsApp (WhatsApp Web muestra el aviso de número inválido)."""
+    category = "numero_invalido"
+    transient = False
+
+
+class MalformedNumberError(SendError):
+    """El número no se puede marcar (letras, vacío)."""
+    category = "numero_mal_formado"
+    transient = False
+
+
+class ChatLoadError(SendError):
+    """El chat no cargó a tiempo."""
+    category = "carga_chat"
+
+
+class AttachmentError(SendError):
+    """La imagen no se adjuntó o su editor no abrió/cerró."""
+    category = "imagen"
+
+
+class ComposeError(SendError):
+    """No se pudo escribir o enviar el texto en la caja del chat."""
+    category = "texto"
+
+
+class BrowserError(SendError):
+    """El navegador o la sesión de Chrome dejaron de responder."""
+    category = "navegador"
+
+
+class UnconfirmedSendError(SendError):
+    """Se intentó enviar pero no apareció la burbuja saliente: pudo haberse enviado, no se reintenta."""
+    category = "sin_confirmacion"
+    transient = False
@@ -0,0 +1,147 @@
+import os
+import queue
+import threading
+import time
+
+import config
+from src.utils.logger import log
+
+# Estados de una sesión
+STATUS_STARTING = "Iniciando"
+STATUS_QR = "Esperando QR"
+STATUS_READY = "Conectado"
+STATUS_BUSY = "Enviando"
+STATUS_RETIRED = "Retirada"
+
+
+class Session:
+    """Una cuenta vinculada: su bot, su perfil de Chrome y su salud."""
+
+    def __init__(self, index):
+        self.index = index
+        self.name = f"S{index + 1}"
+        # La sesión 1 conserva el perfil original para no perder el login existente
+        self.profile = config.USER_DATA_DIR if index == 0 else f"{config.USER_DATA_DIR}_{index + 1}"
+        self._bot = None
+        self.qr_path = os.path.join(config.BASE_DIR, f"temp_qr_{index + 1}.png")
+        self.status = STATUS_STARTING
+        self.sent = 0
+        self.failed = 0
+        self.consecutive_failures = 0
+        self.last_error = ""
+
+    @property
+    def bot(self):
+        # Selenium se importa recién al usar el bot (el hilo de inicio, ya con la ventana abierta)
+        if self._bot is None:
+            from src.services.whatsapp_service import WhatsAppBot
+            self._bot = WhatsAppBot(user_data_dir=self.profile, name=self.name)
+        return self._bot
+
+    @property
+    def active(self):
+        return self.status not in (STATUS_STARTING, STATUS_QR, STATUS_RETIRED)
+
+
+class SenderPool:
+    """
+    Pool de N sesiones de WhatsApp Web, cada una con su propio perfil de Chrome y QR.
+    Las sesiones libres esperan en una cola: quien pide una recibe la primera que se libere.
+    Una sesión que falla SESSION_MAX_FAILURES veces seguidas sale de la rotación.
+    """
+
+    def __init__(self, size=None):
+        size = size or config.SESSIONS
+        self.sessions = [Session(i) for i in range(size)]
+        self._free = queue.Queue()
+        self._lock = threading.Lock()
+
+    def connect(self, session, on_qr=None, should_run=None):
+        """
+        Abre el navegador de la sesión y espera a que inicie sesión (bloquea: llamar en un hilo).
+        on_qr(session) se llama cada vez que se guarda una captura nueva del QR en session.qr_path.
+        Retorna True cuando la sesión quedó lista; si el navegador falla la sesión se retira y se relanza el error.
+        """
+        try:
+            session.bot.start_browser()
+            while should_run is None or should_run():
+                if session.bot.is_logged_in():
+                    self.mark_ready(session)
+                    return True
+                if session.bot.get_qr_screenshot(session.qr_path):
+                    session.status = STATUS_QR
+                    if on_qr:
+                        on_qr(session)
+                time.sleep(1)
+            return False
+        except Exception as e:
+            self.retire(session, str(e))
+            raise
+
+    def mark_ready(self, session):
+        """Llamar cuando la sesión terminó de iniciar sesión (QR escaneado)."""
+        with self._lock:
+            if session.status in (STATUS_STARTING, STATUS_QR):
+                session.status = STATUS_READY
+                self._free.put(session)
+                log(f"[{session.name}] Sesión lista.")
+
+    def acquire(self, timeout=None):
+        """Retorna la próxima sesión libre, o None si no hay ninguna activa o vence el timeout."""
+        while True:
+            if not self.active_count():
+                return None
+            try:
+                session = self._free.get(timeout=timeout if timeout is not None else 1.0)
+            except queue.Empty:
+                if timeout is not None:
+                    return None
+                continue
+            if session.status == STATUS_RETIRED:
+                continue
+            session.status = STATUS_BUSY
+            return session
+
+    def release(self, session, ok, error=""):
+        """Devuelve la sesión al pool registrando el resultado del último envío (ok=None: sin envío)."""
+        with self._lock:
+            if ok is None:
+                pass
+            elif ok:
+                session.sent += 1
+                session.consecutive_failures = 0
+            else:
+                session.failed += 1
+                session.consecutive_failures += 1
+                session.last_error = str(error)
+
+            if session.consecutive_failures >= config.SESSION_MAX_FAILURES:
+                self._retire(session, f"{session.consecutive_failures} fallos seguidos")
+            elif session.status != STATUS_RETIRED:
+                session.status = STATUS_READY
+                self._free.put(session)
+
+    def retire(self, session, reason=""):
+        """Saca manualmente una sesión de la rotación."""
+        with self._lock:
+            self._retire(session, reason)
+
+    def _retire(self, session, reason):
+        session.status = STATUS_RETIRED
+        log(f"[{session.name}] Sesión retirada de la rotación: {reason}")
+
+    def active_count(self):
+        return sum(1 for s in self.sessions if s.active)
+
+    def health(self):
+        """Resumen por sesión: [(nombre, estado, enviados, fallidos), ...]"""
+        return [(s.name, s.status, s.sent, s.failed) for s in self.sessions]
+
+    def close(self):
+        for s in self.sessions:
+            if s._bot is None:
+                continue
+            try:
+                s.bot.close()
+            except Exception:
+                pass
@@ -0,0 +1,173 @@
+import random
+import zlib
+
+from src.utils.helpers import field_key
+
+# Campos que existen para todo contacto, además de las columnas importadas
+BUILTIN_FIELDS = ("nombre", "numero")
+
+# Tipos de nodo del template compilado
+_TEXT, _FIELD, _SPIN, _COND = range(4)
+
+
+class TemplateError(Exception):
+    """Error de sintaxis en el mensaje (llave sin cerrar, condicional mal cerrado, etc.)."""
+
+
+class MessageTemplate:
+    """
+    Mensaje compilado una sola vez por campaña.
+
+    Sintaxis:
+        {columna}              valor de la columna del Excel ({nombre} y {numero} siempre existen)
+        {columna:por defecto}  valor o texto por defecto si está vacío
+        {Hola|Buenas|Qué tal}  spintax: una variante por contacto (puede anidar campos)
+        {?columna}...{/columna}  solo si la columna tiene valor ({!columna} = solo si está vacía)
+        \\{  \\}  \\|           caracteres literales
+    """
+
+    def __init__(self, text):
+        self.source = text
+        self.nodes, end = _parse(text, 0)
+        if end != len(text):
+            raise TemplateError(f"Cierre inesperado en la posición {end + 1}.")
+        self.fields = set()
+        _collect_fields(self.nodes, self.fields)
+
+    def unknown_fields(self, columns):
+        """Campos usados en el mensaje que no existen entre las columnas dadas (ni los incorporados)."""
+        known = {field_key(c) for c in columns} | set(BUILTIN_FIELDS)
+        return sorted(self.fields - known)
+
+    def render(self, values, seed=0):
+        """values: dict con claves normalizadas (field_key). seed fija la variante de spintax."""
+        return _render(self.nodes, values, random.Random(seed))
+
+    def render_all(self, rows):
+        """
+        Renderiza en bloque. rows: lista de dicts con claves normalizadas.
+        La variante de spintax depende del número: el mismo contacto recibe siempre el mismo texto.
+        """
+        out = []
+        for values in rows:
+            seed = zlib.crc32(values.get("numero", "").encode("utf-8"))
+            out.append(_render(self.nodes, values, random.Random(seed)))
+        return out
+
+
+def contact_values(number, name, data=None):
+    """Arma el dict de valores de un contacto para render/render_all."""
+    values = dict(data) if data else {}
+    values["nombre"] = name
+    values["numero"] = number
+    return values
+
+
+# --- Parser ---
+def _parse(text, i, in_group=False, in_cond=False):
+    """Lee nodos desde i hasta fin de texto, '|' o '}' (dentro de grupo) o '{/' (dentro de condicional)."""
+    nodes = []
+    buf = []
+
+    def flush():
+        if buf:
+            nodes.append((_TEXT, "".join(buf)))
+            buf.clear()
+
+    while i < len(text):
+        ch = text[i]
+        if ch == "\\" and i + 1 < len(text):
+            buf.append(text[i + 1])
+            i += 2
+            continue
+        if text.startswith("{/", i):
+            if in_cond:
+                break
+            raise TemplateError(f"Cierre de condicional sin apertura en la posición {i + 1}.")
+        if ch == "{":
+            flush()
+            node, i = _parse_brace(text, i + 1)
+            nodes.append(node)
+            continue
+        if in_group and ch in "|}":
+            break
+        buf.append(ch)
+        i += 1
+    flush()
+    return nodes, i
+
+
+def _parse_brace(text, i):
+    start = i - 1
+
+    # Condicional: {?campo}...{/campo} o {!campo}...{/campo}
+    if i < len(text) and text[i] in "?!":
+        negate = text[i] == "!"
+        close = text.find("}", i)
+        if close == -1:
+            raise TemplateError(f"Falta '}}' en la posición {start + 1}.")
+        name = text[i + 1:close].strip()
+        body, j = _parse(text, close + 1, in_cond=True)
+        if not text.startswith("{/", j):
+            raise TemplateError(f"Falta {{/{name}}} para cerrar el condicional de la posición {start + 1}.")
+        end = text.find("}", j)
+        if end == -1:
+            raise TemplateError(f"Falta '}}' en el cierre del condicional de la posición {start + 1}.")
+        closing = text[j + 2:end].strip()
+        if closing and field_key(closing) != field_key(name):
+            raise TemplateError(f"Se esperaba {{/{name}}} pero se encontró {{/{closing}}}.")
+        return (_COND, field_key(name), negate, body), end + 1
+
+    # Grupo: {campo}, {campo:defecto} o spintax {a|b|c}
+    options = []
+    while True:
+        nodes, i = _parse(text, i, in_group=True)
+        options.append(nodes)
+        if i >= len(text):
+            raise TemplateError(f"Falta '}}' para la llave de la posición {start + 1}.")
+        i += 1
+        if text[i - 1] == "}":
+            break
+
+    if len(options) > 1:
+        return (_SPIN, options), i
+
+    nodes = options[0]
+    if any(n[0] != _TEXT for n in nodes):
+        raise TemplateError(f"Llaves anidadas sin '|' en la posición {start + 1}.")
+    raw = "".join(n[1] for n in nodes)
+    name, _, default = raw.partition(":")
+    if not name.strip():
+        raise TemplateError(f"Campo vacío en la posición {start + 1}.")
+    return (_FIELD, field_key(name), default), i
+
+
+def _collect_fields(nodes, out):
+    for node in nodes:
+        kind = node[0]
+        if kind == _FIELD:
+            out.add(node[1])
+        elif kind == _SPIN:
+            for option in node[1]:
+                _collect_fields(option, out)
+        elif kind == _COND:
+            out.add(node[1])
+            _collect_fields(node[3], out)
+
+
+# --- Render ---
+def _render(nodes, values, rnd):
+    parts = []
+    for node in nodes:
+        kind = node[0]
+        if kind == _TEXT:
+            parts.append(node[1])
+        elif kind == _FIELD:
+            parts.append(str(values.get(node[1], "")).strip() or node[2])
+        elif kind == _SPIN:
+            parts.append(_render(rnd.choice(node[1]), values, rnd))
+        else:
+            has_value = bool(str(values.get(node[1], "")).strip())
+            if has_value != node[2]:
+                parts.append(_render(node[3], values, rnd))
+    return "".join(parts)
@@ -1,10 +1,10 @@
 import time
 import os
-import sys
 import subprocess
 import platform
 import base64
-from datetime import datetime
+import threading
+import json
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
@@ -13,58 +13,214 @@ from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.common.action_chains import ActionChains
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, ElementClickInterceptedException
+from selenium.common.exceptions import TimeoutException, StaleElementReferenceException, NoSuchElementException, SessionNotCreatedException, WebDriverException
 from webdriver_manager.chrome import ChromeDriverManager
 import config
+from src.utils.logger import log
+from src.services.metrics import METRICS
+from src.services.send_errors import (SendError, InvalidNumberError, MalformedNumberError, ChatLoadError,
+                                      AttachmentError, ComposeError, BrowserError, UnconfirmedSendError)
 
-# --- CONFIGURACIÓN DE LOGS ---
-if getattr(sys, 'frozen', False):
-    ROOT_DIR = os.path.dirname(sys.executable)
-else:
-    ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# --- SELECTORES DE WHATSAPP WEB ---
+COMPOSE_CSS = "#main footer div[contenteditable='true']"
+# El editor de imagen vive fuera de #main
+MODAL_INPUT_XPATH = "//div[@contenteditable='true'][not(ancestor::div[@id='main'])]"
+INVALID_XPATH = "//div[contains(text(), 'inválido') or contains(text(), 'invalid')]"
+OUTGOING_CSS = "#main div.message-out"
+ATTACH_BUTTON_CSS = "span[data-icon='plus-rounded'], span[data-icon='plus'], span[data-icon='attach-menu-plus'], span[data-icon='clip']"
+FILE_INPUT_CSS = "input[type='file'][accept*='image']"
+NEW_CHAT_CSS = "span[data-icon='new-chat-outline'], span[data-icon='new-chat'], span[data-icon='chat']"
+CHAT_HEADER_CSS = "#main header"
 
-LOG_FILE = os.path.join(ROOT_DIR, "registro_bot.txt")
+# Busca en el panel de "nuevo chat" (fuera de la lista de chats) los resultados con el número completo.
+# Retorna la lista de filas (sin las anidadas dentro de otra coincidencia); más de una = resultado ambiguo
+FIND_CHAT_RESULT_JS = """
+const digits = arguments[0], found = [];
+for (const row of document.querySelectorAll("div[role='listitem'], div[role='row'], div[role='button']")) {
+  if (row.closest('#pane-side') || row.closest('#main')) continue;
+  if ((row.textContent || '').replace(/\\D/g, '').endsWith(digits)) found.push(row);
+}
+const rows = found.filter(r => !found.some(o => o !== r && o.contains(r)));
+return rows.length ? rows : null;
+"""
 
-def log(msg):
-    timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-    line = f"[{timestamp}] {msg}"
-    print(line)
+# Lista de chats en una pasada: por fila, dígitos del título y el tick del último mensaje (data-icon, aria-label)
+CHAT_LIST_RECEIPTS_JS = """
+const out = [];
+for (const row of document.querySelectorAll("#pane-side div[role='listitem'], #pane-side div[role='row']")) {
+  const title = row.querySelector("span[title]");
+  const icon = row.querySelector("span[data-icon^='status-'], span[data-icon^='msg-']");
+  if (!title || !icon) continue;
+  out.push([(title.getAttribute('title') || '').replace(/\\D/g, ''), icon.getAttribute('data-icon'),
+            (icon.getAttribute('aria-label') || '').toLowerCase()]);
+}
+return out;
+"""
+# Botón de enviar del editor de imagen (el del chat principal vive dentro de #main)
+MODAL_SEND_XPATH = "//span[@data-icon='send'][not(ancestor::div[@id='main'])]"
+
+# Inserta texto en un contenteditable desde la página (sin portapapeles del SO), con un solo método:
+# execCommand es síncrono y retorna si el editor aceptó la inserción
+INSERT_TEXT_JS = """
+const box = arguments[0], text = arguments[1];
+box.focus();
+return document.execCommand('insertText', false, text);
+"""
+
+# El portapapeles del SO es uno solo: con varias sesiones, copiar+pegar debe ser atómico (modo "clipboard")
+_clipboard_lock = threading.Lock()
+# Evita que varias sesiones descarguen el driver al mismo tiempo
+_driver_lock = threading.Lock()
+_driver_path = None
+
+# Archivo en el perfil de Chrome que indica que la cuenta ya se vinculó con QR alguna vez
+LINKED_MARKER = ".wsa_vinculado"
+
+def _resolve_driver(refresh=False):
+    """
+    Ruta del chromedriver. Se reutiliza la resuelta en esta ejecución o la guardada en disco
+    (config.DRIVER_CACHE) y solo se consulta a webdriver_manager si no hay caché, venció o refresh=True.
+    """
+    global _driver_path
+    with _driver_lock:
+        if not refresh:
+            if _driver_path and os.path.exists(_driver_path):
+                return _driver_path
+            try:
+                with open(config.DRIVER_CACHE, encoding="utf-8") as f:
+                    cached = json.load(f)
+                fresh = time.time() - cached['resolved_at'] < config.DRIVER_CACHE_DAYS * 86400
+                if fresh and os.path.exists(cached['path']):
+                    _driver_path = cached['path']
+                    return _driver_path
+            except Exception:
+                pass
+
+        _driver_path = ChromeDriverManager().install()
+        try:
+            with open(config.DRIVER_CACHE, "w", encoding="utf-8") as f:
+                json.dump({'path': _driver_path, 'resolved_at': time.time()}, f)
+        except OSError:
+            pass
+        return _driver_path
+
+def _is_stale(element):
     try:
-        with open(LOG_FILE, "a", encoding="utf-8") as f:
-            f.write(line + "\n")
-    except Exception:
-        pass
+        element.is_enabled()
+        return False
+    except StaleElementReferenceException:
+        return True
+
 
 class WhatsAppBot:
-    def __init__(self):
+    def __init__(self, user_data_dir=None, name="S1"):
         self.driver = None
         self.wait = None
         self.os_name = platform.system()
+        self.user_data_dir = user_data_dir or config.USER_DATA_DIR
+        self.name = name
+        self.started_at = None
+        self.logged_in = False
+        self.in_app_failures = 0 # Fallos seguidos de la navegación dentro de la app (ver config.CHAT_NAVIGATION)
+        self.in_app_paused_at = 0 # Cuándo se pasó a usar solo la carga por URL (se vuelve a probar tras IN_APP_RETRY_AFTER)
+        self.send_pressed = False # Ya se dio Enter/click en enviar en el envío en curso: un fallo desde ahí no se reintenta
 
     def start_browser(self):
-        log("Iniciando navegador...")
+        log(f"[{self.name}] Iniciando navegador...")
+        self.started_at = time.perf_counter()
+        headless = self._use_headless()
+        opts = self._build_options(headless)
+
+        driver_path = _resolve_driver()
+        t_driver = time.perf_counter()
+        try:
+            self.driver = webdriver.Chrome(service=Service(driver_path), options=opts)
+        except SessionNotCreatedException:
+            # El driver en caché no corresponde a la versión de Chrome instalada
+            log(f"[{self.name}] El driver en caché no sirve para este Chrome. Resolviendo de nuevo...")
+            driver_path = _resolve_driver(refresh=True)
+            self.driver = webdriver.Chrome(service=Service(driver_path), options=opts)
+        t_chrome = time.perf_counter()
+
+        if headless:
+            # WhatsApp Web rechaza el user-agent "HeadlessChrome"
+            ua = self.driver.execute_script("return navigator.userAgent")
+            self.driver.execute_cdp_cmd("Network.setUserAgentOverride", {'userAgent': ua.replace("HeadlessChrome", "Chrome")})
+
+        self.wait = WebDriverWait(self.driver, config.WAIT_TIMEOUT)
+        self.driver.get(config.WHATSAPP_URL)
+        t_page = time.perf_counter()
+
+        total = t_page - self.started_at
+        METRICS.observe("browser_start", total)
+        log(f"[{self.name}] Navegador abierto en {total:.1f}s (driver {t_driver - self.started_at:.1f}s, "
+            f"Chrome {t_chrome - t_driver:.1f}s, página {t_page - t_chrome:.1f}s){' [headless]' if headless else ''}.",
+            session=self.name, step="browser_start", duration=round(total, 3))
+
+    def _use_headless(self):
+        """config.HEADLESS: True/False, o "auto" = headless solo si este perfil ya se vinculó antes."""
+        if config.HEADLESS == "auto":
+            headless = os.path.exists(os.path.join(self.user_data_dir, LINKED_MARKER))
+        else:
+            headless = bool(config.HEADLESS)
+        if headless and config.DELIVERY_MODE != "dom":
+            log(f"[{self.name}] Headless requiere DELIVERY_MODE = 'dom'; se abre con ventana.")
+            return False
+        return headless
+
+    def _build_options(self, headless):
         opts = Options()
-        opts.add_argument("--start-maximized")
         opts.add_argument("--disable-infobars")
-        opts.add_argument(f"user-data-dir={config.USER_DATA_DIR}")
+        opts.add_argument(f"user-data-dir={self.user_data_dir}")
         opts.add_argument("--disable-gpu")
         opts.add_argument("--ignore-certificate-errors")
-        
-        opts.add_experimental_option("prefs", {
+        if headless:
+            opts.add_argument("--headless=new")
+            opts.add_argument("--window-size=1280,900")
+        else:
+            opts.add_argument("--start-maximized")
+
+        prefs = {
             "profile.default_content_setting_values.clipboard": 1
-        })
+        }
 
-        service = Service(ChromeDriverManager().install())
-        self.driver = webdriver.Chrome(service=service, options=opts)
-        self.wait = WebDriverWait(self.driver, config.WAIT_TIMEOUT)
-        self.driver.get("https://web.whatsapp.com")
-        log("Navegador abierto.")
+        if config.LEAN_BROWSER:
+            # Menos trabajo de fondo y de render: sin extensiones, sync, traducción ni animaciones
+            for flag in ("--disable-extensions", "--no-first-run", "--no-default-browser-check",
+                         "--disable-background-networking", "--disable-sync", "--disable-default-apps",
+                         "--disable-component-update", "--mute-audio", "--force-prefers-reduced-motion",
+                         "--disable-features=Translate,MediaRouter,OptimizationHints"):
+                opts.add_argument(flag)
+            prefs["profile.default_content_setting_values.notifications"] = 2
+            if config.BLOCK_IMAGES:
+                prefs["profile.managed_default_content_settings.images"] = 2
+            # No esperar subrecursos: los pasos del envío ya esperan sus propios elementos
+            opts.page_load_strategy = "eager"
+
+        opts.add_experimental_option("prefs", prefs)
+        return opts
 
     def is_logged_in(self):
         try:
-            return len(self.driver.find_elements(By.ID, "pane-side")) > 0
+            logged = len(self.driver.find_elements(By.ID, "pane-side")) > 0
         except:
             return False
+        if logged and not self.logged_in:
+            self.logged_in = True
+            self._on_first_login()
+        return logged
+
+    def _on_first_login(self):
+        if self.started_at is not None:
+            elapsed = time.perf_counter() - self.started_at
+            METRICS.observe("time_to_login", elapsed)
+            log(f"[{self.name}] Sesión iniciada {elapsed:.1f}s después de abrir el navegador.",
+                session=self.name, step="time_to_login", duration=round(elapsed, 3))
+        # Marca el perfil como vinculado para poder abrirlo en headless la próxima vez
+        try:
+            open(os.path.join(self.user_data_dir, LINKED_MARKER), "w").close()
+        except OSError:
+            pass
 
     def get_qr_screenshot(self, save_path="temp_qr.png"):
         try:
@@ -81,41 +237,160 @@ class WhatsAppBot:
         except: pass
 
     def send_message(self, phone, message, image_path=None):
-        log(f"--- Iniciando envío a {phone} ---")
+        """
+        Envía y confirma con la burbuja saliente: si retorna, el mensaje salió.
+        Cualquier fallo se lanza como SendError con su categoría (ver send_errors).
+        """
+        log(f"--- [{self.name}] Iniciando envío a {phone} ---", contact=phone, session=self.name)
+        t_start = time.perf_counter()
+        self.send_pressed = False
+        stage = ChatLoadError
+        try:
+            self._open_chat(phone)
+            stage = AttachmentError if image_path and os.path.exists(image_path) else ComposeError
+
+            outgoing_before = self.driver.find_elements(By.CSS_SELECTOR, OUTGOING_CSS)
+            last_before = outgoing_before[-1] if outgoing_before else None
+
+            if image_path and os.path.exists(image_path):
+                self._send_attachment(image_path, message)
+            elif message:
+                self._send_text_only(message)
+
+            # Esperar a que se dibuje la burbuja saliente (más burbujas, o la última es otra si el chat recorta el historial)
+            def bubble_sent(d):
+                out = d.find_elements(By.CSS_SELECTOR, OUTGOING_CSS)
+                return len(out) > len(outgoing_before) or bool(out) and out[-1] != last_before
+            with METRICS.step("bubble_wait"):
+                bubble = self._pause(1, bubble_sent)
+            if not bubble:
+                log("No se detectó la burbuja del mensaje saliente.")
+                raise UnconfirmedSendError("No se detectó la burbuja del mensaje saliente")
+        except SendError:
+            raise
+        except WebDriverException as e:
+            # Después de enviar, cualquier fallo deja el mensaje en duda (reintentar podría duplicarlo)
+            if self.send_pressed:
+                raise UnconfirmedSendError(f"Fallo tras enviar: {e.msg or type(e).__name__}") from e
+            if isinstance(e, TimeoutException):
+                raise stage(f"Timeout: {e.msg}") from e # Categoría del paso que no terminó a tiempo
+            raise BrowserError(e.msg or type(e).__name__) from e
+
+        duration = time.perf_counter() - t_start
+        METRICS.observe("send_total", duration)
+        log("--- Envío finalizado ---", contact=phone, session=self.name, step="send_total", duration=round(duration, 3))
+
+    def check_number(self, phone):
+        """Verificación previa: abre el chat sin enviar nada. Retorna True si el número tiene WhatsApp."""
+        try:
+            self._open_chat(phone)
+            return True
+        except (InvalidNumberError, MalformedNumberError):
+            return False
+
+    def _open_chat(self, phone):
+        """Abre el chat de `phone` y espera la caja de texto. Lanza InvalidNumberError si no tiene WhatsApp."""
         clean_n = phone.replace("+", "").replace(" ", "").strip()
         if not clean_n.isdigit():
-            raise Exception("Número mal formado")
+            raise MalformedNumberError("Número mal formado")
 
-        url = f"https://web.whatsapp.com/send?phone={clean_n}"
-        self.driver.get(url)
+        url = f"{config.WHATSAPP_URL}/send?phone={clean_n}"
+        with METRICS.step("chat_load"):
+            tried_in_app = self._use_in_app_navigation()
+            if tried_in_app and self._open_chat_in_app(clean_n):
+                return # Si el buscador lo encontró, el número tiene WhatsApp: no hace falta buscar el popup
+            self.driver.get(url)
 
-        try:
-            self.wait.until(
-                lambda d: d.find_elements(By.ID, "main") or 
-                          d.find_elements(By.CSS_SELECTOR, "div[data-animate-modal-popup='true']")
-            )
-            log("Chat cargado.")
-        except TimeoutException:
-            log("Error: Timeout esperando carga del chat")
-            raise Exception("Timeout esperando carga del chat")
+            try:
+                self.wait.until(
+                    lambda d: d.find_elements(By.ID, "main") or 
+                              d.find_elements(By.CSS_SELECTOR, "div[data-animate-modal-popup='true']")
+                )
+                log("Chat cargado.")
+            except TimeoutException:
+                log("Error: Timeout esperando carga del chat")
+                raise ChatLoadError("Timeout esperando carga del chat")
 
-        time.sleep(1)
-        invalid = self.driver.find_elements(By.XPATH, "//div[contains(text(), 'inválido') or contains(text(), 'invalid')]")
+        # El popup de inválido aparece después de #main: esperar a la caja de texto o al popup
+        with METRICS.step("invalid_check"):
+            self._pause(1, lambda d: d.find_elements(By.CSS_SELECTOR, COMPOSE_CSS) or d.find_elements(By.XPATH, INVALID_XPATH))
+            invalid = self.driver.find_elements(By.XPATH, INVALID_XPATH)
         if invalid:
             log("Número inválido.")
             try: invalid[0].find_element(By.CSS_SELECTOR, "div[role='button']").click()
             except: pass
-            raise Exception("Número Inválido")
+            raise InvalidNumberError("Número Inválido")
+        if tried_in_app:
+            # El chat existe y el buscador no lo abrió: recién eso es un fallo de la navegación en la app
+            # (un número sin WhatsApp tampoco aparece en el buscador y no cuenta)
+            self.in_app_failures += 1
+            if self.in_app_failures == config.IN_APP_MAX_FAILURES:
+                self.in_app_paused_at = time.time()
+                log(f"[{self.name}] Demasiados fallos seguidos de la navegación en la app: "
+                    f"se usa la carga completa por {config.IN_APP_RETRY_AFTER}s.")
 
-        if image_path and os.path.exists(image_path):
-            self._send_attachment(image_path, message)
-        elif message:
-            self._send_text_only(message)
-        
-        log("--- Envío finalizado ---")
-        time.sleep(1)
+    def read_receipts(self):
+        """
+        Ticks del último mensaje de cada chat visible en la lista, en una sola llamada (no abre chats).
+        Retorna [(dígitos_del_título, data-icon, aria-label), ...]; la interpretación queda en ReceiptTracker.
+        """
+        return self.driver.execute_script(CHAT_LIST_RECEIPTS_JS) or []
+
+    def _use_in_app_navigation(self):
+        if config.CHAT_NAVIGATION != "in_app":
+            return False
+        if self.in_app_failures >= config.IN_APP_MAX_FAILURES:
+            if time.time() - self.in_app_paused_at < config.IN_APP_RETRY_AFTER:
+                return False
+            log(f"[{self.name}] Se vuelve a probar la navegación en la app.")
+            self.in_app_failures = 0
+        return True
+
+    def _open_chat_in_app(self, digits):
+        """
+        Abre el chat sin recargar la página: panel de nuevo chat -> buscar el número -> click en el resultado.
+        Retorna False (y deja la página lista para la carga completa) si algo no aparece a tiempo.
+        """
+        # Espera corta: si el buscador tarda, la carga por URL es más rápida que seguir esperando
+        step = WebDriverWait(self.driver, config.IN_APP_TIMEOUT, poll_frequency=config.POLL_INTERVAL)
+        try:
+            if not self.driver.find_elements(By.ID, "pane-side"):
+                return False # La app no está cargada (primera vez o tras un error): carga completa
+            previous = self.driver.find_elements(By.CSS_SELECTOR, COMPOSE_CSS)
+
+            self.driver.find_element(By.CSS_SELECTOR, NEW_CHAT_CSS).click()
+            search = step.until(lambda d: d.switch_to.active_element
+                                if d.switch_to.active_element.get_attribute("contenteditable") == "true" else None)
+            search.send_keys(digits)
+            results = step.until(lambda d: d.execute_script(FIND_CHAT_RESULT_JS, digits))
+            if len(results) > 1:
+                raise Exception("Varios resultados con el mismo número") # Ambiguo: mejor la carga por URL
+            results[0].click()
+
+            # El chat nuevo: la caja de texto se volvió a crear o el encabezado muestra el número
+            def chat_switched(d):
+                if not d.find_elements(By.CSS_SELECTOR, COMPOSE_CSS):
+                    return False
+                if not previous or _is_stale(previous[0]):
+                    return True
+                headers = d.find_elements(By.CSS_SELECTOR, CHAT_HEADER_CSS)
+                return bool(headers) and "".join(filter(str.isdigit, headers[0].text)).endswith(digits)
+            step.until(chat_switched)
+        except Exception as e:
+            log(f"[{self.name}] Navegación en la app falló ({type(e).__name__}). Cargando el chat por URL...")
+            try: ActionChains(self.driver).send_keys(Keys.ESCAPE).perform()
+            except Exception: pass
+            return False
+
+        self.in_app_failures = 0
+        log("Chat abierto dentro de la app.")
+        return True
 
     def _copy_image_to_clipboard(self, image_path):
+        with METRICS.step("clipboard_copy"):
+            self._copy_image_to_clipboard_os(image_path)
+
+    def _copy_image_to_clipboard_os(self, image_path):
         abs_path = os.path.abspath(image_path)
         log(f"Copiando imagen: {abs_path}")
         if self.os_name == 'Windows':
@@ -129,6 +404,10 @@ class WhatsAppBot:
             subprocess.run(["xclip", "-selection", "clipboard", "-t", mime, "-i", abs_path], check=True)
 
     def _copy_text_to_clipboard(self, text):
+        with METRICS.step("clipboard_copy"):
+            self._copy_text_to_clipboard_os(text)
+
+    def _copy_text_to_clipboard_os(self, text):
         log("Copiando texto...")
         if self.os_name == 'Windows':
             text_b64 = base64.b64encode(text.encode('utf-16le')).decode()
@@ -142,27 +421,14 @@ class WhatsAppBot:
             p.communicate(input=text.encode('utf-8'))
 
     def _send_attachment(self, path, caption):
-        """Flujo estricto: Pegar Imagen -> VALIDAR MODAL -> Pegar Texto -> Enter"""
-        modifier = Keys.COMMAND if self.os_name == 'Darwin' else Keys.CONTROL
-        
-        # 1. PEGAR IMAGEN
+        """Flujo estricto: Cargar Imagen -> VALIDAR MODAL -> Escribir Texto -> Enter"""
+        # 1. CARGAR IMAGEN
         try:
-            self._copy_image_to_clipboard(path)
-            time.sleep(1.0)
-            
-            # Click en chat principal
-            log("Enfocando chat principal...")
-            main_chat_box = self.wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, "#main footer div[contenteditable='true']")))
-            main_chat_box.click()
-            time.sleep(0.5)
-            
-            log("Pegando imagen (Ctrl+V)...")
-            actions = ActionChains(self.driver)
-            actions.key_down(modifier).send_keys('v').key_up(modifier).perform()
-            
+            with METRICS.step("image_load"):
+                self._put_image(path)
         except Exception as e:
             log(f"Error pegando imagen: {e}")
-            raise Exception(f"Fallo imagen: {e}")
+            raise AttachmentError(f"Fallo imagen: {e}")
 
         # 2. ESPERAR AL EDITOR (CRÍTICO)
         # Esperamos a que aparezca un input de texto que NO sea el del chat principal.
@@ -172,30 +438,27 @@ class WhatsAppBot:
         try:
             # Buscamos un contenteditable que NO tenga ancestro 'main'
             # Ojo: El editor de imagen vive fuera de #main
-            WebDriverWait(self.driver, 10).until(
-                EC.presence_of_element_located((By.XPATH, "//div[@contenteditable='true'][not(ancestor::div[@id='main'])]"))
-            )
+            with METRICS.step("modal_wait"):
+                WebDriverWait(self.driver, 10, poll_frequency=config.POLL_INTERVAL).until(
+                    EC.presence_of_element_located((By.XPATH, MODAL_INPUT_XPATH))
+                )
             log("¡Editor de imagen detectado!")
             modal_opened = True
         except TimeoutException:
             log("ALERTA: No se detectó el editor de imagen en 10s. Posiblemente la imagen no se pegó.")
             # Si no abre el modal, no intentamos pegar el texto para evitar enviarlo al chat equivocado
-            raise Exception("La imagen no cargó el editor. Abortando envío de texto.")
+            raise AttachmentError("La imagen no cargó el editor. Abortando envío de texto.")
 
-        # 3. PEGAR TEXTO (Solo si el modal abrió)
+        # 3. ESCRIBIR TEXTO (Solo si el modal abrió)
         if caption and modal_opened:
             try:
-                log("Copiando caption al portapapeles...")
-                self._copy_text_to_clipboard(caption)
-                time.sleep(1.0) # Tiempo para que el SO cambie el portapapeles
-                
                 # Buscar el input DEL MODAL (Excluyendo el del chat principal)
-                caption_box = self.driver.find_element(By.XPATH, "//div[@contenteditable='true'][not(ancestor::div[@id='main'])]")
+                caption_box = self.driver.find_element(By.XPATH, MODAL_INPUT_XPATH)
                 
                 if caption_box:
                     log("Enfocando input del caption...")
                     caption_box.click()
-                    time.sleep(0.5)
+                    self._pause(0.5, lambda d: d.switch_to.active_element == caption_box)
                     
                     # Verificamos foco activo por si acaso
                     active_elem = self.driver.switch_to.active_element
@@ -203,57 +466,166 @@ class WhatsAppBot:
                         log("El foco no estaba en el caption, forzando con JS...")
                         self.driver.execute_script("arguments[0].focus();", caption_box)
                     
-                    log("Pegando texto en la descripción...")
-                    actions = ActionChains(self.driver)
-                    actions.key_down(modifier).send_keys('v').key_up(modifier).perform()
-                    time.sleep(1.0) 
-                    
-                    log("Enviando ENTER...")
-                    actions.send_keys(Keys.ENTER).perform()
+                    log("Escribiendo texto en la descripción...")
+                    with METRICS.step("caption_fill"):
+                        self._put_text(caption_box, caption, pauses=(1.0, 1.0))
                 else:
                     log("No se encontró el input del caption en el modal.")
+                    raise AttachmentError("No se encontró la descripción en el editor")
 
             except Exception as e:
                 log(f"Error pegando texto: {e}")
+                # Cerrar el editor para no dejar la imagen a medio enviar en el chat
+                try: ActionChains(self.driver).send_keys(Keys.ESCAPE).perform()
+                except Exception: pass
+                raise AttachmentError(f"Fallo descripción: {e}")
+
+            log("Enviando ENTER...")
+            with METRICS.step("send_click"):
+                self.send_pressed = True
+                ActionChains(self.driver).send_keys(Keys.ENTER).perform()
 
         elif not caption and modal_opened:
             # Solo imagen, dar enter
             log("Sin caption. Enviando imagen...")
+            self.send_pressed = True
             ActionChains(self.driver).send_keys(Keys.ENTER).perform()
 
         # 4. VALIDAR ENVÍO
-        time.sleep(2)
-        # Si el editor sigue abierto (botón send visible), hacemos click
-        try:
-            send_btn = self.driver.find_elements(By.CSS_SELECTOR, "span[data-icon='send']")
-            # Filtramos los visibles
-            visible_btns = [btn for btn in send_btn if btn.is_displayed()]
-            if visible_btns:
+        # Esperar a que el editor se cierre; si sigue abierto, click en SU botón de enviar (no en el del chat)
+        with METRICS.step("send_confirm"):
+            editor_closed = lambda d: not d.find_elements(By.XPATH, MODAL_INPUT_XPATH)
+            self._pause(2, editor_closed)
+            if not editor_closed(self.driver):
+                # Ya se dio Enter: desde acá un fallo no se reintenta (la imagen pudo haber salido)
+                buttons = [b for b in self.driver.find_elements(By.XPATH, MODAL_SEND_XPATH) if b.is_displayed()]
+                if not buttons:
+                    raise UnconfirmedSendError("El editor de imagen no se cerró y no tiene botón de enviar")
                 log("El mensaje no se fue con Enter. Haciendo click en botón enviar...")
-                visible_btns[-1].click()
-        except: pass
+                buttons[-1].click()
+                self._pause(2, editor_closed)
+                if not editor_closed(self.driver):
+                    raise UnconfirmedSendError("El editor de imagen no se cerró tras enviar")
 
         log("Proceso de adjunto finalizado.")
 
     def _send_text_only(self, message):
         try:
-            box = self.wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, "#main footer div[contenteditable='true']")))
+            box = self.wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, COMPOSE_CSS)))
             box.click()
             box.send_keys(Keys.CONTROL + "a")
             box.send_keys(Keys.BACKSPACE)
             
-            self._copy_text_to_clipboard(message)
-            modifier = Keys.COMMAND if self.os_name == 'Darwin' else Keys.CONTROL
-            
-            actions = ActionChains(self.driver)
-            actions.key_down(modifier).send_keys('v').key_up(modifier).perform()
-            time.sleep(0.5)
-            actions.send_keys(Keys.ENTER).perform()
+            with METRICS.step("text_fill"):
+                self._put_text(box, message, pauses=(0, 0.5))
+            with METRICS.step("send_click"):
+                self.send_pressed = True
+                ActionChains(self.driver).send_keys(Keys.ENTER).perform()
             log("Texto enviado.")
         except Exception as e:
             log(f"Error texto: {e}")
+            if self.send_pressed:
+                raise UnconfirmedSendError(f"Fallo tras enviar el texto: {e}")
+            raise ComposeError(f"Fallo texto: {e}")
+
+    # --- Entrega de contenido (config.DELIVERY_MODE) ---
+    def _put_text(self, box, text, pauses=(0, 0.5)):
+        """
+        Escribe `text` en la caja editable `box`.
+        Modo "dom": lo inserta desde la página, sin portapapeles ni procesos externos.
+        Modo "clipboard" (o si la inserción no tuvo efecto): copiar al portapapeles del SO y Ctrl+V.
+        pauses = (tras copiar, tras pegar) en segundos para el modo conservador.
+        """
+        if config.DELIVERY_MODE == "dom":
+            inserted = self.driver.execute_script(INSERT_TEXT_JS, box, text)
+            if inserted and self._pause(pauses[1], lambda d: box.text.strip()):
+                return
+            log("La inserción desde la página no tuvo efecto. Usando portapapeles...")
+            if inserted:
+                # El editor aceptó la inserción pero no la muestra: vaciar la caja para no pegar el texto dos veces
+                modifier = Keys.COMMAND if self.os_name == 'Darwin' else Keys.CONTROL
+                ActionChains(self.driver).key_down(modifier).send_keys('a').key_up(modifier).send_keys(Keys.DELETE).perform()
+
+        modifier = Keys.COMMAND if self.os_name == 'Darwin' else Keys.CONTROL
+        with _clipboard_lock:
+            self._copy_text_to_clipboard(text)
+            self._pause(pauses[0]) # La copia es síncrona: solo el modo conservador espera
+            
+            log("Pegando texto (Ctrl+V)...")
+            ActionChains(self.driver).key_down(modifier).send_keys('v').key_up(modifier).perform()
+            # No soltar el portapapeles hasta que el texto quede escrito
+            self._pause(pauses[1], lambda d: box.text.strip())
+
+    def _put_image(self, path):
+        """
+        Abre el editor de imagen del chat actual con el archivo `path`.
+        Modo "dom": sube el archivo por el input de adjuntos. Modo "clipboard" (o si el editor no abrió
+        tras adjuntar): copiar imagen y Ctrl+V.
+        """
+        if config.DELIVERY_MODE == "dom":
+            try:
+                self._attach_file(path)
+                if self._pause(0, EC.presence_of_element_located((By.XPATH, MODAL_INPUT_XPATH))):
+                    return
+                log("El editor de imagen no abrió tras adjuntar. Usando portapapeles...")
+            except Exception as e:
+                log(f"No se pudo adjuntar por el input de archivos ({e}). Usando portapapeles...")
+            # Cerrar el menú de adjuntos si quedó abierto
+            try: ActionChains(self.driver).send_keys(Keys.ESCAPE).perform()
+            except Exception: pass
+
+        modifier = Keys.COMMAND if self.os_name == 'Darwin' else Keys.CONTROL
+        # Click en chat principal (antes de tomar el portapapeles)
+        log("Enfocando chat principal...")
+        main_chat_box = self.wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, COMPOSE_CSS)))
+        main_chat_box.click()
+        self._pause(0.5, lambda d: d.switch_to.active_element == main_chat_box)
+        
+        with _clipboard_lock:
+            self._copy_image_to_clipboard(path)
+            self._pause(1.0) # La copia es síncrona: solo el modo conservador espera
+            
+            log("Pegando imagen (Ctrl+V)...")
+            ActionChains(self.driver).key_down(modifier).send_keys('v').key_up(modifier).perform()
+            # No soltar el portapapeles hasta que la página lo haya leído (se abre el editor)
+            self._pause(0, EC.presence_of_element_located((By.XPATH, MODAL_INPUT_XPATH)), timeout=10)
+
+    def _attach_file(self, path):
+        log("Adjuntando imagen por el input de archivos...")
+        inputs = self.driver.find_elements(By.CSS_SELECTOR, FILE_INPUT_CSS)
+        if not inputs:
+            # El input solo existe después de abrir el menú de adjuntos
+            self.wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, ATTACH_BUTTON_CSS))).click()
+            inputs = WebDriverWait(self.driver, config.STEP_TIMEOUT, poll_frequency=config.POLL_INTERVAL).until(
+                lambda d: d.find_elements(By.CSS_SELECTOR, FILE_INPUT_CSS)
+            )
+        inputs[0].send_keys(os.path.abspath(path))
+
+    def _pause(self, seconds, condition=None, timeout=None):
+        """
+        Espera entre pasos del envío.
+        Modo conservador (config.CONSERVATIVE_TIMINGS): sleep fijo de `seconds`, como antes, y luego se mira
+        la condición una vez. Modo normal: espera la condición del DOM con polling corto (sin condición no espera).
+        Retorna False si la condición no se cumplió a tiempo.
+        """
+        if config.CONSERVATIVE_TIMINGS:
+            time.sleep(seconds)
+            if condition is None:
+                return True
+            try:
+                return bool(condition(self.driver))
+            except (StaleElementReferenceException, NoSuchElementException):
+                return False
+        if condition is None:
+            return True
+        try:
+            WebDriverWait(self.driver, timeout or config.STEP_TIMEOUT, poll_frequency=config.POLL_INTERVAL,
+                          ignored_exceptions=(StaleElementReferenceException,)).until(condition)
+            return True
+        except TimeoutException:
+            return False
 
     def close(self):
-        log("Cerrando.")
+        log(f"[{self.name}] Cerrando.")
         if self.driver:
             self.driver.quit()
\ No newline at end of file
@@ -0,0 +1,172 @@
+import customtkinter as ctk
+
+# Altura fija de cada fila (px). La virtualización depende de que sea constante.
+ROW_HEIGHT = 36
+
+# Color del label de estado según su texto
+STATUS_COLORS = {
+    "Enviando...": "orange",
+    "Enviado ✅": "green",
+    "Entregado ✔✔": "green",
+    "Error ❌": "red",
+    "¿Enviado? ⚠": "orange",
+    "Inválido ⛔": "red",
+    "Verificado ✔": "green",
+    "Reintento ↻": "orange",
+}
+
+
+class ContactTable(ctk.CTkFrame):
+    """
+    Vista virtualizada de un ContactStore.
+    Solo construye widgets para las filas visibles y los reutiliza al hacer scroll:
+    el costo de importar o desplazarse no crece con la cantidad de contactos.
+    """
+
+    def __init__(self, master, model, on_delete=None, **kwargs):
+        kwargs.setdefault("fg_color", "#fdfdfd")
+        super().__init__(master, **kwargs)
+        self.model = model
+        self.on_delete = on_delete  # Callback opcional tras borrar una fila
+        self.first = 0              # Índice del modelo mostrado en la primera fila
+        self.slots = []             # Pool de filas reutilizables
+        self._refresh_pending = False
+
+        self.grid_columnconfigure(0, weight=1)
+        self.grid_rowconfigure(0, weight=1)
+
+        self.body = ctk.CTkFrame(self, fg_color="transparent")
+        self.body.grid(row=0, column=0, sticky="nsew")
+        self.body.bind("<Configure>", self._on_resize)
+        self._bind_wheel(self.body)
+
+        self.scrollbar = ctk.CTkScrollbar(self, command=self.yview)
+        self.scrollbar.grid(row=0, column=1, sticky="ns")
+
+    # --- Pool de filas ---
+    def _build_slot(self):
+        slot = {'uid': None, 'shown': None}
+
+        row = ctk.CTkFrame(self.body, fg_color="white", height=ROW_HEIGHT - 2)
+        ent_num = ctk.CTkEntry(row, border_width=1, fg_color="#f1f3f4", placeholder_text="Ej: 51999...")
+        ent_num.pack(side="left", fill="x", expand=True, padx=2)
+        ent_name = ctk.CTkEntry(row, border_width=1, fg_color="#fff", placeholder_text="Nombre...")
+        ent_name.pack(side="left", fill="x", expand=True, padx=2)
+        lbl_stat = ctk.CTkLabel(row, text="", width=100)
+        lbl_stat.pack(side="left", padx=2)
+        btn_del = ctk.CTkButton(row, text="✖", width=30, fg_color="#ff4444",
+                                command=lambda: self._delete_slot(slot))
+        btn_del.pack(side="left", padx=5)
+
+        # Las ediciones se escriben directo al modelo
+        ent_num.bind("<KeyRelease>", lambda e: self._write_back(slot, 'numero', ent_num))
+        ent_name.bind("<KeyRelease>", lambda e: self._write_back(slot, 'nombre', ent_name))
+
+        for w in (row, ent_num, ent_name, lbl_stat):
+            self._bind_wheel(w)
+
+        slot.update({'row': row, 'entry_num': ent_num, 'entry_name': ent_name, 'lbl_stat': lbl_stat,
+                     'default_color': lbl_stat.cget("text_color")})
+        return slot
+
+    def _on_resize(self, event):
+        needed = max(1, event.height // ROW_HEIGHT + 1)
+        while len(self.slots) < needed:
+            self.slots.append(self._build_slot())
+        self.refresh()
+
+    def visible_count(self):
+        return max(1, self.body.winfo_height() // ROW_HEIGHT)
+
+    # --- Render ---
+    def schedule_refresh(self):
+        """Agrupa varias actualizaciones en un solo redibujado."""
+        if not self._refresh_pending:
+            self._refresh_pending = True
+            self.after_idle(self.refresh)
+
+    def refresh(self):
+        self._refresh_pending = False
+        total = len(self.model)
+        visible = self.visible_count()
+        self.first = max(0, min(self.first, total - visible))
+
+        for i, slot in enumerate(self.slots):
+            idx = self.first + i
+            if idx >= total:
+                slot['uid'] = None
+                slot['shown'] = None
+                slot['row'].place_forget()
+                continue
+            self._bind_slot(slot, self.model.row_at(idx))
+            slot['row'].place(x=0, y=i * ROW_HEIGHT, relwidth=1.0, height=ROW_HEIGHT - 2)
+
+        if total <= visible:
+            self.scrollbar.set(0.0, 1.0)
+        else:
+            self.scrollbar.set(self.first / total, (self.first + visible) / total)
+
+    def _bind_slot(self, slot, data):
+        shown = (data['id'], data['numero'], data['nombre'], data['estado'])
+        if slot['shown'] == shown:
+            return
+        slot['uid'] = data['id']
+
+        # Evita pisar lo que el usuario está escribiendo en la fila enfocada
+        same_row = slot['shown'] is not None and slot['shown'][0] == data['id']
+        focused = str(self.focus_get() or "")
+        for key, field in (('entry_num', 'numero'), ('entry_name', 'nombre')):
+            entry = slot[key]
+            if same_row and focused.startswith(str(entry)):
+                continue
+            entry.delete(0, "end")
+            if data[field]:
+                entry.insert(0, data[field])
+
+        status = data['estado']
+        slot['lbl_stat'].configure(text=status, text_color=STATUS_COLORS.get(status, slot['default_color']))
+        slot['shown'] = shown
+
+    # --- Scroll ---
+    def yview(self, *args):
+        total = len(self.model)
+        visible = self.visible_count()
+        if not args or total <= visible:
+            return
+        if args[0] == "moveto":
+            self.first = int(float(args[1]) * total)
+        elif args[0] == "scroll":
+            step = int(args[1])
+            if len(args) > 2 and args[2] == "pages":
+                step *= visible
+            self.first += step
+        self.refresh()
+
+    def _bind_wheel(self, widget):
+        widget.bind("<MouseWheel>", self._on_wheel)
+        widget.bind("<Button-4>", lambda e: self.yview("scroll", -3, "units"))
+        widget.bind("<Button-5>", lambda e: self.yview("scroll", 3, "units"))
+
+    def _on_wheel(self, event):
+        # Windows entrega múltiplos de 120, macOS valores pequeños
+        delta = event.delta // 120 if abs(event.delta) >= 120 else event.delta
+        self.yview("scroll", -3 * delta, "units")
+
+    # --- Escritura al modelo ---
+    def _write_back(self, slot, field, entry):
+        if slot['uid'] is None:
+            return
+        value = entry.get()
+        self.model.update(slot['uid'], **{field: value})
+        row = self.model.get(slot['uid'])
+        if row is not None:
+            slot['shown'] = (row['id'], row['numero'], row['nombre'], row['estado'])
+
+    def _delete_slot(self, slot):
+        if slot['uid'] is None:
+            return
+        self.model.delete(slot['uid'])
+        slot['shown'] = None
+        self.refresh()
+        if self.on_delete:
+            self.on_delete()
@@ -1,26 +1,43 @@
+import os
 import threading
+import queue
 import time
+from collections import Counter
 import tkinter as tk
 from tkinter import filedialog, messagebox
 from PIL import Image, ImageTk
 import customtkinter as ctk
 
 import config
-from src.services.whatsapp_service import WhatsAppBot
+from src.utils.helpers import reason_summary
+from src.services.sender_pool import SenderPool
+from src.services.metrics import METRICS
+from src.services.campaign_store import PENDING, SENT, FAILED, UNCERTAIN
+from src.services.campaign_engine import CampaignEngine
+from src.services.contact_store import ContactStore
 from src.services.data_service import DataService
+from src.services.template_service import MessageTemplate, TemplateError
+from src.ui.contact_table import ContactTable
+from src.ui.ui_updates import UIUpdateQueue
 
 class MainWindow(ctk.CTk):
     def __init__(self):
         super().__init__()
         
         # --- Estado ---
-        self.bot = WhatsAppBot()
-        self.contacts_data = [] # Lista de dicts: {'id': int, 'widgets': dict, 'estado': str}
-        self.next_id = 0
+        self.pool = SenderPool() # Una sesión de WhatsApp por cuenta vinculada (config.SESSIONS)
+        self.contacts = ContactStore() # Contactos indexados por id y número; la tabla solo dibuja las filas visibles
         self.is_running = True
-        self.is_sending = False
         self.image_path = None
         self.syncing_text = False # Flag para evitar bucles de sincronización
+        self.ui = UIUpdateQueue(self) # Los hilos de trabajo actualizan la UI solo a través de esta cola
+        # Motor de campañas (compartido con la línea de comandos); avisa a la UI por la cola
+        self.engine = CampaignEngine(
+            self.pool, self.contacts,
+            on_status=lambda uid, status: self.ui.post("table", self.contact_table.refresh),
+            on_progress=lambda text: self.ui.post("btn_run", self.btn_run.configure, text=text),
+            on_session=lambda: self.ui.post("bot_status", self.update_bot_status),
+        )
 
         # --- Configuración Ventana ---
         self.title("WhatsApp Sender Pro - Modular")
@@ -36,8 +53,13 @@ class MainWindow(ctk.CTk):
         self._setup_sidebar()
         self._setup_main_area()
         
-        # Iniciar Hilo del Bot
+        # Retomar campaña interrumpida e iniciar Hilo del Bot
+        self.ui.start()
+        self.after(100, self.resume_campaign)
         self.after(200, self.start_bot_thread)
+        # Lectores de Excel en segundo plano, con la ventana ya visible (ver DataService)
+        self.after(1500, lambda: threading.Thread(target=DataService.preload, daemon=True).start())
+        self.after(1000, self.refresh_metrics)
 
     def _setup_layout(self):
         self.grid_columnconfigure(1, weight=1) 
@@ -50,27 +72,41 @@ class MainWindow(ctk.CTk):
         # Main Area
         self.main_frame = ctk.CTkFrame(self, fg_color="white")
         self.main_frame.grid(row=0, column=1, sticky="nsew")
-        self.main_frame.grid_rowconfigure(2, weight=1) # La tabla se expande
+        self.main_frame.grid_rowconfigure(3, weight=1) # La tabla se expande
         self.main_frame.grid_columnconfigure(0, weight=1)
 
     def _setup_sidebar(self):
         ctk.CTkLabel(self.sidebar, text="🤖 WA Sender", font=("Roboto", 24, "bold"), text_color="#333").pack(pady=20)
         
         # --- Botones Importar ---
-        self.btn_excel = ctk.CTkButton(self.sidebar, text="📂 Importar Excel", command=self.import_excel, fg_color=config.COLOR_PRIMARY)
+        self.btn_excel = ctk.CTkButton(self.sidebar, text="📂 Importar archivos", command=self.import_excel, fg_color=config.COLOR_PRIMARY)
         self.btn_excel.pack(pady=5, padx=10, fill="x")
+
+        self.btn_folder = ctk.CTkButton(self.sidebar, text="📁 Importar carpeta", command=self.import_folder, fg_color=config.COLOR_PRIMARY)
+        self.btn_folder.pack(pady=5, padx=10, fill="x")
         
         self.btn_pdf = ctk.CTkButton(self.sidebar, text="📄 Importar PDF", command=self.import_pdf, fg_color="#e37400")
         self.btn_pdf.pack(pady=5, padx=10, fill="x")
 
         self.btn_paste = ctk.CTkButton(self.sidebar, text="📋 Pegar del Portapapeles", command=self.paste_from_button, fg_color="#555")
         self.btn_paste.pack(pady=5, padx=10, fill="x")
+
+        self.btn_check = ctk.CTkButton(self.sidebar, text="🔎 Verificar números", command=self.toggle_precheck, fg_color="#555")
+        self.btn_check.pack(pady=5, padx=10, fill="x")
         
         self.lbl_count = ctk.CTkLabel(self.sidebar, text="Contactos: 0", text_color="gray")
         self.lbl_count.pack(pady=(10, 5))
 
+        # Progreso de importación (solo visible mientras hay una en curso)
+        self.import_frame = ctk.CTkFrame(self.sidebar, fg_color="transparent")
+        self.lbl_import = ctk.CTkLabel(self.import_frame, text="", text_color="#333", font=("Arial", 11))
+        self.lbl_import.pack(fill="x")
+        self.btn_cancel_import = ctk.CTkButton(self.import_frame, text="✖ Cancelar importación", fg_color="#ff4444", height=24, command=self.cancel_import)
+        self.btn_cancel_import.pack(fill="x")
+        self.import_cancel = None
+
         # --- Área de Mensaje (Editor) ---
-        ctk.CTkLabel(self.sidebar, text="Mensaje (usa {nombre}):", text_color="#333", anchor="w").pack(pady=(10,0), padx=10, fill="x")
+        ctk.CTkLabel(self.sidebar, text="Mensaje (usa {nombre} o {columna}):", text_color="#333", anchor="w").pack(pady=(10,0), padx=10, fill="x")
         
         self.txt_msg = ctk.CTkTextbox(self.sidebar, height=150, fg_color="white", border_color="#ccc", border_width=1)
         self.txt_msg.pack(padx=10, fill="x")
@@ -81,6 +117,9 @@ class MainWindow(ctk.CTk):
         self.btn_img.pack(pady=10, padx=10, fill="x")
         self.lbl_img = ctk.CTkLabel(self.sidebar, text="Sin imagen", text_color="gray", font=("Arial", 10))
         self.lbl_img.pack()
+        # Texto opcional estampado en la imagen de cada contacto (acepta la misma sintaxis que el mensaje)
+        self.entry_stamp = ctk.CTkEntry(self.sidebar, placeholder_text="Texto en la imagen (ej: {nombre})")
+        self.entry_stamp.pack(pady=(5, 0), padx=10, fill="x")
 
         # --- Botón Enviar ---
         self.btn_run = ctk.CTkButton(self.sidebar, text="⏳ Iniciando Motor...", state="disabled", command=self.start_sending, fg_color=config.COLOR_SUCCESS, height=50)
@@ -91,17 +130,30 @@ class MainWindow(ctk.CTk):
         self.top_frame = ctk.CTkFrame(self.main_frame, height=180, fg_color="#f8f9fa")
         self.top_frame.grid(row=0, column=0, sticky="ew", padx=10, pady=5)
         
-        self.qr_label = ctk.CTkLabel(self.top_frame, text="Cargando QR...", width=150, height=150, fg_color="#ddd", corner_radius=10)
-        self.qr_label.pack(side="left", padx=20, pady=10)
-        self.qr_label.bind("<Button-1>", lambda e: self.bot.reload_qr())
+        # Un QR por sesión
+        self.qr_size = 150 if len(self.pool.sessions) <= 2 else 110
+        self.qr_labels = []
+        for session in self.pool.sessions:
+            lbl = ctk.CTkLabel(self.top_frame, text=f"{session.name}\nCargando QR...", width=self.qr_size, height=self.qr_size, fg_color="#ddd", corner_radius=10)
+            lbl.pack(side="left", padx=(20, 0), pady=10)
+            lbl.bind("<Button-1>", lambda e, s=session: s.bot.reload_qr())
+            self.qr_labels.append(lbl)
 
         # Instrucciones
         info_frame = ctk.CTkFrame(self.top_frame, fg_color="transparent")
-        info_frame.pack(side="left", fill="y", pady=10)
+        info_frame.pack(side="left", fill="y", padx=20, pady=10)
         ctk.CTkLabel(info_frame, text="Estado del Bot:", font=("Arial", 14, "bold"), text_color="#333").pack(anchor="w")
         self.lbl_status_bot = ctk.CTkLabel(info_frame, text="Desconectado", text_color="red")
         self.lbl_status_bot.pack(anchor="w")
 
+        # Panel de métricas en vivo (contadores de la campaña y p50/p95 por paso)
+        metrics_frame = ctk.CTkFrame(self.top_frame, fg_color="transparent")
+        metrics_frame.pack(side="right", fill="y", padx=20, pady=10)
+        ctk.CTkLabel(metrics_frame, text="Rendimiento:", font=("Arial", 14, "bold"), text_color="#333").pack(anchor="w")
+        self.lbl_metrics = ctk.CTkLabel(metrics_frame, text="Sin envíos", text_color="gray", font=("Consolas", 11), justify="left")
+        self.lbl_metrics.pack(anchor="w")
+        self.last_metrics_export = 0
+
         # 2. Área Vista Previa (Editable y Sincronizada)
         self.preview_frame = ctk.CTkFrame(self.main_frame, fg_color="white", border_width=1, border_color="#eee")
         self.preview_frame.grid(row=1, column=0, sticky="ew", padx=20, pady=5)
@@ -122,110 +174,154 @@ class MainWindow(ctk.CTk):
             lbl = ctk.CTkLabel(self.table_header, text=text, text_color="white", font=("Arial", 12, "bold"))
             lbl.pack(side="left", fill="x", expand=True, padx=2)
 
-        self.scroll_table = ctk.CTkScrollableFrame(self.main_frame, fg_color="#fdfdfd")
-        self.scroll_table.grid(row=3, column=0, sticky="nsew", padx=20, pady=(0, 10))
+        self.contact_table = ContactTable(self.main_frame, self.contacts, on_delete=self.update_count)
+        self.contact_table.grid(row=3, column=0, sticky="nsew", padx=20, pady=(0, 10))
 
 
     # --- LÓGICA DE UI Y TABLA ---
     
-    def add_contact(self, number, name="", status="Pendiente"):
-        uid = self.next_id
-        self.next_id += 1
-        
-        row = ctk.CTkFrame(self.scroll_table, fg_color="white", height=40)
-        row.pack(fill="x", pady=1)
-        
-        # Input Número
-        ent_num = ctk.CTkEntry(row, border_width=1, fg_color="#f1f3f4", placeholder_text="Ej: 51999...")
-        ent_num.insert(0, str(number))
-        ent_num.pack(side="left", fill="x", expand=True, padx=2)
-        
-        # Input Nombre
-        ent_name = ctk.CTkEntry(row, border_width=1, fg_color="#fff", placeholder_text="Nombre...")
-        ent_name.insert(0, str(name))
-        ent_name.pack(side="left", fill="x", expand=True, padx=2)
-        
-        # Label Estado
-        lbl_stat = ctk.CTkLabel(row, text=status, width=100)
-        lbl_stat.pack(side="left", padx=2)
-        
-        # Botón Acción (Eliminar)
-        btn_del = ctk.CTkButton(row, text="✖", width=30, fg_color="#ff4444", 
-                                command=lambda: self.delete_row(uid, row))
-        btn_del.pack(side="left", padx=5)
-        
-        # Guardar Referencia
-        self.contacts_data.append({
-            'id': uid,
-            'widgets': {'row': row, 'entry_num': ent_num, 'entry_name': ent_name, 'lbl_stat': lbl_stat},
-            'estado': status
-        })
-        self.update_count()
-
-    def delete_row(self, uid, row_widget):
-        row_widget.destroy()
-        self.contacts_data = [c for c in self.contacts_data if c['id'] != uid]
+    def add_contacts(self, items):
+        """Agrega en bloque (import/pegado) y redibuja una sola vez."""
+        count = self.contacts.add_many(items)
+        self.contact_table.schedule_refresh()
         self.update_count()
+        return count
 
     def update_count(self):
-        self.lbl_count.configure(text=f"Contactos: {len(self.contacts_data)}")
+        self.lbl_count.configure(text=f"Contactos: {len(self.contacts)}")
 
     def handle_paste_event(self, event):
+        # Ctrl+V dentro del mensaje u otro campo de texto pega ahí, no importa contactos
+        if isinstance(self.focus_get(), (tk.Text, tk.Entry)): return
         self.paste_contacts()
 
     def paste_from_button(self):
         self.paste_contacts()
 
     def paste_contacts(self):
+        """Importa el texto del portapapeles en segundo plano (separador y columnas se detectan una vez)."""
         try:
             content = self.clipboard_get()
-            rows = content.strip().split('\n')
-            
-            count = 0
-            for row_str in rows:
-                if not row_str.strip(): continue
-                # Detectar separadores (Tab para Excel, Coma para CSV simple, o espacio)
-                if '\t' in row_str:
-                    parts = row_str.split('\t')
-                    num = parts[0]
-                    name = parts[1] if len(parts) > 1 else ""
-                elif ',' in row_str:
-                    parts = row_str.split(',')
-                    num = parts[0]
-                    name = parts[1] if len(parts) > 1 else ""
-                else:
-                    num = row_str
-                    name = ""
-                
-                # Limpiar
-                num = num.strip()
-                name = name.strip()
-                if num:
-                    self.add_contact(num, name)
-                    count += 1
-            
-            if count > 0:
-                messagebox.showinfo("Pegado", f"Se agregaron {count} contactos.")
-        except Exception as e:
-            pass # Clipboard vacío o error de formato
+        except tk.TclError:
+            return # Portapapeles vacío o sin texto
+        if content.strip():
+            self._start_import(lambda progress, cancel, report: DataService.iter_text(content, progress, cancel), "Pegado")
 
     def import_excel(self):
-        path = filedialog.askopenfilename(filetypes=[("Excel", "*.xlsx")])
+        """Uno o varios libros (todas sus hojas), ODS o CSV en una sola importación."""
+        paths = filedialog.askopenfilenames(filetypes=[
+            ("Listas de contactos", "*.xlsx *.xlsm *.xls *.ods *.csv *.tsv *.txt *.pdf"), ("Todos", "*.*")])
+        if paths:
+            self._import_sources(list(paths))
+
+    def import_folder(self):
+        """Todos los archivos soportados de una carpeta (y sus subcarpetas)."""
+        path = filedialog.askdirectory()
         if path:
-            data = DataService.load_excel(path) # Asumiendo que ahora devuelve tuplas o dicts si se mejora DataService
-            # Si DataService devuelve solo lista de nums, adaptamos:
-            for item in data:
-                if isinstance(item, tuple) or isinstance(item, list):
-                    self.add_contact(item[0], item[1] if len(item)>1 else "")
-                else:
-                    self.add_contact(item)
+            self._import_sources([path])
+
+    def _import_sources(self, paths):
+        self._start_import(lambda progress, cancel, report: DataService.iter_sources(paths, progress, cancel, report),
+                           "Importación")
 
     def import_pdf(self):
-        # Mantiene lógica simple original
         path = filedialog.askopenfilename(filetypes=[("PDF", "*.pdf")])
         if path:
-            nums = DataService.load_pdf(path)
-            for n in nums: self.add_contact(n)
+            self._start_import(lambda progress, cancel, report: DataService.iter_pdf(path, progress, cancel), "PDF")
+
+    def _start_import(self, make_chunks, label):
+        """
+        Consume un iterador de bloques de contactos en un hilo aparte.
+        make_chunks(progress, cancel, report) crea el iterador; progress(hechos, total) informa avance y
+        report(origen, filas, validos, rechazos, error="") cierra cada archivo/hoja (para el resumen por origen).
+        Los bloques se agregan a la tabla desde el hilo de Tk a medida que llegan.
+        """
+        if self.import_cancel is not None:
+            messagebox.showwarning(label, "Ya hay una importación en curso.")
+            return
+
+        q = queue.Queue()
+        cancel = threading.Event()
+        self.import_cancel = cancel
+
+        def progress(done, total):
+            q.put(("progress", f"{label}: {done}/{total}"))
+
+        def report(origin, rows, valid, rejected, error=""):
+            q.put(("source", (origin, rows, valid, rejected, error)))
+
+        def worker():
+            try:
+                for chunk in make_chunks(progress, cancel, report):
+                    q.put(("chunk", chunk))
+                    if cancel.is_set(): break
+                q.put(("done", None))
+            except Exception as e:
+                q.put(("error", e))
+
+        self.lbl_import.configure(text=f"Importando {label}...")
+        self.import_frame.pack(after=self.lbl_count, pady=(0, 5), padx=10, fill="x")
+        threading.Thread(target=worker, daemon=True).start()
+        self._poll_import(q, label, 0, 0, [], 0, Counter())
+
+    def _poll_import(self, q, label, total, received, sources, source_start, rejected):
+        try:
+            while True:
+                kind, payload = q.get_nowait()
+                if kind == "chunk":
+                    received += len(payload)
+                    total += self.add_contacts(payload)
+                elif kind == "progress":
+                    self.lbl_import.configure(text=payload)
+                elif kind == "source":
+                    # Los bloques de un origen llegan antes que su cierre: lo agregado desde el anterior es suyo
+                    origin, rows, valid, source_rejected, error = payload
+                    if error:
+                        sources.append((f"{origin}: no se pudo leer ({error})", True))
+                    else:
+                        sources.append((f"{origin}: {rows} filas, {valid} válidos, {total - source_start} nuevos", False))
+                    source_start = total
+                    rejected.update(source_rejected)
+                else:
+                    cancelled = self.import_cancel.is_set()
+                    self.import_cancel = None
+                    self.import_frame.pack_forget()
+                    extra = self._duplicates_note(received - total)
+                    detail = self._sources_note(sources) + self._rejected_note(rejected)
+                    if kind == "error":
+                        messagebox.showerror(label, str(payload))
+                    elif cancelled:
+                        messagebox.showinfo(label, f"Importación cancelada. Se agregaron {total} contactos.{extra}{detail}")
+                    else:
+                        messagebox.showinfo(label, f"Se agregaron {total} contactos.{extra}{detail}")
+                    return
+        except queue.Empty:
+            pass
+        self.after(50, self._poll_import, q, label, total, received, sources, source_start, rejected)
+
+    @staticmethod
+    def _duplicates_note(count):
+        return f" ({count} ya estaban en la lista y se fusionaron)" if count else ""
+
+    @staticmethod
+    def _sources_note(sources, limit=15):
+        """Resumen por archivo/hoja: si hubo más de un origen o alguno no se pudo leer (para mostrar el motivo)."""
+        if len(sources) < 2 and not any(failed for _, failed in sources):
+            return ""
+        lines = [text for text, _ in sources[:limit]] + ([f"... y {len(sources) - limit} más"] if len(sources) > limit else [])
+        return "\n\n" + "\n".join(lines)
+
+    @staticmethod
+    def _rejected_note(rejected):
+        """Números descartados al importar, por motivo (ver normalize_phones)."""
+        if not rejected:
+            return ""
+        return f"\n\nNúmeros rechazados ({sum(rejected.values())}): {reason_summary(rejected)}"
+
+    def cancel_import(self):
+        if self.import_cancel is not None:
+            self.import_cancel.set()
+            self.lbl_import.configure(text="Cancelando...")
 
     def select_image(self):
         path = filedialog.askopenfilename(filetypes=[("Img", "*.jpg;*.png;*.jpeg")])
@@ -257,73 +353,140 @@ class MainWindow(ctk.CTk):
 
     # --- HILOS DE CONTROL ---
     def start_bot_thread(self):
-        threading.Thread(target=self._bot_init_process, daemon=True).start()
+        for session in self.pool.sessions:
+            threading.Thread(target=self._bot_init_process, args=(session,), daemon=True).start()
 
-    def _bot_init_process(self):
+    def _bot_init_process(self, session):
+        qr_label = self.qr_labels[session.index]
+        on_qr = lambda session: self.ui.post(("qr", session.index), self._show_qr, session)
         try:
-            self.bot.start_browser()
-            while self.is_running:
-                if self.bot.is_logged_in():
-                    self.qr_label.configure(image=None, text="✅", font=("Arial", 50))
-                    self.lbl_status_bot.configure(text="Conectado ✅", text_color="green")
-                    self.btn_run.configure(state="normal", text="🚀 ENVIAR MENSAJES")
-                    break
-                
-                if self.bot.get_qr_screenshot():
-                    try:
-                        img = Image.open("temp_qr.png").resize((180, 180))
-                        ph = ImageTk.PhotoImage(img)
-                        self.qr_label.configure(image=ph, text="")
-                        self.qr_label.image = ph
-                    except: pass
-                time.sleep(1)
+            if self.pool.connect(session, on_qr, lambda: self.is_running):
+                self.ui.post(("qr", session.index), qr_label.configure, image=None, text="✅", font=("Arial", 50))
+                self.ui.post("bot_status", self.update_bot_status)
+                if not self.engine.is_sending:
+                    self.ui.post("btn_run", self.btn_run.configure, state="normal", text="🚀 ENVIAR MENSAJES")
         except Exception as e:
-            self.lbl_status_bot.configure(text=f"Error: {str(e)}", text_color="red")
+            self.ui.post("bot_status", self.lbl_status_bot.configure, text=f"{session.name} Error: {str(e)}", text_color="red")
+
+    def _show_qr(self, session):
+        """Hilo de Tk: carga la captura del QR en el label de la sesión."""
+        qr_label = self.qr_labels[session.index]
+        try:
+            img = Image.open(session.qr_path).resize((self.qr_size + 30, self.qr_size + 30))
+            ph = ImageTk.PhotoImage(img)
+            qr_label.configure(image=ph, text="")
+            qr_label.image = ph
+        except: pass
+
+    def update_bot_status(self):
+        """Muestra la salud de cada sesión: estado y enviados/fallidos."""
+        parts = [f"{name}: {status} ({sent}✅ {failed}❌)" for name, status, sent, failed in self.pool.health()]
+        color = "green" if self.pool.active_count() else "red"
+        self.lbl_status_bot.configure(text="\n".join(parts), text_color=color)
 
     def start_sending(self):
-        if not self.contacts_data:
+        if not len(self.contacts):
             messagebox.showwarning("Vacío", "No hay contactos para enviar.")
             return
+        if self.engine.is_checking:
+            messagebox.showwarning("Verificación", "Espere a que termine (o detenga) la verificación de números.")
+            return
 
-        self.is_sending = True
-        self.btn_run.configure(state="disabled", text="Enviando...")
-        threading.Thread(target=self._sending_process, daemon=True).start()
-
-    def _sending_process(self):
+        # Plantilla: se compila y valida antes de empezar, no a mitad de campaña
         base_msg = self.txt_msg.get("0.0", "end").strip()
-        
-        for c in self.contacts_data:
-            if not self.is_sending: break
-            if c['estado'] == "Enviado ✅": continue
-            
-            # Obtener datos frescos de la UI
-            number = c['widgets']['entry_num'].get().strip()
-            name = c['widgets']['entry_name'].get().strip()
-            
-            # Update UI
-            c['widgets']['lbl_stat'].configure(text="Enviando...", text_color="orange")
-            self.scroll_table.update_idletasks() # Forzar refresco UI
-            
-            try:
-                # Personalización del mensaje
-                final_msg = base_msg.replace("{nombre}", name)
-                
-                self.bot.send_message(number, final_msg, self.image_path)
-                
-                c['estado'] = "Enviado ✅"
-                c['widgets']['lbl_stat'].configure(text="Enviado ✅", text_color="green")
-            except Exception as e:
-                print(f"Error con {number}: {e}")
-                c['estado'] = "Error ❌"
-                c['widgets']['lbl_stat'].configure(text="Error ❌", text_color="red")
-            
-            time.sleep(2) # Pausa entre mensajes
+        stamp_text = self.entry_stamp.get().strip() if self.image_path else ""
+        try:
+            template = MessageTemplate(base_msg)
+            stamp = MessageTemplate(stamp_text) if stamp_text else None
+        except TemplateError as e:
+            messagebox.showerror("Mensaje", f"Error en el mensaje: {e}")
+            return
+        unknown = self.engine.missing_fields(template, stamp)
+        if unknown:
+            fields = ", ".join("{" + f + "}" for f in unknown)
+            messagebox.showerror("Mensaje", f"El mensaje usa campos que no existen en los contactos: {fields}")
+            return
 
-        self.btn_run.configure(state="normal", text="🚀 ENVIAR MENSAJES")
-        self.is_sending = False
-        messagebox.showinfo("Fin", "Proceso de envío terminado")
+        self.engine.is_sending = True
+        self.btn_run.configure(state="disabled", text="Enviando...")
+        threading.Thread(target=self._sending_process, args=(template, stamp), daemon=True).start()
+
+    def _sending_process(self, template, stamp=None):
+        self.engine.run(template, self.image_path, stamp)
+        self.ui.post("btn_run", self.btn_run.configure, state="normal", text="🚀 ENVIAR MENSAJES")
+        summary = "Proceso de envío terminado"
+        if self.engine.undelivered:
+            # Enviados que no llegaron a ✓✓ mientras se miraban los ticks (sin señal, bloqueados, o agendados con nombre)
+            summary += f"\n\n{len(self.engine.undelivered)} mensajes sin confirmar entrega (ver registro)."
+        self.ui.post(None, messagebox.showinfo, "Fin", summary)
+
+    # --- VERIFICACIÓN PREVIA ---
+    def toggle_precheck(self):
+        """Verifica qué números tienen WhatsApp antes de la campaña (o detiene la verificación en curso)."""
+        if self.engine.is_checking:
+            self.engine.is_checking = False
+            self.btn_check.configure(text="Deteniendo...")
+            return
+        if self.engine.is_sending:
+            messagebox.showwarning("Verificación", "No se puede verificar mientras se envía.")
+            return
+        if not self.pool.active_count():
+            messagebox.showwarning("Verificación", "Ninguna sesión de WhatsApp está lista.")
+            return
+        self.engine.is_checking = True
+        self.btn_check.configure(text="⏹ Detener verificación")
+        threading.Thread(target=self._precheck_process, daemon=True).start()
+
+    def _precheck_process(self):
+        progress = lambda done, total: self.ui.post("btn_check", self.btn_check.configure, text=f"⏹ Detener verificación ({done}/{total})")
+        self.engine.precheck(progress)
+        self.ui.post("btn_check", self.btn_check.configure, text="🔎 Verificar números")
+
+    def refresh_metrics(self):
+        """Actualiza el panel de métricas cada segundo y exporta CSV/Prometheus durante el envío."""
+        sent, failed, rate, rows = METRICS.snapshot()
+        if sent or failed or rows:
+            lines = [f"Enviados: {sent}  Fallidos: {failed}  Msg/min: {rate:.1f}"]
+            scheduler = self.engine.scheduler
+            if scheduler is not None and scheduler.waiting_reason:
+                lines.append(f"En espera: {scheduler.waiting_reason}")
+            lines += [f"{name:<14} p50 {p50:5.2f}s  p95 {p95:5.2f}s" for name, count, mean, p50, p95 in rows]
+            self.lbl_metrics.configure(text="\n".join(lines), text_color="#333")
+        
+        if self.engine.is_sending and time.time() - self.last_metrics_export >= config.METRICS_EXPORT_EVERY:
+            self.last_metrics_export = time.time()
+            threading.Thread(target=METRICS.export, daemon=True).start()
+        
+        if self.is_running:
+            self.after(1000, self.refresh_metrics)
+
+    def resume_campaign(self):
+        """Si quedó una campaña sin terminar (cierre o cuelgue), ofrece retomarla donde quedó."""
+        row = self.engine.unfinished()
+        if row is None: return
+        campaign_id, message, image_path, counts = row
+        
+        pending = counts.get(PENDING, 0) + counts.get(FAILED, 0)
+        question = (f"Hay una campaña sin terminar: {counts.get(SENT, 0)} enviados, {pending} por enviar"
+                    f" y {counts.get(UNCERTAIN, 0)} en duda (no se reenvían).\n¿Retomarla?")
+        if not messagebox.askyesno("Campaña sin terminar", question):
+            self.engine.discard(campaign_id)
+            return
+        
+        self.engine.restore(campaign_id)
+        self.contact_table.schedule_refresh()
+        self.update_count()
+        
+        self.txt_msg.delete("0.0", "end")
+        self.txt_msg.insert("0.0", message)
+        self.sync_preview_from_input()
+        if image_path and os.path.exists(image_path):
+            self.image_path = image_path
+            self.lbl_img.configure(text=os.path.basename(image_path))
 
     def on_close(self):
         self.is_running = False
-        self.bot.close()
-        self.destroy()
\ No newline at end of file
+        self.ui.stop()
+        self.engine.close()
+        self.pool.close()
+        self.destroy()
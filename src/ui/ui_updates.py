@@ -0,0 +1,49 @@
+import threading
+
+import config
+from src.utils.logger import log
+
+
+class UIUpdateQueue:
+    """
+    Canal de actualizaciones de UI desde hilos de trabajo (envío, QR, preparación).
+    Tk no es seguro entre hilos: los hilos solo encolan funciones y el hilo de Tk las ejecuta en un timer.
+    Las actualizaciones con la misma clave se fusionan: solo se aplica la última de cada intervalo,
+    así cientos de cambios de estado por segundo terminan en un redibujado por intervalo.
+    """
+
+    def __init__(self, widget, interval_ms=None):
+        self.widget = widget
+        self.interval_ms = interval_ms or config.UI_REFRESH_MS
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._running = False
+
+    def post(self, key, fn, *args, **kwargs):
+        """
+        Encola fn(*args, **kwargs) para el hilo de Tk. Seguro desde cualquier hilo.
+        key: actualizaciones con la misma clave se reemplazan (None = nunca se fusiona, ej. un aviso).
+        """
+        if key is None:
+            key = object()
+        with self._lock:
+            self._pending.pop(key, None) # La última actualización va al final del orden
+            self._pending[key] = (fn, args, kwargs)
+
+    def start(self):
+        self._running = True
+        self.widget.after(self.interval_ms, self._drain)
+
+    def stop(self):
+        self._running = False
+
+    def _drain(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        for fn, args, kwargs in pending.values():
+            try:
+                fn(*args, **kwargs)
+            except Exception as e:
+                log(f"Error actualizando la UI: {e}")
+        if self._running:
+            self.widget.after(self.interval_ms, self._drain)
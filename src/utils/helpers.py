@@ -1,21 +1,84 @@
 import re
+import unicodedata
+
+import config
+
+# Regex precompiladas (se usan en cada fila de cada import)
+_NON_DIGITS = re.compile(r'[^0-9]')
+_PHONE_IN_TEXT = re.compile(r'(?:\+|)\d{1,4}[\s.-]?\d{3,}[\s.-]?\d{3,}')
+_NON_KEY_CHARS = re.compile(r'[^a-z0-9]+')
+
+# Códigos de rechazo de normalize_phones
+REASON_EMPTY = "vacio"
+REASON_TOO_SHORT = "muy_corto"
+REASON_UNKNOWN_COUNTRY = "pais_desconocido"
+REASON_BAD_LENGTH = "largo_invalido"
+
+# Largo total (país + número) que admite E.164, para códigos de país que no están en COUNTRY_RULES
+E164_MIN_DIGITS = 8
+E164_MAX_DIGITS = 15
+
+# Reglas por código de país: largos válidos del número nacional (sin código de país ni prefijo 0)
+COUNTRY_RULES = {
+    # América
+    "1": (10,),          # EE.UU. / Canadá / Caribe
+    "51": (8, 9),        # Perú (fijo 8, móvil 9)
+    "52": (10,),         # México
+    "53": (8,),          # Cuba
+    "54": (10, 11),      # Argentina (móvil con 9 = 11)
+    "55": (10, 11),      # Brasil
+    "56": (9,),          # Chile
+    "57": (10,),         # Colombia
+    "58": (10,),         # Venezuela
+    "502": (8,),         # Guatemala
+    "503": (8,),         # El Salvador
+    "504": (8,),         # Honduras
+    "505": (8,),         # Nicaragua
+    "506": (8,),         # Costa Rica
+    "507": (7, 8),       # Panamá
+    "591": (8,),         # Bolivia
+    "593": (8, 9),       # Ecuador
+    "595": (9,),         # Paraguay
+    "598": (8,),         # Uruguay
+    # Europa
+    "7": (10,),          # Rusia / Kazajistán
+    "30": (10,),         # Grecia
+    "31": (9,),          # Países Bajos
+    "32": (8, 9),        # Bélgica
+    "33": (9,),          # Francia
+    "34": (9,),          # España
+    "36": (8, 9),        # Hungría
+    "39": (9, 10),       # Italia
+    "40": (9,),          # Rumania
+    "41": (9,),          # Suiza
+    "44": (10,),         # Reino Unido
+    "45": (8,),          # Dinamarca
+    "46": (7, 8, 9),     # Suecia
+    "47": (8,),          # Noruega
+    "48": (9,),          # Polonia
+    "49": (10, 11),      # Alemania
+    "351": (9,),         # Portugal
+    # Resto
+    "20": (10,),         # Egipto
+    "27": (9,),          # Sudáfrica
+    "60": (9, 10),       # Malasia
+    "61": (9,),          # Australia
+    "62": (9, 10, 11),   # Indonesia
+    "63": (10,),         # Filipinas
+    "66": (9,),          # Tailandia
+    "81": (10,),         # Japón
+    "82": (9, 10),       # Corea del Sur
+    "84": (9, 10),       # Vietnam
+    "86": (11,),         # China
+    "90": (10,),         # Turquía
+    "91": (10,),         # India
+    "212": (9,),         # Marruecos
+    "234": (10,),        # Nigeria
+    "966": (9,),         # Arabia Saudita
+    "971": (9,),         # Emiratos Árabes
+    "972": (9,),         # Israel
+}
 
-def clean_phone_number(phone):
-    """
-    Limpia el número y asegura formato internacional básico.
-    Elimina caracteres basura (paréntesis, guiones, espacios).
-    """
-    if not phone: return ""
-    
-    # Mantiene solo dígitos y el símbolo +
-    clean = re.sub(r'[^\d+]', '', str(phone))
-    
-    # Auto-completar '+' si parece un número internacional sin prefijo explícito
-    # (Asumiendo longitud > 9 como criterio básico)
-    if not clean.startswith("+") and len(clean) > 9:
-        clean = "+" + clean
-        
-    return clean
 
 def extract_numbers_from_text(text):
     """
@@ -23,4 +86,99 @@ def extract_numbers_from_text(text):
     Soporta formatos: +51 999..., 999-999-999, etc.
     """
     # Regex: Opcional(+), digitos pais, separadores opcionales, digitos cuerpo
-    return re.findall(r'(?:\+|)\d{1,4}[\s.-]?\d{3,}[\s.-]?\d{3,}', text)
\ No newline at end of file
+    return _PHONE_IN_TEXT.findall(text)
+
+def _split_country(digits):
+    """Retorna (codigo_pais, numero_nacional) por prefijo más largo, o (None, digits)."""
+    for size in (3, 2, 1):
+        cc = digits[:size]
+        if cc in COUNTRY_RULES:
+            return cc, digits[size:]
+    return None, digits
+
+def _normalize_one(raw, default_cc, default_lengths):
+    """Normaliza un número crudo. Retorna (e164, "") o ("", motivo)."""
+    text = raw.strip()
+    if not text:
+        return "", REASON_EMPTY
+
+    digits = _NON_DIGITS.sub('', text)
+    if len(digits) < 6:
+        return "", REASON_TOO_SHORT if digits else REASON_EMPTY
+
+    # Prefijo internacional explícito: '+' o '00'
+    explicit = text.startswith("+")
+    if not explicit and digits.startswith("00"):
+        explicit = True
+        digits = digits[2:]
+
+    if explicit:
+        cc, national = _split_country(digits)
+        if cc is None:
+            # País sin reglas propias (ej. +43 Austria): alcanza con el largo genérico de E.164
+            if E164_MIN_DIGITS <= len(digits) <= E164_MAX_DIGITS:
+                return "+" + digits, ""
+            return "", REASON_UNKNOWN_COUNTRY
+        if len(national) not in COUNTRY_RULES[cc]:
+            return "", REASON_BAD_LENGTH
+        return "+" + digits, ""
+
+    # Sin prefijo: primero como número nacional del país por defecto (quitando el 0 troncal)
+    national = digits.lstrip("0")
+    if len(national) in default_lengths:
+        return "+" + default_cc + national, ""
+
+    # Luego como internacional sin '+' (ej: 51999888777 copiado de Excel)
+    cc, national = _split_country(digits)
+    if cc is not None and len(national) in COUNTRY_RULES[cc]:
+        return "+" + digits, ""
+    return "", REASON_BAD_LENGTH
+
+def normalize_phones(values, default_country=None):
+    """
+    Normaliza en lote números crudos a formato E.164 (+<país><número>).
+    Acepta lista, pandas.Series o numpy array.
+    Retorna dos listas alineadas con la entrada: (numeros, motivos).
+    Para cada posición, numeros[i] es el E.164 o "" si se rechazó, y motivos[i] el código de rechazo o "".
+    """
+    default_cc = str(default_country or config.DEFAULT_COUNTRY_CODE).lstrip("+")
+    default_lengths = COUNTRY_RULES.get(default_cc, ())
+
+    if hasattr(values, "tolist"):
+        values = values.tolist()
+
+    numbers = []
+    reasons = []
+    cache = {} # Las listas reales traen muchos repetidos
+    for raw in values:
+        if isinstance(raw, str):
+            key = raw
+        elif isinstance(raw, float):
+            # Celdas numéricas de Excel: 51999888777.0 -> "51999888777" (NaN -> vacío)
+            key = str(int(raw)) if raw.is_integer() else ""
+        else:
+            key = "" if raw is None else str(raw)
+        result = cache.get(key)
+        if result is None:
+            result = cache[key] = _normalize_one(key, default_cc, default_lengths)
+        numbers.append(result[0])
+        reasons.append(result[1])
+    return numbers, reasons
+
+def reason_summary(counts):
+    """Texto de los rechazos por motivo, de más a menos frecuente: 'muy_corto: 3, vacio: 1'."""
+    return ", ".join(f"{reason}: {n}" for reason, n in sorted(counts.items(), key=lambda kv: -kv[1]))
+
+def normalize_phone(raw, default_country=None):
+    """Versión de un solo número de normalize_phones. Retorna (e164, motivo)."""
+    numbers, reasons = normalize_phones([raw], default_country)
+    return numbers[0], reasons[0]
+
+
+def field_key(name):
+    """
+    Clave normalizada de una columna o campo de plantilla: minúsculas, sin tildes y con '_'.
+    'Ciudad de Envío' -> 'ciudad_de_envio'
+    """
+    text = unicodedata.normalize("NFKD", str(name)).encode("ascii", "ignore").decode("ascii")
+    return _NON_KEY_CHARS.sub("_", text.lower()).strip("_")
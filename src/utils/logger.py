@@ -0,0 +1,136 @@
+import atexit
+import json
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+
+import config
+
+_STOP = object()
+
+
+class AsyncLogWriter:
+    """
+    Escritor de logs en segundo plano.
+    log() solo encola el registro; un hilo los toma en lotes, los formatea y los escribe con un
+    único write/flush por lote sobre un archivo que queda abierto. Rota por tamaño o por día.
+    """
+
+    def __init__(self, path, jsonl=False, rotate=None, max_bytes=None, backups=None):
+        self.path = path
+        self.jsonl = jsonl
+        self.rotate = rotate or config.LOG_ROTATE
+        self.max_bytes = max_bytes or config.LOG_MAX_BYTES
+        self.backups = backups if backups is not None else config.LOG_BACKUPS
+        self._queue = queue.SimpleQueue()
+        self._file = None
+        self._opened_day = None
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self._thread.start()
+
+    def write(self, record):
+        self._queue.put(record)
+
+    def close(self):
+        """Vacía la cola y cierra el archivo (se llama al salir)."""
+        if self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join(timeout=5)
+
+    # --- Hilo escritor ---
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            # Tomar todo lo acumulado sin bloquear
+            while len(batch) < config.LOG_BATCH_SIZE:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            stop = _STOP in batch
+            records = [r for r in batch if r is not _STOP]
+            if records:
+                self._write_batch(records)
+            if stop:
+                if self._file:
+                    self._file.close()
+                return
+
+    def _write_batch(self, records):
+        data = "".join(self._format(r) for r in records)
+        print(data, end="")
+        try:
+            self._rotate_if_needed(len(data.encode("utf-8")))
+            self._file.write(data)
+            self._file.flush()
+        except Exception:
+            pass
+
+    def _format(self, record):
+        if self.jsonl:
+            rec = dict(record)
+            rec['ts'] = datetime.fromtimestamp(rec['ts']).isoformat(timespec="milliseconds")
+            return json.dumps(rec, ensure_ascii=False, default=str) + "\n"
+        timestamp = datetime.fromtimestamp(record['ts']).strftime('%Y-%m-%d %H:%M:%S')
+        extra = " ".join(f"{k}={v}" for k, v in record.items() if k not in ('ts', 'msg'))
+        return f"[{timestamp}] {record['msg']}{' | ' + extra if extra else ''}\n"
+
+    def _rotate_if_needed(self, incoming):
+        today = datetime.now().date()
+        if self._file is not None:
+            if self.rotate == "daily" and today != self._opened_day:
+                self._file.close()
+                self._file = None
+                self._roll(f"{self.path}.{self._opened_day.isoformat()}")
+            elif self.rotate == "size" and self._file.tell() + incoming > self.max_bytes:
+                self._file.close()
+                self._file = None
+                self._shift_backups()
+
+        if self._file is None:
+            self._file = open(self.path, "a", encoding="utf-8")
+            self._opened_day = today
+
+    def _shift_backups(self):
+        # registro.txt -> registro.txt.1 -> registro.txt.2 ... (se descarta la más vieja)
+        for i in range(self.backups - 1, 0, -1):
+            src = f"{self.path}.{i}"
+            if os.path.exists(src):
+                os.replace(src, f"{self.path}.{i + 1}")
+        if self.backups > 0:
+            self._roll(f"{self.path}.1")
+        elif os.path.exists(self.path):
+            os.remove(self.path)
+
+    def _roll(self, target):
+        if os.path.exists(self.path):
+            os.replace(self.path, target)
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def _get_writer():
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                path = config.LOG_FILE_JSONL if config.LOG_JSONL else config.LOG_FILE
+                _writer = AsyncLogWriter(path, jsonl=config.LOG_JSONL)
+                atexit.register(_writer.close)
+    return _writer
+
+
+def log(msg, **fields):
+    """
+    Registra un mensaje sin tocar el disco en el hilo que llama.
+    Campos opcionales (contact, step, duration...) van como columnas en modo JSONL.
+    """
+    record = {'ts': time.time(), 'msg': msg}
+    if fields:
+        record.update(fields)
+    _get_writer().write(record)
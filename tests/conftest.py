@@ -0,0 +1,29 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import config
+
+# El log de las pruebas no se mezcla con el registro_bot.txt del proyecto
+_LOG_DIR = tempfile.mkdtemp(prefix="wsa-tests-")
+config.LOG_FILE = os.path.join(_LOG_DIR, "registro_bot.txt")
+config.LOG_FILE_JSONL = os.path.join(_LOG_DIR, "registro_bot.jsonl")
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    """Base SQLite propia de cada prueba (campañas y caché de números)."""
+    return str(tmp_path / "campanas.db")
+
+
+@pytest.fixture
+def no_windows(monkeypatch):
+    """Sin horario de envío ni espera aleatoria: el ritmo solo depende de las cubetas y los límites."""
+    monkeypatch.setattr(config, "SEND_WINDOWS", [])
+    monkeypatch.setattr(config, "RATE_JITTER", 0)
@@ -0,0 +1,155 @@
+import time
+
+import pytest
+
+import config
+from src.services import campaign_engine
+from src.services.campaign_engine import (CampaignEngine, STATUS_DELIVERED, STATUS_INVALID, STATUS_PENDING,
+                                          STATUS_RETRY, STATUS_SENT, STATUS_UNCERTAIN)
+from src.services.campaign_store import CampaignStore, FAILED, INVALID, SENT, UNCERTAIN
+from src.services.contact_store import ContactStore
+from src.services.number_cache import NumberCache
+from src.services.rate_limiter import SendScheduler
+from src.services.send_errors import (AttachmentError, BrowserError, ChatLoadError, ComposeError, InvalidNumberError,
+                                      MalformedNumberError, UnconfirmedSendError)
+
+
+@pytest.fixture
+def engine(db_path):
+    engine = CampaignEngine(None, ContactStore(), store=CampaignStore(db_path), numbers=NumberCache(db_path))
+    yield engine
+    engine.store.close()
+    engine.numbers.close()
+
+
+@pytest.fixture
+def fixed_jitter(monkeypatch):
+    monkeypatch.setattr(campaign_engine.random, "uniform", lambda a, b: 1.0)
+
+
+def test_retry_delays_grow_and_are_capped(engine, fixed_jitter, monkeypatch):
+    monkeypatch.setattr(config, "RETRY_MAX", 5)
+    monkeypatch.setattr(config, "RETRY_BASE_DELAY", 30)
+    monkeypatch.setattr(config, "RETRY_MAX_DELAY", 100)
+    start = time.time()
+    delays = []
+    for _ in range(4):
+        assert engine._schedule_retry(7)
+        due, uid = engine._retries.pop()
+        delays.append(round(due - start))
+    assert delays == [30, 60, 100, 100]
+
+
+def test_retries_stop_after_max(engine, fixed_jitter, monkeypatch):
+    monkeypatch.setattr(config, "RETRY_MAX", 2)
+    assert engine._schedule_retry(1)
+    assert engine._schedule_retry(1)
+    assert not engine._schedule_retry(1)
+    assert len(engine._retries) == 2
+
+
+def test_due_retry_pops_in_time_order(engine, fixed_jitter, monkeypatch):
+    monkeypatch.setattr(config, "RETRY_BASE_DELAY", 0)
+    assert engine._due_retry() is None
+    engine._schedule_retry(3)
+    engine._schedule_retry(1)
+    engine._retries[0] = (time.time() + 3600, engine._retries[0][1])  # Uno todavía no vence
+    engine._retries.sort()
+    assert engine._due_retry() == 1
+    assert engine._due_retry() is None
+    assert len(engine._retries) == 1
+
+
+def test_resolved_contacts_are_not_requeued(engine):
+    contacts = engine.contacts
+    for number, status in [("+51911111111", STATUS_SENT), ("+51922222222", STATUS_DELIVERED),
+                           ("+51933333333", STATUS_UNCERTAIN), ("+51944444444", STATUS_INVALID),
+                           ("+51955555555", STATUS_PENDING)]:
+        contacts.add(number, status=status)
+    engine._sync_campaign("Hola", None)
+    assert [row[1] for row in engine.store.contacts(engine.campaign_id)] == ["+51955555555"]
+
+
+class FakeBot:
+    def __init__(self, error=None):
+        self.error = error
+
+    def send_message(self, number, message, image_path=None):
+        if self.error is not None:
+            raise self.error
+
+
+class FakeSession:
+    name = "s1"
+
+    def __init__(self, bot):
+        self.bot = bot
+
+
+class FakePool:
+    def __init__(self):
+        self.released = []
+
+    def release(self, session, ok, error=""):
+        self.released.append((ok, error))
+
+
+@pytest.mark.parametrize("error, transient", [
+    (ChatLoadError("x"), True), (AttachmentError("x"), True), (ComposeError("x"), True), (BrowserError("x"), True),
+    (InvalidNumberError("x"), False), (MalformedNumberError("x"), False), (UnconfirmedSendError("x"), False),
+])
+def test_error_categories(error, transient):
+    assert error.transient is transient
+    assert error.category != "desconocido"
+
+
+def _send(engine, error, monkeypatch):
+    """Un envío de `_send_one` con un bot que falla con `error` (None = envío exitoso)."""
+    monkeypatch.setattr(config, "SEND_WINDOWS", [])
+    monkeypatch.setattr(config, "RATE_PER_HOUR", 10)
+    engine.pool = FakePool()
+    engine.scheduler = SendScheduler()
+    engine.is_sending = True
+    uid = engine.contacts.add("+51999888777")
+    campaign_id = engine._sync_campaign("Hola", None)
+    engine._send_one(FakeSession(FakeBot(error)), campaign_id, uid, "Hola")
+    engine.store.flush()
+    status = engine.store.contacts(campaign_id)[0][3]
+    return uid, status
+
+
+def test_send_ok(engine, monkeypatch):
+    uid, status = _send(engine, None, monkeypatch)
+    assert engine.contacts.get(uid)['estado'] == STATUS_SENT
+    assert status == SENT
+    assert engine.pool.released == [(True, "")]
+    assert len(engine.scheduler._sent_hour) == 1
+
+
+def test_transient_error_is_retried(engine, fixed_jitter, monkeypatch):
+    error = ChatLoadError("no cargó")
+    uid, status = _send(engine, error, monkeypatch)
+    assert engine.contacts.get(uid)['estado'] == STATUS_RETRY
+    assert status == FAILED  # Reclamable por el reintento
+    assert [u for _, u in engine._retries] == [uid]
+    assert engine.pool.released == [(False, error)]
+    assert not engine.scheduler._sent_hour  # No salió: no cuenta para el límite
+
+
+def test_invalid_number_is_not_retried(engine, monkeypatch):
+    uid, status = _send(engine, InvalidNumberError("sin WhatsApp"), monkeypatch)
+    assert engine.contacts.get(uid)['estado'] == STATUS_INVALID
+    assert status == INVALID
+    assert engine.numbers.is_invalid("+51999888777")
+    assert not engine._retries
+    assert engine.pool.released == [(None, "")]
+
+
+def test_unconfirmed_send_is_not_retried(engine, monkeypatch):
+    error = UnconfirmedSendError("sin burbuja")
+    uid, status = _send(engine, error, monkeypatch)
+    assert engine.contacts.get(uid)['estado'] == STATUS_UNCERTAIN
+    assert status == UNCERTAIN
+    assert not engine._retries
+    assert engine.pool.released == [(False, error)]
+    assert len(engine.scheduler._sent_hour) == 1  # Pudo haber salido: conserva su lugar en el límite
@@ -0,0 +1,99 @@
+import time
+
+import config
+from src.services.campaign_store import CampaignStore, FAILED, INVALID, PENDING, SENDING, SENT, UNCERTAIN
+
+
+def _store_with_contacts(db_path, count=3):
+    store = CampaignStore(db_path)
+    campaign_id = store.create("Hola {nombre}", None)
+    store.add_contacts(campaign_id, [(i, f"+5199988877{i}", f"C{i}", {"plan": "A"} if i == 0 else None)
+                                     for i in range(count)])
+    return store, campaign_id
+
+
+def test_contacts_round_trip(db_path):
+    store, campaign_id = _store_with_contacts(db_path)
+    store.add_contacts(campaign_id, [(0, "+51000000000", "Repetido", None)])  # seq existente: se ignora
+    rows = store.contacts(campaign_id)
+    assert rows[0] == (0, "+51999888770", "C0", PENDING, {"plan": "A"})
+    assert [r[0] for r in rows] == [0, 1, 2]
+    assert store.counts(campaign_id) == {PENDING: 3}
+
+
+def test_claim_only_once(db_path):
+    store, campaign_id = _store_with_contacts(db_path)
+    assert store.claim(campaign_id, 0)
+    assert not store.claim(campaign_id, 0)  # Ya está enviando
+    store.record(campaign_id, 0, True)
+    assert not store.claim(campaign_id, 0)  # Enviado: nunca se reclama de nuevo
+    assert store.counts(campaign_id)[SENT] == 1
+
+
+def test_failed_is_claimable_again(db_path):
+    store, campaign_id = _store_with_contacts(db_path)
+    assert store.claim(campaign_id, 1)
+    store.record(campaign_id, 1, False)
+    assert store.claim(campaign_id, 1)
+    attempts = store.conn.execute("SELECT attempts FROM campaign_contacts WHERE seq = 1").fetchone()[0]
+    assert attempts == 2
+
+
+def test_forced_status_is_not_claimable(db_path):
+    store, campaign_id = _store_with_contacts(db_path)
+    assert store.claim(campaign_id, 2)
+    store.record(campaign_id, 2, False, INVALID)
+    assert not store.claim(campaign_id, 2)
+    assert store.counts(campaign_id)[INVALID] == 1
+
+
+def test_results_are_batched(db_path, monkeypatch):
+    monkeypatch.setattr(config, "CAMPAIGN_FLUSH_EVERY", 100)
+    store, campaign_id = _store_with_contacts(db_path)
+    store.claim(campaign_id, 0)
+    store.record(campaign_id, 0, True)
+    assert store.counts(campaign_id)[SENDING] == 1  # Todavía en memoria
+    store.claim(campaign_id, 1)  # El siguiente reclamo escribe los resultados acumulados
+    assert store.counts(campaign_id) == {SENT: 1, SENDING: 1, PENDING: 1}
+
+
+def test_recover_after_crash(db_path):
+    store, campaign_id = _store_with_contacts(db_path)
+    store.claim(campaign_id, 0)
+    store.claim(campaign_id, 1)
+    store.record(campaign_id, 1, False)
+    store.flush()
+    store.conn.close()  # Cierre inesperado: el seq 0 quedó "enviando"
+
+    reopened = CampaignStore(db_path)
+    assert reopened.unfinished() == (campaign_id, "Hola {nombre}", None)
+    reopened.recover(campaign_id)
+    assert reopened.counts(campaign_id) == {UNCERTAIN: 1, FAILED: 1, PENDING: 1}
+    assert not reopened.claim(campaign_id, 0)  # En duda: no se reenvía solo
+    assert reopened.claim(campaign_id, 1)
+
+    reopened.finish(campaign_id)
+    assert reopened.unfinished() is None
+
+
+def test_sent_times_and_index(db_path):
+    store, campaign_id = _store_with_contacts(db_path)
+    before = time.time()
+    store.claim(campaign_id, 0)
+    store.record(campaign_id, 0, True)
+    store.claim(campaign_id, 1)
+    store.record(campaign_id, 1, False)
+    times = store.sent_times(before - 1)
+    assert len(times) == 1 and times[0] >= before
+    assert store.sent_times(time.time() + 10) == []
+    plan = " ".join(str(r) for r in store.conn.execute(
+        "EXPLAIN QUERY PLAN SELECT sent_at FROM campaign_contacts WHERE sent_at >= ?", (0,)))
+    assert "idx_campaign_contacts_sent_at" in plan
+
+
+def test_record_receipts(db_path):
+    store, campaign_id = _store_with_contacts(db_path)
+    store.record_receipts(campaign_id, [(0, 1.5, None)])
+    store.record_receipts(campaign_id, [(0, None, 4.0)])
+    row = store.conn.execute("SELECT sent_s, delivered_s FROM campaign_contacts WHERE seq = 0").fetchone()
+    assert row == (1.5, 4.0)
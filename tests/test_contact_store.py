@@ -0,0 +1,89 @@
+import threading
+
+from src.services.contact_store import ContactStore, number_key
+
+
+def test_number_key_ignores_formatting():
+    assert number_key("+51 999-888-777") == number_key("51999888777") == "51999888777"
+
+
+def test_add_many_merges_duplicates_in_any_format():
+    store = ContactStore()
+    added = store.add_many([("+51999888777", "Ana"), ("51 999 888 777", "Otra"), "+51911222333"])
+    assert added == 2
+    assert len(store) == 2
+    assert "51999888777" in store
+    assert store.find("+51 999 888 777")['nombre'] == "Ana"
+
+
+def test_merge_fill_completes_empty_name_and_data():
+    store = ContactStore(merge_names="fill")
+    uid = store.add("+51999888777", "", data={"ciudad": "", "plan": "A"})
+    store.add_many([("51999888777", "Ana", {"ciudad": "Lima", "plan": "B"})])
+    row = store.get(uid)
+    assert row['nombre'] == "Ana"
+    assert row['datos'] == {"ciudad": "Lima", "plan": "A"}
+    store.add("51999888777", "Otro nombre")
+    assert row['nombre'] == "Ana"
+
+
+def test_merge_replace_and_keep():
+    replace = ContactStore(merge_names="replace")
+    uid = replace.add("+51999888777", "Ana", data={"plan": "A"})
+    replace.add("+51999888777", "Ana María", data={"plan": "B"})
+    assert replace.get(uid)['nombre'] == "Ana María"
+    assert replace.get(uid)['datos'] == {"plan": "B"}
+
+    keep = ContactStore(merge_names="keep")
+    uid = keep.add("+51999888777", "")
+    keep.add("+51999888777", "Ana")
+    assert keep.get(uid)['nombre'] == ""
+
+
+def test_delete_keeps_order_and_frees_number():
+    store = ContactStore()
+    ids = [store.add(n) for n in ("+51911111111", "+51922222222", "+51933333333")]
+    store.delete_many([ids[1]])
+    assert store.ids() == [ids[0], ids[2]]
+    assert store.row_at(1)['numero'] == "+51933333333"
+    assert "+51922222222" not in store
+    assert store.add("+51922222222") not in ids  # Vuelve a agregarse como contacto nuevo
+    store.delete(12345)  # Un id inexistente no falla
+
+
+def test_update_number_reindexes():
+    store = ContactStore()
+    uid = store.add("+51911111111", "Ana")
+    store.update(uid, numero="+51922222222")
+    assert store.find("+51911111111") is None
+    assert store.find("51922222222")['id'] == uid
+
+
+def test_set_status():
+    store = ContactStore()
+    uid = store.add("+51911111111")
+    store.set_status(uid, "Enviado")
+    assert store.get(uid)['estado'] == "Enviado"
+    assert [row['estado'] for row in store] == ["Enviado"]
+
+
+def test_concurrent_adds_and_compaction_keep_every_row():
+    store = ContactStore()
+    doomed = [store.add(f"+5190000{i:04d}") for i in range(2000)]
+
+    def importer():
+        for start in range(0, 20000, 500):
+            store.add_many(f"+5191{i:07d}" for i in range(start, start + 500))
+
+    def engine():
+        for uid in doomed:
+            store.delete(uid)
+            store.ids()  # Fuerza la compactación mientras se agregan filas
+
+    threads = [threading.Thread(target=importer), threading.Thread(target=engine)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(store) == 20000
+    assert len(store.ids()) == 20000
@@ -0,0 +1,24 @@
+from src.services.data_service import DataService
+
+
+def test_csv_rows_are_parsed_records(tmp_path):
+    path = tmp_path / "lista.csv"
+    path.write_text('nombre,tel,nota\nAna,999888777,"línea 1\nlínea 2"\n\n\nLuis,12,x\n', encoding="utf-8")
+    reports = []
+    chunks = list(DataService.iter_sources([str(path)], report=lambda *args, **kw: reports.append((args, kw))))
+    assert [c[:2] for chunk in chunks for c in chunk] == [("+51999888777", "Ana")]
+    assert chunks[0][0][2]["nota"] == "línea 1\nlínea 2"
+    # Dos registros (el multilínea cuenta una vez, las líneas vacías no), uno válido
+    assert reports == [(("lista.csv", 2, 1, {"muy_corto": 1}), {})]
+
+
+def test_unreadable_file_is_reported_with_its_error(tmp_path):
+    good = tmp_path / "a.csv"
+    good.write_text("999888777\n", encoding="utf-8")
+    reports = []
+    chunks = list(DataService.iter_sources([str(good), str(tmp_path / "falta.csv")],
+                                           report=lambda *args, **kw: reports.append((args, kw))))
+    assert sum(len(c) for c in chunks) == 1
+    assert reports[0] == (("a.csv", 1, 1, {}), {})
+    origin, rows, valid, rejected = reports[1][0]
+    assert (origin, rows, valid) == ("falta.csv", 0, 0) and reports[1][1]["error"]
@@ -0,0 +1,55 @@
+import pytest
+
+from src.utils.helpers import (REASON_BAD_LENGTH, REASON_EMPTY, REASON_TOO_SHORT, REASON_UNKNOWN_COUNTRY,
+                               normalize_phone, normalize_phones, reason_summary)
+
+
+@pytest.mark.parametrize("raw, expected", [
+    ("999888777", "+51999888777"),        # Nacional del país por defecto (Perú)
+    ("0999888777", "+51999888777"),       # Con 0 troncal
+    ("+51 999-888-777", "+51999888777"),
+    ("0051 999 888 777", "+51999888777"), # Prefijo internacional 00
+    ("51999888777", "+51999888777"),      # Internacional sin '+' (copiado de Excel)
+    ("+54 9 11 2345-6789", "+5491123456789"),
+    ("+43 664 1234567", "+436641234567"), # País sin reglas propias: largo genérico de E.164
+])
+def test_normalize_accepts(raw, expected):
+    assert normalize_phone(raw) == (expected, "")
+
+
+@pytest.mark.parametrize("raw, reason", [
+    ("", REASON_EMPTY),
+    ("   ", REASON_EMPTY),
+    ("abc", REASON_EMPTY),
+    ("12345", REASON_TOO_SHORT),
+    ("+51 12345678901", REASON_BAD_LENGTH),
+    ("+999 1234 5678 9012 345", REASON_UNKNOWN_COUNTRY), # País desconocido y más de 15 dígitos
+    ("1234567", REASON_BAD_LENGTH),
+])
+def test_normalize_rejects_with_reason(raw, reason):
+    assert normalize_phone(raw) == ("", reason)
+
+
+def test_normalize_batch_is_aligned_with_input():
+    values = ["999888777", "", 51999888777.0, float("nan"), None, "999888777"]
+    numbers, reasons = normalize_phones(values)
+    assert numbers == ["+51999888777", "", "+51999888777", "", "", "+51999888777"]
+    assert reasons == ["", REASON_EMPTY, "", REASON_EMPTY, REASON_EMPTY, ""]
+
+
+def test_normalize_default_country():
+    assert normalize_phone("1123456789", default_country="+54") == ("+541123456789", "")
+    assert normalize_phone("1123456789", default_country="54") == ("+541123456789", "")
+
+
+def test_normalize_accepts_objects_with_tolist():
+    class Column:
+        def tolist(self):
+            return ["999888777", "12"]
+
+    assert normalize_phones(Column()) == (["+51999888777", ""], ["", REASON_TOO_SHORT])
+
+
+def test_reason_summary_most_frequent_first():
+    assert reason_summary({REASON_EMPTY: 1, REASON_TOO_SHORT: 3}) == "muy_corto: 3, vacio: 1"
+    assert reason_summary({}) == ""
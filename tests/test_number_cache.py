@@ -0,0 +1,42 @@
+import time
+
+import config
+from src.services import number_cache
+from src.services.number_cache import NumberCache
+
+
+def test_lookup_in_any_format(db_path):
+    cache = NumberCache(db_path)
+    assert cache.lookup("+51999888777") is None
+    cache.record("+51 999 888 777", False)
+    cache.record("+51911222333", True)
+    assert cache.lookup("51999888777") is False
+    assert cache.is_invalid("+51-999-888-777")
+    assert cache.lookup("+51911222333") is True
+    assert not cache.is_invalid("+51911222333")
+    cache.record("sin dígitos", True)  # Sin clave: se ignora
+    assert cache.lookup("sin dígitos") is None
+
+
+def test_persists_after_close(db_path):
+    cache = NumberCache(db_path)
+    cache.record("+51999888777", False)
+    cache.close()
+    assert NumberCache(db_path).lookup("+51999888777") is False
+
+
+def test_entries_expire(db_path, monkeypatch):
+    monkeypatch.setattr(config, "INVALID_CACHE_DAYS", 1)
+    monkeypatch.setattr(config, "VALID_CACHE_DAYS", 3)
+    cache = NumberCache(db_path)
+    cache.record("+51999888777", False)
+    cache.record("+51911222333", True)
+    cache.close()
+
+    later = time.time() + 2 * 86400
+    monkeypatch.setattr(number_cache.time, "time", lambda: later)
+    reopened = NumberCache(db_path)
+    assert reopened.lookup("+51999888777") is None  # Inválido vencido (y borrado de la base)
+    assert reopened.lookup("+51911222333") is True
+    rows = reopened.conn.execute("SELECT phone FROM number_validity").fetchall()
+    assert rows == [("51911222333",)]
@@ -0,0 +1,75 @@
+import time
+from datetime import datetime
+
+import config
+from src.services.rate_limiter import SendScheduler, TokenBucket, _parse_window, _window_delay
+
+never = lambda: False
+
+
+def test_token_bucket_refills_at_rate():
+    bucket = TokenBucket(rate=2, capacity=1)
+    now = bucket.updated
+    assert bucket.delay(now) == 0
+    bucket.take(now)
+    assert bucket.delay(now) == 0.5
+    assert bucket.delay(now + 0.5) == 0
+
+
+def test_hourly_limit_blocks(no_windows, monkeypatch):
+    monkeypatch.setattr(config, "RATE_PER_SESSION_PER_MIN", 60000)
+    monkeypatch.setattr(config, "RATE_BURST", 10)
+    monkeypatch.setattr(config, "RATE_PER_HOUR", 2)
+    scheduler = SendScheduler()
+    assert scheduler.wait("s1", never)
+    assert scheduler.wait("s2", never)  # El límite es global: lo comparten las sesiones
+    delay, reason = scheduler._delay("s1")
+    assert reason == "límite por hora alcanzado" and delay > 3500
+    assert not scheduler.wait("s1", lambda: True)
+
+
+def test_limits_survive_restart(no_windows, monkeypatch):
+    monkeypatch.setattr(config, "RATE_PER_DAY", 2)
+    now = time.time()
+    scheduler = SendScheduler(sent_times=[now - 90000, now - 7200, now - 60])  # La primera ya venció
+    assert len(scheduler._sent_day) == 2 and len(scheduler._sent_hour) == 1
+    assert scheduler._delay("s1")[1] == "límite diario alcanzado"
+
+
+def test_release_gives_back_the_slot(no_windows, monkeypatch):
+    monkeypatch.setattr(config, "RATE_PER_HOUR", 1)
+    scheduler = SendScheduler()
+    assert scheduler.wait("s1", never)
+    assert scheduler._delay("s1")[1] == "límite por hora alcanzado"
+
+    scheduler.release("s1")  # El reclamo falló: vuelven el cupo y la ficha de la sesión
+    assert not scheduler._sent_hour and not scheduler._sent_day
+    assert scheduler._delay("s1") == (0, "sesión")
+
+    assert scheduler.wait("s1", never)
+    scheduler.release("s1", attempted=True)  # El envío falló: vuelve el cupo, no la ficha
+    assert not scheduler._sent_hour
+    assert scheduler._delay("s1")[0] > 0
+    scheduler.release("s1")  # Sin turno reservado no hace nada
+    assert not scheduler._sent_day
+
+
+def test_backoff_slows_down_and_recovers(no_windows, monkeypatch):
+    monkeypatch.setattr(config, "BACKOFF_WINDOW", 10)
+    scheduler = SendScheduler()
+    for _ in range(5):
+        scheduler.record(False)
+    assert scheduler.backoff == 2
+    for _ in range(10):
+        scheduler.record(True)
+    assert scheduler.backoff == 1
+
+
+def test_send_windows():
+    windows = [_parse_window("09:00-20:00"), _parse_window("22:00 - 02:00")]
+    assert windows[1] == ((22, 0), (2, 0))
+    assert _window_delay(windows, datetime(2024, 1, 1, 10, 30)) == 0
+    assert _window_delay(windows, datetime(2024, 1, 1, 1, 0)) == 0  # Cruza la medianoche
+    assert _window_delay(windows, datetime(2024, 1, 1, 21, 0)) == 3600
+    assert _window_delay(windows, datetime(2024, 1, 1, 8, 0)) == 3600
+    assert _window_delay([], datetime(2024, 1, 1, 3, 0)) == 0
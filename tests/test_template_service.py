@@ -0,0 +1,55 @@
+import pytest
+
+from src.services.template_service import MessageTemplate, TemplateError, contact_values
+
+
+def test_fields_and_defaults():
+    template = MessageTemplate("Hola {Nombre}, su ciudad: {Ciudad de Envío:sin datos}")
+    assert template.fields == {"nombre", "ciudad_de_envio"}
+    assert template.render(contact_values("+51999888777", "Ana", {"ciudad_de_envio": "Lima"})) == \
+        "Hola Ana, su ciudad: Lima"
+    assert template.render(contact_values("+51999888777", "Ana", {"ciudad_de_envio": "  "})) == \
+        "Hola Ana, su ciudad: sin datos"
+
+
+def test_conditionals():
+    template = MessageTemplate("Hola{?nombre} {nombre}{/nombre}{!nombre} cliente{/}.")
+    assert template.render(contact_values("+51999888777", "Ana")) == "Hola Ana."
+    assert template.render(contact_values("+51999888777", "")) == "Hola cliente."
+
+
+def test_escapes_are_literal():
+    assert MessageTemplate(r"\{nombre\} \| ok").render({}) == "{nombre} | ok"
+
+
+def test_spintax_is_stable_per_number():
+    template = MessageTemplate("{Hola|Buenas|Qué tal} {nombre}")
+    rows = [contact_values(f"+5199988877{i}", "Ana") for i in range(10)]
+    first = template.render_all(rows)
+    assert first == template.render_all(rows)
+    assert all(text.endswith(" Ana") for text in first)
+    assert {text.split(" ")[0] for text in first} <= {"Hola", "Buenas", "Qué"}
+
+
+def test_spintax_with_nested_fields():
+    template = MessageTemplate("{Hola {nombre}|Buenas {nombre}}")
+    assert template.render(contact_values("+51999888777", "Ana"), seed=1) in ("Hola Ana", "Buenas Ana")
+
+
+def test_unknown_fields():
+    template = MessageTemplate("{nombre} {Plan} {?deuda}debe{/deuda}")
+    assert template.unknown_fields(["Plan"]) == ["deuda"]
+    assert template.unknown_fields(["plan", "Deuda"]) == []
+
+
+@pytest.mark.parametrize("text", [
+    "Hola {nombre",
+    "{/nombre}",
+    "{?deuda}debe",
+    "{?deuda}debe{/plan}",
+    "{}",
+    "{a{b}}",
+])
+def test_syntax_errors(text):
+    with pytest.raises(TemplateError):
+        MessageTemplate(text)